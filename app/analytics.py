@@ -0,0 +1,317 @@
+import asyncio
+import heapq
+import json
+import logging
+import re
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import select
+
+from app.config import ANALYTICS_LAG, ANALYTICS_MAX_SPRINTS, ANALYTICS_TOP_K, EXPORT_BATCH_SIZE
+from app.crud import dialect_insert
+from app.db import SessionLocal
+from app.models import SprintStatsSnapshot, Word
+
+logger = logging.getLogger(__name__)
+
+# Буквенные слова, дефис и апостроф внутри слова допустимы (всё-таки, don't)
+_TOKEN = re.compile(r"[^\W\d_]+(?:[-'’][^\W\d_]+)*")
+
+# Лёгкая лемматизация: отрезаем самое длинное окончание, если основа остаётся не короче
+# трёх букв. Формы одного слова (море, моря, морем) сходятся, точность словаря не нужна
+_SUFFIXES = {
+    "ru": (
+        "ями", "ами", "ого", "его", "ому", "ему", "ыми", "ими", "ость",
+        "ая", "яя", "ое", "ее", "ые", "ие", "ый", "ий", "ой", "ом", "ем", "ах", "ях", "ов", "ев",
+        "ей", "ам", "ям", "ую", "юю", "а", "я", "о", "е", "ы", "и", "у", "ю", "ь",
+    ),
+    "uk": (
+        "ями", "ами", "ого", "ому", "ими", "ість",
+        "ій", "ий", "ої", "ою", "ею", "ів", "ах", "ях", "ам", "ям", "ом", "ем",
+        "а", "я", "о", "е", "и", "і", "у", "ю", "ь",
+    ),
+}
+_SUFFIXES = {language: sorted(suffixes, key=len, reverse=True) for language, suffixes in _SUFFIXES.items()}
+_MIN_STEM = 3
+_RATE_WINDOW = timedelta(hours=1)
+
+
+def _lemma_en(token: str) -> str:
+    if token.endswith("ies") and len(token) > 4:
+        return token[:-3] + "y"
+    if token.endswith(("sses", "xes", "ches", "shes")):
+        return token[:-2]
+    for suffix in ("ing", "ed", "s"):
+        if token.endswith(suffix) and len(token) - len(suffix) >= _MIN_STEM and not token.endswith("ss"):
+            return token[:-len(suffix)]
+    return token
+
+
+def lemma(token: str, language: str) -> str:
+    if language == "en":
+        return _lemma_en(token)
+    for suffix in _SUFFIXES.get(language, ()):
+        if token.endswith(suffix) and len(token) - len(suffix) >= _MIN_STEM:
+            return token[:-len(suffix)]
+    return token
+
+
+def tokens(text: str, language: str) -> list[tuple[str, str]]:
+    """(lemma, surface form) of every word in a submission, lowercased, ё folded into е."""
+    return [(lemma(token, language), token) for token in _TOKEN.findall(text.lower().replace("ё", "е"))]
+
+
+class SpaceSaving:
+    """Top-k heavy hitters over a stream in `capacity` counters (Metwally et al., Space-Saving).
+
+    A key outside the summary replaces the smallest counter and inherits its
+    count as the error bound, so every reported count is at most `error` too
+    high, and any key seen more than N / capacity times is guaranteed to be
+    present. The minimum is found through a heap with lazy deletion.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = max(1, capacity)
+        # ключ -> [count, error, форма для показа, голоса за форму]
+        self._counters: dict[str, list] = {}
+        self._heap: list[tuple[int, str]] = []
+
+    def __len__(self) -> int:
+        return len(self._counters)
+
+    def add(self, key: str, form: str, count: int = 1):
+        counter = self._counters.get(key)
+        if counter is not None:
+            counter[0] += count
+            # Голосование Бойера — Мура: показываем форму, которая встречается чаще остальных
+            if counter[2] == form:
+                counter[3] += count
+            elif counter[3] >= count:
+                counter[3] -= count
+            else:
+                counter[2], counter[3] = form, count
+        elif len(self._counters) < self.capacity:
+            counter = self._counters[key] = [count, 0, form, count]
+        else:
+            floor, evicted = self._pop_min()
+            del self._counters[evicted]
+            counter = self._counters[key] = [floor + count, floor, form, count]
+        heapq.heappush(self._heap, (counter[0], key))
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(value[0], name) for name, value in self._counters.items()]
+            heapq.heapify(self._heap)
+
+    def _pop_min(self) -> tuple[int, str]:
+        # В куче остаются устаревшие записи: настоящая та, чей count совпадает с текущим
+        while True:
+            count, key = heapq.heappop(self._heap)
+            counter = self._counters.get(key)
+            if counter is not None and counter[0] == count:
+                return count, key
+
+    def top(self, n: int) -> list[tuple[str, int, int]]:
+        """(form, count, error) of the n largest counters."""
+        largest = heapq.nlargest(n, self._counters.values(), key=lambda counter: counter[0])
+        return [(form, count, error) for count, error, form, _ in largest]
+
+    def dump(self) -> list:
+        return [[key, *counter] for key, counter in self._counters.items()]
+
+    def restore(self, counters: list):
+        # Если ANALYTICS_TOP_K уменьшили, оставляем самые большие счётчики
+        counters = heapq.nlargest(self.capacity, counters, key=lambda item: item[1])
+        self._counters = {key: [count, error, form, votes] for key, count, error, form, votes in counters}
+        self._heap = [(counter[0], key) for key, counter in self._counters.items()]
+        heapq.heapify(self._heap)
+
+
+class SprintStats:
+    """Running totals of one sprint, folded in from words rows in id order."""
+
+    def __init__(self, sprint_id: int, top_k: int = ANALYTICS_TOP_K):
+        self.sprint_id = sprint_id
+        self.words = SpaceSaving(top_k)
+        self.languages: dict[str, int] = {}
+        self.submissions = 0
+        self.tokens = 0
+        self.first_at: Optional[datetime] = None
+        self.last_at: Optional[datetime] = None
+        self.last_word_id = 0
+        # Заявки по минутам за последний час, для текущей скорости
+        self._minutes: OrderedDict[datetime, int] = OrderedDict()
+        self.lock = asyncio.Lock()
+        self.restored = False
+        # Есть строки моложе ANALYTICS_LAG, которые войдут в следующий подсчёт
+        self.pending = False
+
+    def add(self, words: str, language: str, submitted_at: Optional[datetime]):
+        self.submissions += 1
+        self.languages[language] = self.languages.get(language, 0) + 1
+        for key, form in tokens(words, language):
+            self.words.add(key, form)
+            self.tokens += 1
+        if submitted_at is None:
+            return
+        if self.first_at is None or submitted_at < self.first_at:
+            self.first_at = submitted_at
+        if self.last_at is None or submitted_at > self.last_at:
+            self.last_at = submitted_at
+        minute = submitted_at.replace(second=0, microsecond=0)
+        self._minutes[minute] = self._minutes.get(minute, 0) + 1
+        cutoff = self.last_at - _RATE_WINDOW
+        while self._minutes and next(iter(self._minutes)) < cutoff:
+            self._minutes.popitem(last=False)
+
+    def add_rows(self, rows: list, horizon: datetime) -> bool:
+        """Fold (id, words, language, submitted_at) rows; False once a row newer than `horizon` is reached."""
+        for word_id, words, language, submitted_at in rows:
+            if submitted_at is not None and submitted_at >= horizon:
+                return False
+            self.add(words, language, submitted_at)
+            self.last_word_id = word_id
+        return True
+
+    def dump(self) -> str:
+        """Counters as JSON for the sprint_stats table; last_word_id is stored next to it."""
+        return json.dumps({
+            "words": self.words.dump(),
+            "languages": self.languages,
+            "submissions": self.submissions,
+            "tokens": self.tokens,
+            "first_at": self.first_at.isoformat() if self.first_at else None,
+            "last_at": self.last_at.isoformat() if self.last_at else None,
+            "minutes": [[minute.isoformat(), count] for minute, count in self._minutes.items()],
+        }, ensure_ascii=False)
+
+    def restore(self, state: str, last_word_id: int):
+        data = json.loads(state)
+        self.words.restore(data["words"])
+        self.languages = data["languages"]
+        self.submissions = data["submissions"]
+        self.tokens = data["tokens"]
+        self.first_at = datetime.fromisoformat(data["first_at"]) if data["first_at"] else None
+        self.last_at = datetime.fromisoformat(data["last_at"]) if data["last_at"] else None
+        self._minutes = OrderedDict((datetime.fromisoformat(minute), count) for minute, count in data["minutes"])
+        self.last_word_id = last_word_id
+
+    def last_hour(self, now: datetime) -> int:
+        cutoff = now - _RATE_WINDOW
+        return sum(count for minute, count in self._minutes.items() if minute >= cutoff)
+
+    def per_hour(self) -> float:
+        if self.first_at is None or self.last_at is None:
+            return 0.0
+        hours = max((self.last_at - self.first_at).total_seconds() / 3600, 1.0)
+        return self.submissions / hours
+
+
+class SprintAnalytics:
+    """Per-process SprintStats for the most recently asked sprints, backed by the sprint_stats table.
+
+    stats() reads only rows added since the last fold, through the
+    (sprint_id, id) index, and saves the result. A sprint missing from memory
+    (first call, eviction, restart, another worker) starts from the saved
+    counters, so the whole sprint is read once, not once per process.
+    Memory is bounded by max_sprints * top_k counters, however many words
+    are submitted.
+    """
+
+    def __init__(self, max_sprints: int = ANALYTICS_MAX_SPRINTS, top_k: int = ANALYTICS_TOP_K, lag: float = ANALYTICS_LAG):
+        self.max_sprints = max(1, max_sprints)
+        self.top_k = top_k
+        self.lag = timedelta(seconds=lag)
+        self._sprints: OrderedDict[int, SprintStats] = OrderedDict()
+
+    def _get(self, sprint_id: int) -> SprintStats:
+        stats = self._sprints.get(sprint_id)
+        if stats is None:
+            stats = self._sprints[sprint_id] = SprintStats(sprint_id, self.top_k)
+            while len(self._sprints) > self.max_sprints:
+                self._sprints.popitem(last=False)
+        self._sprints.move_to_end(sprint_id)
+        return stats
+
+    async def _restore(self, stats: SprintStats):
+        async with SessionLocal() as db:
+            row = (await db.execute(
+                select(SprintStatsSnapshot.state, SprintStatsSnapshot.last_word_id)
+                .where(SprintStatsSnapshot.sprint_id == stats.sprint_id)
+            )).first()
+        if row is not None:
+            stats.restore(row.state, row.last_word_id)
+        stats.restored = True
+
+    async def _save(self, stats: SprintStats):
+        try:
+            async with SessionLocal() as db:
+                stmt = dialect_insert(db, SprintStatsSnapshot).values(
+                    sprint_id=stats.sprint_id, last_word_id=stats.last_word_id, state=stats.dump(), updated_at=datetime.utcnow()
+                )
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[SprintStatsSnapshot.sprint_id],
+                    set_={
+                        "last_word_id": stmt.excluded.last_word_id,
+                        "state": stmt.excluded.state,
+                        "updated_at": stmt.excluded.updated_at,
+                    },
+                    # Другой воркер мог уже сохранить более полный подсчёт
+                    where=SprintStatsSnapshot.last_word_id < stmt.excluded.last_word_id,
+                )
+                await db.execute(stmt)
+                await db.commit()
+        except Exception as e:
+            # Ответ от этого не зависит: в худшем случае следующий воркер дочитает больше строк
+            logger.warning("Could not save sprint %s analytics: %s", stats.sprint_id, e)
+
+    async def stats(self, sprint_id: int, batch_size: int = EXPORT_BATCH_SIZE) -> SprintStats:
+        stats = self._get(sprint_id)
+        async with stats.lock:
+            if not stats.restored:
+                await self._restore(stats)
+            # Свежие строки откладываем: транзакция с меньшим id может ещё не закоммититься
+            horizon = datetime.utcnow() - self.lag
+            folded = stats.submissions
+            last_word_id = stats.last_word_id
+            stats.pending = False
+            async with SessionLocal() as db:
+                result = await db.stream(
+                    select(Word.id, Word.words, Word.language, Word.submitted_at)
+                    .where(Word.sprint_id == sprint_id, Word.id > stats.last_word_id)
+                    .order_by(Word.id)
+                    .execution_options(yield_per=batch_size)
+                )
+                async for partition in result.partitions(batch_size):
+                    # Разбор слов — CPU-работа; первый проход по большому спринту уводим с event loop
+                    if not await asyncio.to_thread(stats.add_rows, partition, horizon):
+                        stats.pending = True
+                        break
+                await result.close()
+            if stats.last_word_id != last_word_id:
+                await self._save(stats)
+            logger.debug("Sprint %s analytics: %s new submissions", sprint_id, stats.submissions - folded)
+        return stats
+
+    def forget(self, sprint_id: int):
+        self._sprints.pop(sprint_id, None)
+
+
+sprint_analytics = SprintAnalytics()
+
+
+def render_stats(stats: SprintStats, limit: int, now: Optional[datetime] = None) -> str:
+    now = now or datetime.utcnow()
+    lines = [
+        f"📊 Спринт #{stats.sprint_id}: заявок {stats.submissions}, слов {stats.tokens}",
+        f"⏱ В среднем {stats.per_hour():.1f} заявок в час, за последний час: {stats.last_hour(now)}",
+    ]
+    languages = sorted(stats.languages.items(), key=lambda item: -item[1])
+    lines.append("🌍 Языки: " + " · ".join(
+        f"{language} {count * 100 / stats.submissions:.0f}%" for language, count in languages
+    ))
+    lines.append(f"🏆 Топ-{limit} слов:")
+    for place, (form, count, error) in enumerate(stats.words.top(limit), 1):
+        # С ошибкой Space-Saving показываем диапазон: точное число лежит внутри
+        lines.append(f"{place}. {form} — {count - error}–{count}" if error else f"{place}. {form} — {count}")
+    return "\n".join(lines)
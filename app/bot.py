@@ -1,21 +1,31 @@
-from telegram import Update, MessageEntity
-from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
-from telegram.ext.filters import BaseFilter
-from sqlalchemy.orm import Session
-from app.models import User, Sprint, Word, SprintStatus
-from app.filters import is_valid_input
-from app.config import ADMIN_IDS
+from telegram import ChatMember, Update, MessageEntity
+from telegram.constants import ChatType
+from telegram.ext import Application, CallbackQueryHandler, ChatMemberHandler, MessageHandler, filters, ContextTypes
+from telegram.ext.filters import MessageFilter
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import Sprint, SprintStatus
+from app.validation import validation_pipeline
+from app import pagination
+from app.commands import HELP_HINT, Arg, CommandRegistry, handler, is_admin
+from app.config import ADMIN_IDS, SUBMISSION_BUFFER_ENABLED
+from app.broadcast import start_broadcast
+from app.scheduler import cancel_sprint_expiry, schedule_sprint_expiry
+from app.sprint_cache import active_sprint_cache
+from app.crud import submit_words
+from app.db import SessionLocal
+from app.analytics import render_stats, sprint_analytics
+from app.users import user_registry
+from app.profanity_version import profanity_version
+from app.submission_buffer import submission_buffer
+from app.export import EXPORT_FORMATS, PARQUET_AVAILABLE, close_export, export_sprint_words, send_export
 from datetime import datetime, timedelta
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-import csv
-import io
 import logging
+from typing import Optional
 
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 # Кастомный фильтр для TEXT_LINK, представляющих команды
-class BotCommandLink(BaseFilter):
+class BotCommandLink(MessageFilter):
     def filter(self, message):
         if message.entities:
             for entity in message.entities:
@@ -26,410 +36,340 @@ class BotCommandLink(BaseFilter):
 # Экземпляр фильтра
 bot_command_link = BotCommandLink()
 
-async def start(update: Update, context: ContextTypes.DEFAULT_TYPE, db: Session):
+# Все команды бота; порядок регистрации задаёт порядок строк в /help
+commands = CommandRegistry()
+
+@commands.command("start", hint=False)
+async def start(update: Update, context: ContextTypes.DEFAULT_TYPE, db: AsyncSession):
     user_id = update.effective_user.id
     username = update.effective_user.username or "unknown"
-    text = update.message.text.strip()
-    args = context.args
-    logger.debug(f"Функция start, СТАРТ, параметры: {{text: '{text}', args: {args}}}")
-    try:
-        db_user = db.query(User).filter(User.id == user_id).first()
-        if not db_user:
-            db_user = User(id=user_id, username=username)
-            db.add(db_user)
-            db.commit()
-        else:
-            db_user.username = username
-            db.commit()
+    # Известного пользователя с тем же username в базу не пишем
+    await user_registry.touch(db, user_id, username)
 
-        active_sprints = db.query(Sprint).filter(Sprint.status == SprintStatus.active).all()
-        response = "🎉 Привет! Готов кинуть пару слов для спринта?\n\n"
-        if active_sprints:
-            response += "📋 Текущие активные спринты:\n"
-            for sprint in active_sprints:
-                response += f"Спринт #{sprint.id}: Тема '{sprint.theme}', Длительность: {sprint.duration} дней\n"
-            response += "\nОтправь 1 или 3 слова для участия!"
-        else:
-            response += "❌ Сейчас нет активных спринтов. Жди объявления нового!"
-        await update.message.reply_text(response)
-    except Exception as e:
-        logger.error(f"Error in start for user_id {user_id}: {e}", exc_info=True)
-        await update.message.reply_text("❌ Ой, что-то пошло не так!")
-    finally:
-        logger.debug(f"Функция start, ЗАВЕРШЕНИЕ, параметры: {{text: '{text}', args: {args}}}")
+    active_sprints = await active_sprint_cache.get()
+    response = "🎉 Привет! Готов кинуть пару слов для спринта?\n\n"
+    if active_sprints:
+        response += "📋 Текущие активные спринты:\n"
+        for sprint in active_sprints:
+            response += f"Спринт #{sprint.id}: Тема '{sprint.theme}', Длительность: {sprint.duration} дней\n"
+        response += "\nОтправь 1 или 3 слова для участия!"
+    else:
+        response += "❌ Сейчас нет активных спринтов. Жди объявления нового!"
+    await update.message.reply_text(response)
 
-async def whoami(update: Update, context: ContextTypes.DEFAULT_TYPE, db: Session):
+@commands.command("whoami", session=False, hint=False)
+async def whoami(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
     username = update.effective_user.username or "unknown"
-    text = update.message.text.strip()
-    args = context.args
-    logger.debug(f"Функция whoami, СТАРТ, параметры: {{text: '{text}', args: {args}}}")
-    try:
-        is_admin = user_id in ADMIN_IDS
-        response = (
-            f"ℹ️ Твой Telegram ID: {user_id}\n"
-            f"Username: @{username}\n"
-            f"Статус админа: {'Да' if is_admin else 'Нет'}\n"
-        )
-        if is_admin:
-            response += "Напиши /help, чтобы увидеть свои возможности"
-        await update.message.reply_text(response)
-    except Exception as e:
-        logger.error(f"Error in whoami for user_id {user_id}: {e}", exc_info=True)
-        await update.message.reply_text("❌ Ой, что-то пошло не так!")
-    finally:
-        logger.debug(f"Функция whoami, ЗАВЕРШЕНИЕ, параметры: {{text: '{text}', args: {args}}}")
+    admin = is_admin(user_id)
+    response = (
+        f"ℹ️ Твой Telegram ID: {user_id}\n"
+        f"Username: @{username}\n"
+        f"Статус админа: {'Да' if admin else 'Нет'}\n"
+    )
+    if admin:
+        response += "Напиши /help, чтобы увидеть свои возможности"
+    await update.message.reply_text(response)
 
-async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE, db: Session):
-    user_id = update.effective_user.id
-    text = update.message.text.strip()
-    args = context.args
-    logger.debug(f"Функция help_command, СТАРТ, параметры: {{text: '{text}', args: {args}}}")
-    try:
-        if user_id not in ADMIN_IDS:
-            await update.message.reply_text("❌ Только админ может использовать /help!")
-            return
-        response = (
-            "📖 Возможности админа:\n"
-            "/start_sprint <длительность: 1, 7 или 30> <тема> - Запустить новый спринт\n"
-            "/end_sprint <id> - Завершить спринт\n"
-            "/get_words <id> - Получить слова спринта в CSV\n"
-            "/list_sprints - Показать все спринты\n"
-            "/list_users - Показать всех пользователей\n"
-            "/broadcast <текст> - Отправить сообщение всем пользователям\n"
-            "/test_sprint - Тестовая команда\n"
-            "\nНапиши /help, чтобы увидеть свои возможности"
-        )
-        await update.message.reply_text(response)
-    except Exception as e:
-        logger.error(f"Error in help_command for user_id {user_id}: {e}", exc_info=True)
-        await update.message.reply_text("❌ Ой, что-то пошло не так!")
-    finally:
-        logger.debug(f"Функция help_command, ЗАВЕРШЕНИЕ, параметры: {{text: '{text}', args: {args}}}")
+@commands.command("help", admin=True, session=False, hint=False, denied="❌ Только админ может использовать /help!")
+async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    response = "📖 Возможности админа:\n" + "\n".join(commands.help_lines(admin=True)) + "\n" + HELP_HINT
+    await update.message.reply_text(response)
 
-async def start_sprint(update: Update, context: ContextTypes.DEFAULT_TYPE, db: Session):
+@commands.command(
+    "start_sprint", "startsprint",
+    admin=True,
+    args=[
+        Arg("duration", int, choices=(1, 7, 30), error="❌ Длительность должна быть 1, 7 или 30 дней!"),
+        Arg("theme", " ".join, rest=True),
+    ],
+    syntax="/start_sprint <длительность: 1, 7 или 30> <тема>",
+    description="Запустить новый спринт",
+    denied="❌ Только админ может запускать спринты!",
+    error="❌ Не удалось запустить спринт!",
+)
+async def start_sprint(update: Update, context: ContextTypes.DEFAULT_TYPE, db: AsyncSession, duration: int, theme: str):
     user_id = update.effective_user.id
-    text = update.message.text.strip()
-    args = context.args
-    logger.debug(f"Функция start_sprint, СТАРТ, параметры: {{text: '{text}', args: {args}}}")
-    try:
-        if user_id not in ADMIN_IDS:
-            await update.message.reply_text("❌ Только админ может запускать спринты!\nНапиши /help, чтобы увидеть свои возможности")
-            return
-
-        if len(context.args) < 2:
-            await update.message.reply_text("❌ Используй: /start_sprint <длительность: 1, 7 или 30> <тема>\nНапиши /help, чтобы увидеть свои возможности")
-            return
-
-        duration = int(context.args[0])
-        if duration not in [1, 7, 30]:
-            await update.message.reply_text("❌ Длительность должна быть 1, 7 или 30 дней!\nНапиши /help, чтобы увидеть свои возможности")
-            return
+    sprint = Sprint(
+        duration=duration,
+        theme=theme,
+        start_date=datetime.utcnow(),
+        end_date=datetime.utcnow() + timedelta(days=duration)
+    )
+    db.add(sprint)
+    await db.commit()
+    await schedule_sprint_expiry(sprint.id, sprint.end_date)
+    await active_sprint_cache.invalidate()
 
-        theme = " ".join(context.args[1:])
-        if not theme:
-            await update.message.reply_text("❌ Укажи тему спринта!\nНапиши /help, чтобы увидеть свои возможности")
-            return
+    recipients = await user_registry.count_recipients(db)
+    logger.debug("Количество пользователей для уведомления: %s", recipients)
+    await update.message.reply_text(f"✅ Спринт #{sprint.id} запущен!" + HELP_HINT)
+    if not recipients:
+        logger.debug("Нет пользователей для уведомления о новом спринте")
+        return
+    # Получатели читаются из базы страницами по ходу рассылки, а не списком целиком
+    start_broadcast(
+        context.application,
+        user_registry.recipient_ids(),
+        f"🎉 Новый спринт начался! Тема: {theme}. Время: {duration} дней. Кидайте свои слова!",
+        report_chat_id=user_id,
+        title=f"Уведомление о спринте #{sprint.id}",
+        total=recipients,
+        on_blocked=user_registry.mark_blocked,
+    )
 
-        sprint = Sprint(
-            duration=duration,
-            theme=theme,
-            start_date=datetime.utcnow(),
-            end_date=datetime.utcnow() + timedelta(days=duration)
-        )
-        db.add(sprint)
-        db.commit()
+@commands.command(
+    "end_sprint",
+    admin=True,
+    args=[Arg("sprint_id", int)],
+    syntax="/end_sprint <id>",
+    description="Завершить спринт",
+    usage="❌ Укажи ID спринта: /end_sprint <id>",
+    denied="❌ Только админ может завершать спринты!",
+    error="❌ Не удалось завершить спринт!",
+)
+async def end_sprint(update: Update, context: ContextTypes.DEFAULT_TYPE, db: AsyncSession, sprint_id: int):
+    sprint = await db.get(Sprint, sprint_id)
+    if not sprint:
+        await update.message.reply_text("❌ Спринт не найден!" + HELP_HINT)
+        return
+    sprint.status = SprintStatus.completed
+    await db.commit()
+    await cancel_sprint_expiry(sprint_id)
+    await active_sprint_cache.invalidate()
+    await update.message.reply_text(f"✅ Спринт #{sprint_id} завершён!" + HELP_HINT)
 
-        users = db.query(User).all()
-        logger.debug(f"Количество пользователей для уведомления: {len(users)}")
-        if not users:
-            logger.debug("Нет пользователей для уведомления о новом спринте")
-        for user in users:
-            logger.debug(f"Отправка уведомления о спринте пользователю {user.id}")
-            await context.bot.send_message(
-                chat_id=user.id,
-                text=f"🎉 Новый спринт начался! Тема: {theme}. Время: {duration} дней. Кидайте свои слова!"
-            )
-            logger.debug(f"Уведомление отправлено пользователю {user.id}")
-        await update.message.reply_text(
-            f"✅ Спринт #{sprint.id} запущен!\nНапиши /help, чтобы увидеть свои возможности"
-        )
-    except ValueError:
-        await update.message.reply_text("❌ Ошибка: Неверный формат длительности. Используй: /start_sprint <длительность: 1, 7 или 30> <тема>\nНапиши /help, чтобы увидеть свои возможности")
-    except Exception as e:
-        logger.error(f"Error in start_sprint for user_id {user_id}: {e}", exc_info=True)
-        await update.message.reply_text("❌ Не удалось запустить спринт!\nНапиши /help, чтобы увидеть свои возможности")
-    finally:
-        logger.debug(f"Функция start_sprint, ЗАВЕРШЕНИЕ, параметры: {{text: '{text}', args: {args}}}")
-
-async def test_sprint(update: Update, context: ContextTypes.DEFAULT_TYPE, db: Session):
-    user_id = update.effective_user.id
-    text = update.message.text.strip()
-    args = context.args
-    logger.debug(f"Функция test_sprint, СТАРТ, параметры: {{text: '{text}', args: {args}}}")
+@commands.command(
+    "get_words",
+    admin=True,
+    args=[
+        Arg("sprint_id", int),
+        Arg("fmt", str.lower, default="csv", choices=EXPORT_FORMATS,
+            error="❌ Формат должен быть csv или parquet: /get_words <id> [csv|parquet]"),
+    ],
+    syntax="/get_words <id> [csv|parquet]",
+    description="Получить слова спринта (CSV, большие выгрузки сжимаются gzip)",
+    usage="❌ Укажи ID спринта: /get_words <id>",
+    denied="❌ Только админ может получать слова!",
+    error="❌ Не удалось получить слова!",
+)
+async def get_words(update: Update, context: ContextTypes.DEFAULT_TYPE, db: AsyncSession, sprint_id: int, fmt: str):
+    if fmt == "parquet" and not PARQUET_AVAILABLE:
+        await update.message.reply_text("❌ Parquet недоступен: на сервере не установлен pyarrow. Используй csv!" + HELP_HINT)
+        return
+    parts = await export_sprint_words(db, sprint_id, fmt)
+    if not parts:
+        await update.message.reply_text("❌ Нет слов для этого спринта!" + HELP_HINT)
+        return
     try:
-        await update.message.reply_text("✅ Тестовая команда работает! Напиши /help для других команд.")
-    except Exception as e:
-        logger.error(f"Error in test_sprint for user_id {user_id}: {e}", exc_info=True)
-        await update.message.reply_text("❌ Ой, что-то пошло не так!")
+        await send_export(context.bot, update.effective_user.id, parts)
     finally:
-        logger.debug(f"Функция test_sprint, ЗАВЕРШЕНИЕ, параметры: {{text: '{text}', args: {args}}}")
+        close_export(parts)
+    await update.message.reply_text(f"✅ Слова для спринта #{sprint_id} отправлены!" + HELP_HINT)
 
-async def end_sprint(update: Update, context: ContextTypes.DEFAULT_TYPE, db: Session):
-    user_id = update.effective_user.id
-    text = update.message.text.strip()
-    args = context.args
-    logger.debug(f"Функция end_sprint, СТАРТ, параметры: {{text: '{text}', args: {args}}}")
-    try:
-        if user_id not in ADMIN_IDS:
-            await update.message.reply_text("❌ Только админ может завершать спринты!\nНапиши /help, чтобы увидеть свои возможности")
-            return
-        if not context.args:
-            await update.message.reply_text("❌ Укажи ID спринта: /end_sprint <id>\nНапиши /help, чтобы увидеть свои возможности")
-            return
-        sprint_id = int(context.args[0])
-        sprint = db.query(Sprint).filter(Sprint.id == sprint_id).first()
-        if not sprint:
-            await update.message.reply_text("❌ Спринт не найден!\nНапиши /help, чтобы увидеть свои возможности")
+@commands.command(
+    "sprint_stats",
+    admin=True,
+    session=False,
+    args=[
+        Arg("sprint_id", int, default=None),
+        Arg("limit", int, default=10, choices=range(1, 51), error="❌ Слов в топе — от 1 до 50: /sprint_stats [id] [сколько]"),
+    ],
+    syntax="/sprint_stats [id] [сколько слов]",
+    description="Топ слов, языки и скорость заявок спринта (по умолчанию текущего)",
+    denied="❌ Только админ может смотреть статистику!",
+    error="❌ Не удалось посчитать статистику!",
+)
+async def sprint_stats(update: Update, context: ContextTypes.DEFAULT_TYPE, sprint_id: Optional[int], limit: int):
+    if sprint_id is None:
+        active_sprints = await active_sprint_cache.get()
+        if not active_sprints:
+            await update.message.reply_text("❌ Нет активных спринтов, укажи ID: /sprint_stats <id>" + HELP_HINT)
             return
-        sprint.status = SprintStatus.completed
-        db.commit()
-        await update.message.reply_text(
-            f"✅ Спринт #{sprint_id} завершён!\nНапиши /help, чтобы увидеть свои возможности"
-        )
-    except (IndexError, ValueError):
-        await update.message.reply_text("❌ Укажи ID спринта: /end_sprint <id>\nНапиши /help, чтобы увидеть свои возможности")
-    except Exception as e:
-        logger.error(f"Error in end_sprint for user_id {user_id}: {e}", exc_info=True)
-        await update.message.reply_text("❌ Не удалось завершить спринт!\nНапиши /help, чтобы увидеть свои возможности")
-    finally:
-        logger.debug(f"Функция end_sprint, ЗАВЕРШЕНИЕ, параметры: {{text: '{text}', args: {args}}}")
+        sprint_id = active_sprints[-1].id
+    # Счётчики дочитывают только новые строки спринта, без выгрузки всех слов
+    stats = await sprint_analytics.stats(sprint_id)
+    if not stats.submissions:
+        if stats.pending:
+            await update.message.reply_text(
+                f"⏳ Заявки только что пришли и ещё не посчитаны, повтори через {sprint_analytics.lag.total_seconds():g} с" + HELP_HINT
+            )
+        else:
+            await update.message.reply_text("❌ Нет слов для этого спринта!" + HELP_HINT)
+        return
+    await update.message.reply_text(render_stats(stats, limit) + HELP_HINT)
 
-async def get_words(update: Update, context: ContextTypes.DEFAULT_TYPE, db: Session):
-    user_id = update.effective_user.id
-    text = update.message.text.strip()
-    args = context.args
-    logger.debug(f"Функция get_words, СТАРТ, параметры: {{text: '{text}', args: {args}}}")
-    try:
-        if user_id not in ADMIN_IDS:
-            await update.message.reply_text("❌ Только админ может получать слова!\nНапиши /help, чтобы увидеть свои возможности")
-            return
-        if not context.args:
-            await update.message.reply_text("❌ Укажи ID спринта: /get_words <id>\nНапиши /help, чтобы увидеть свои возможности")
-            return
-        sprint_id = int(context.args[0])
-        words = db.query(Word).filter(Word.sprint_id == sprint_id).all()
-        if not words:
-            await update.message.reply_text("❌ Нет слов для этого спринта!\nНапиши /help, чтобы увидеть свои возможности")
-            return
-        output = io.StringIO()
-        writer = csv.writer(output)
-        writer.writerow(["word", "user_id", "language", "submitted_at"])
-        for word in words:
-            writer.writerow([word.words, word.user_id, word.language, word.submitted_at])
-        output.seek(0)
-        await context.bot.send_document(
-            chat_id=user_id,
-            document=io.BytesIO(output.getvalue().encode()),
-            filename=f"sprint_{sprint_id}_words.csv"
-        )
-        await update.message.reply_text(
-            f"✅ Слова для спринта #{sprint_id} отправлены!\nНапиши /help, чтобы увидеть свои возможности"
-        )
-    except (IndexError, ValueError):
-        await update.message.reply_text("❌ Укажи ID спринта: /get_words <id>\nНапиши /help, чтобы увидеть свои возможности")
-    except Exception as e:
-        logger.error(f"Error in get_words for user_id {user_id}: {e}", exc_info=True)
-        await update.message.reply_text("❌ Не удалось получить слова!\nНапиши /help, чтобы увидеть свои возможности")
-    finally:
-        logger.debug(f"Функция get_words, ЗАВЕРШЕНИЕ, параметры: {{text: '{text}', args: {args}}}")
+@commands.command(
+    "list_sprints",
+    admin=True,
+    args=[Arg("sprint_filters", pagination.parse_sprint_filters, rest=True, default={})],
+    syntax="/list_sprints [active|completed]",
+    description="Показать спринты (постранично)",
+    denied="❌ Только админ может смотреть спринты!",
+    error="❌ Не удалось получить список спринтов!",
+)
+async def list_sprints(update: Update, context: ContextTypes.DEFAULT_TYPE, db: AsyncSession, sprint_filters: dict):
+    page = await pagination.fetch_sprints_page(db, sprint_filters)
+    if not page.rows:
+        await update.message.reply_text("❌ Нет спринтов!" + HELP_HINT)
+        return
+    await update.message.reply_text(
+        pagination.render_sprints_page(page),
+        reply_markup=pagination.page_keyboard(pagination.SPRINTS, page, sprint_filters),
+    )
 
-async def list_sprints(update: Update, context: ContextTypes.DEFAULT_TYPE, db: Session):
-    user_id = update.effective_user.id
-    text = update.message.text.strip()
-    args = context.args
-    logger.debug(f"Функция list_sprints, СТАРТ, параметры: {{text: '{text}', args: {args}}}")
-    try:
-        if user_id not in ADMIN_IDS:
-            await update.message.reply_text("❌ Только админ может смотреть спринты!\nНапиши /help для списка доступных команд")
-            return
-        sprints = db.query(Sprint).all()
-        if not sprints:
-            await update.message.reply_text("❌ Нет спринтов!\nНапиши /help для списка доступных команд")
-            return
-        response = "📋 Список спринтов:\n"
-        for sprint in sprints:
-            response += f"ID: {sprint.id}, Тема: {sprint.theme}, Длительность: {sprint.duration} дней, Статус: {sprint.status.value}\n"
-        response += "\nНапиши /help для списка доступных команд"
-        await update.message.reply_text(response)
-    except Exception as e:
-        logger.error(f"Error in list_sprints for user_id {user_id}: {e}", exc_info=True)
-        await update.message.reply_text("❌ Не удалось получить список спринтов!\nНапиши /help для списка доступных команд")
-    finally:
-        logger.debug(f"Функция list_sprints, ЗАВЕРШЕНИЕ, параметры: {{text: '{text}', args: {args}}}")
+@commands.command(
+    "list_users",
+    admin=True,
+    args=[Arg("user_filters", pagination.parse_user_filters, rest=True, default={})],
+    syntax="/list_users [префикс] [since:ГГГГ-ММ-ДД]",
+    description="Показать пользователей (постранично)",
+    denied="❌ Только админ может просматривать пользователей!",
+    error="❌ Не удалось получить список пользователей!",
+)
+async def list_users(update: Update, context: ContextTypes.DEFAULT_TYPE, db: AsyncSession, user_filters: dict):
+    page = await pagination.fetch_users_page(db, user_filters)
+    if not page.rows:
+        await update.message.reply_text("❌ Нет пользователей!" + HELP_HINT)
+        return
+    await update.message.reply_text(
+        pagination.render_users_page(page),
+        reply_markup=pagination.page_keyboard(pagination.USERS, page, user_filters),
+    )
 
-async def list_users(update: Update, context: ContextTypes.DEFAULT_TYPE, db: Session):
-    user_id = update.effective_user.id
-    text = update.message.text.strip()
-    args = context.args
-    logger.debug(f"Функция list_users, СТАРТ, параметры: {{text: '{text}', args: {args}}}")
-    try:
-        if user_id not in ADMIN_IDS:
-            await update.message.reply_text("❌ Только админ может просматривать пользователей!\nНапиши /help для списка доступных команд")
-            return
-        users = db.query(User).all()
-        if not users:
-            await update.message.reply_text("❌ Нет пользователей!\nНапиши /help для списка доступных команд")
-            return
-        response = "👥 Пользователи:\n"
-        for user in users:
-            response += f"ID: {user.id}, Username: {user.username or 'none'}\n"
-        response += "\nНапиши /help для списка доступных команд"
-        await update.message.reply_text(response)
-    except Exception as e:
-        logger.error(f"Error in list_users for user_id {user_id}: {e}", exc_info=True)
-        await update.message.reply_text("❌ Не удалось получить список пользователей!\nНапиши /help для списка доступных команд")
-    finally:
-        logger.debug(f"Функция list_users, ЗАВЕРШЕНИЕ, параметры: {{text: '{text}', args: {args}}}")
+@commands.command(
+    "broadcast",
+    admin=True,
+    args=[Arg("message", " ".join, rest=True)],
+    syntax="/broadcast <текст>",
+    description="Отправить сообщение всем пользователям",
+    usage="❌ Укажи сообщение: /broadcast <текст>",
+    denied="❌ Только админ может рассылать сообщения!",
+    error="❌ Не удалось отправить сообщение!",
+)
+async def broadcast(update: Update, context: ContextTypes.DEFAULT_TYPE, db: AsyncSession, message: str):
+    recipients = await user_registry.count_recipients(db)
+    logger.debug("Количество пользователей в базе: %s", recipients)
+    if not recipients:
+        await update.message.reply_text("❌ Нет пользователей в базе для рассылки!" + HELP_HINT)
+        return
+    start_broadcast(
+        context.application,
+        user_registry.recipient_ids(),
+        f"📢 {message}",
+        report_chat_id=update.effective_user.id,
+        total=recipients,
+        on_blocked=user_registry.mark_blocked,
+    )
+    await update.message.reply_text(
+        f"✅ Рассылка на {recipients} пользователей запущена, прогресс пришлю отдельным сообщением!" + HELP_HINT
+    )
 
-async def broadcast(update: Update, context: ContextTypes.DEFAULT_TYPE, db: Session):
-    user_id = update.effective_user.id
-    text = update.message.text.strip()
-    args = context.args
-    logger.debug(f"Функция broadcast, СТАРТ, параметры: {{text: '{text}', args: {args}}}")
-    try:
-        if user_id not in ADMIN_IDS:
-            await update.message.reply_text("❌ Только админ может рассылать сообщения!\nНапиши /help для списка доступных команд")
-            return
-        message = " ".join(context.args)
-        if not message:
-            await update.message.reply_text("❌ Укажи сообщение: /broadcast <текст>\nНапиши /help для списка доступных команд")
-            return
-        users = db.query(User).all()
-        logger.debug(f"Количество пользователей в базе: {len(users)}")
-        if not users:
-            await update.message.reply_text("❌ Нет пользователей в базе для рассылки!\nНапиши /help для списка доступных команд")
-            return
-        for user in users:
-            logger.debug(f"Отправка сообщения пользователю {user.id}")
-            await context.bot.send_message(
-                chat_id=user.id,
-                text=f"📢 {message}"
-            )
-            logger.debug(f"Сообщение отправлено пользователю {user.id}")
-        await update.message.reply_text("✅ Сообщение отправлено всем пользователям!\nНапиши /help для списка доступных команд")
-    except Exception as e:
-        logger.error(f"Error in broadcast for user_id {user_id}: {e}", exc_info=True)
-        await update.message.reply_text("❌ Не удалось отправить сообщение!\nНапиши /help для списка доступных команд")
-    finally:
-        logger.debug(f"Функция broadcast, ЗАВЕРШЕНИЕ, параметры: {{text: '{text}', args: {args}}}")
+@commands.command(
+    "reload_profanity",
+    admin=True,
+    session=False,
+    syntax="/reload_profanity",
+    description="Перечитать словари мата без перезапуска",
+    denied="❌ Только админ может обновлять словари!",
+    error="❌ Не удалось перезагрузить словари!",
+)
+async def reload_profanity(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    matcher, version = await profanity_version.reload()
+    await update.message.reply_text(
+        f"✅ Словари мата перезагружены: {matcher.size} записей (версия {version}). "
+        f"Остальные воркеры подхватят их в течение {profanity_version.check_interval:.0f} с" + HELP_HINT
+    )
 
-async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE, db: Session):
-    user_id = update.effective_user.id
-    text = update.message.text.strip()
-    args = context.args
-    logger.debug(f"Функция handle_message, СТАРТ, параметры: {{text: '{text}', args: {args}}}")
-    try:
-        if text.startswith('/'):
-            logger.debug(f"Skipping command in handle_message: {text}")
-            return
-        active_sprints = db.query(Sprint).filter(Sprint.status == SprintStatus.active).all()
-        if not active_sprints:
-            await update.message.reply_text("❌ Нет активных спринтов! Жди новый!")
-            return
-        is_valid, result = is_valid_input(text)
-        if not is_valid:
-            await update.message.reply_text(result)
-            return
-        language = result
-        for sprint in active_sprints:
-            existing_submission = db.query(Word).filter(Word.user_id == user_id, Word.sprint_id == sprint.id).first()
-            if existing_submission:
-                await update.message.reply_text(
-                    f"❌ Ты уже кинул слова для спринта #{sprint.id}!")
-                continue
-            word = Word(user_id=user_id, sprint_id=sprint.id, words=text, language=language)
-            db.add(word)
-            db.commit()
-            await update.message.reply_text(
-                f"✅ Слова приняты для спринта #{sprint.id}!")
-    except Exception as e:
-        logger.error(f"Error in handle_message for user_id {user_id}: {e}", exc_info=True)
-        await update.message.reply_text("❌ Ой, что-то пошло не так!")
-    finally:
-        logger.debug(f"Функция handle_message, ЗАВЕРШЕНИЕ, параметры: {{text: '{text}', args: {args}}}")
+@commands.command("test_sprint", session=False, hint=False, syntax="/test_sprint", description="Тестовая команда")
+async def test_sprint(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    await update.message.reply_text("✅ Тестовая команда работает! Напиши /help для других команд.")
 
+@commands.unrecognized
 async def handle_unrecognized_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    entities = update.message.entities if update.message.entities else []
+    logger.debug("Message entities: %s", [(e.type, e.url if e.url else '') for e in entities])
+    await update.message.reply_text(f"❌ Неизвестная команда: {update.message.text.strip()}. Напиши /help для списка команд!")
+
+@handler("list_page_callback", admin=True)
+async def list_page_callback(update: Update, context: ContextTypes.DEFAULT_TYPE, db: AsyncSession):
+    query = update.callback_query
+    try:
+        kind, direction, cursor, list_filters = pagination.parse_callback_data(query.data)
+    except ValueError:
+        # Кнопка из старой версии бота или подделанные данные
+        await query.answer("❌ Кнопка устарела, повтори команду")
+        return
+    if kind == pagination.USERS:
+        page = await pagination.fetch_users_page(db, list_filters, cursor, direction)
+        render = pagination.render_users_page
+    else:
+        page = await pagination.fetch_sprints_page(db, list_filters, cursor, direction)
+        render = pagination.render_sprints_page
+    if not page.rows:
+        await query.answer("Больше ничего нет")
+        return
+    await query.edit_message_text(render(page), reply_markup=pagination.page_keyboard(kind, page, list_filters))
+    await query.answer()
+
+@handler("handle_message", session=False)
+async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
     text = update.message.text.strip()
-    args = context.args
-    logger.debug(f"Функция handle_unrecognized_command, СТАРТ, параметры: {{text: '{text}', args: {args}}}")
-    try:
-        entities = update.message.entities if update.message.entities else []
-        logger.debug(f"Message entities: {[(e.type, e.url if e.url else '') for e in entities]}")
-        await update.message.reply_text(
-            f"❌ Неизвестная команда: {text}. Напиши /help для списка команд!")
-    except Exception as e:
-        logger.error(f"Error in handle_unrecognized_command for user_id {user_id}: {e}", exc_info=True)
-        await update.message.reply_text("❌ Ой, что-то пошло не так!")
-    finally:
-        logger.debug(f"Функция handle_unrecognized_command, ЗАВЕРШЕНИЕ, параметры: {{text: '{text}', args: {args}}}")
+    active_sprints = await active_sprint_cache.get()
+    if not active_sprints:
+        await update.message.reply_text("❌ Нет активных спринтов! Жди новый!")
+        return
+    # /reload_profanity мог прийти в другой воркер
+    await profanity_version.ensure_current()
+    is_valid, result = await validation_pipeline.validate(text)
+    if not is_valid:
+        await update.message.reply_text(result)
+        return
+    language = result
+    sprint_ids = [sprint.id for sprint in active_sprints]
+    if SUBMISSION_BUFFER_ENABLED:
+        # Групповая запись: ответ уйдёт после commit пачки, в которую попала заявка
+        inserted = set(await submission_buffer.submit(user_id, sprint_ids, text, language))
+    else:
+        # Сессию берём только на запись: проверка слов идёт без соединения из пула
+        async with SessionLocal() as db:
+            inserted = set(await submit_words(db, user_id, sprint_ids, text, language))
+    replies = []
+    for sprint in active_sprints:
+        if sprint.id in inserted:
+            replies.append(f"✅ Слова приняты для спринта #{sprint.id}!")
+        else:
+            replies.append(f"❌ Ты уже кинул слова для спринта #{sprint.id}!")
+    await update.message.reply_text("\n".join(replies))
 
-async def daily_report(context: ContextTypes.DEFAULT_TYPE, db: Session):
-    logger.debug("Daily report started")
-    try:
-        today = datetime.utcnow().date()
-        start_of_day = datetime.combine(today, datetime.min.time())
-        new_users = db.query(User).filter(User.joined_at >= start_of_day).count()
-        new_words = db.query(Word).filter(Word.submitted_at >= start_of_day).count()
-        sprints = db.query(Sprint).all()
-        report = f"📊 Отчёт за {today}:\nНовых пользователей: {new_users}\nНовых слов: {new_words}\n"
-        for sprint in sprints:
-            total_words = db.query(Word).filter(Word.sprint_id == sprint.id).count()
-            report += f"Спринт #{sprint.id} ({sprint.status.value}): {total_words} слов\n"
-        for admin_id in ADMIN_IDS:
-            await context.bot.send_message(chat_id=admin_id, text=report)
-    except Exception as e:
-        logger.error(f"Error in daily_report: {e}", exc_info=True)
-    finally:
-        logger.debug("Daily report finished")
+@handler("my_chat_member", session=False)
+async def my_chat_member(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    # Telegram сам сообщает, что пользователь заблокировал бота или разблокировал его
+    change = update.my_chat_member
+    if change.chat.type != ChatType.PRIVATE:
+        return
+    status = change.new_chat_member.status
+    if status == ChatMember.BANNED:
+        await user_registry.set_blocked([change.from_user.id])
+    elif status == ChatMember.MEMBER:
+        await user_registry.set_blocked([change.from_user.id], blocked=False)
 
-def setup_bot(app: Application, db: Session):
-    logger.debug(f"Setting up bot with ADMIN_IDS: {ADMIN_IDS}")
-    try:
-        logger.debug("Registering command handlers")
-        app.add_handler(CommandHandler("start", lambda update, context: start(update, context, db)))
-        logger.debug("Registered /start handler")
-        app.add_handler(CommandHandler("whoami", lambda update, context: whoami(update, context, db)))
-        logger.debug("Registered /whoami handler")
-        app.add_handler(CommandHandler("help", lambda update, context: help_command(update, context, db)))
-        logger.debug("Registered /help handler")
-        app.add_handler(CommandHandler("start_sprint", lambda update, context: start_sprint(update, context, db), filters=filters.COMMAND | bot_command_link))
-        logger.debug("Registered /start_sprint handler")
-        app.add_handler(CommandHandler("startsprint", lambda update, context: start_sprint(update, context, db), filters=filters.COMMAND | bot_command_link))
-        logger.debug("Registered /startsprint handler")
-        app.add_handler(CommandHandler("test_sprint", lambda update, context: test_sprint(update, context, db)))
-        logger.debug("Registered /test_sprint handler")
-        app.add_handler(CommandHandler("end_sprint", lambda update, context: end_sprint(update, context, db)))
-        logger.debug("Registered /end_sprint handler")
-        app.add_handler(CommandHandler("get_words", lambda update, context: get_words(update, context, db)))
-        logger.debug("Registered /get_words handler")
-        app.add_handler(CommandHandler("list_sprints", lambda update, context: list_sprints(update, context, db)))
-        logger.debug("Registered /list_sprints handler")
-        app.add_handler(CommandHandler("list_users", lambda update, context: list_users(update, context, db)))
-        logger.debug("Registered /list_users handler")
-        app.add_handler(CommandHandler("broadcast", lambda update, context: broadcast(update, context, db), filters=filters.COMMAND | bot_command_link))
-        logger.debug("Registered /broadcast handler")
-        app.add_handler(MessageHandler(filters.COMMAND, lambda update, context: handle_unrecognized_command(update, context)))
-        logger.debug("Registered unrecognized command handler")
-        app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, lambda update, context: handle_message(update, context, db)))
-        logger.debug("Registered text message handler")
+# Типы апдейтов, для которых ниже есть обработчики. Передаются в setWebhook, а
+# остальное, что всё же пришло, /webhook отбрасывает до очереди
+ALLOWED_UPDATES = ("message", "callback_query", "my_chat_member")
 
-        logger.debug("Setting up scheduler for daily report")
-        scheduler = AsyncIOScheduler()
-        scheduler.add_job(daily_report, 'cron', hour=0, minute=0, args=[app.bot, db])
-        scheduler.start()
+def setup_bot(app: Application):
+    logger.debug("Setting up bot with ADMIN_IDS: %s", ADMIN_IDS)
+    try:
+        # Все команды (и /command, и ссылки tg://bot_command) идут через один обработчик
+        # с поиском по словарю; неизвестные команды уходят в handle_unrecognized_command
+        app.add_handler(MessageHandler(filters.COMMAND | bot_command_link, commands.dispatch))
+        app.add_handler(CallbackQueryHandler(list_page_callback, pattern=rf"^({pagination.USERS}|{pagination.SPRINTS})\|"))
+        app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
+        app.add_handler(ChatMemberHandler(my_chat_member, ChatMemberHandler.MY_CHAT_MEMBER))
+        logger.debug("Registered handlers for commands: %s", ", ".join(sorted(commands.names())))
         logger.debug("Bot setup completed")
     except Exception as e:
-        logger.error(f"Error in setup_bot: {e}", exc_info=True)
+        logger.error("Error in setup_bot: %s", e, exc_info=True)
         raise
@@ -0,0 +1,303 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import AsyncIterable, Awaitable, Callable, Iterable, Optional, Union
+
+from telegram import Bot
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter, TimedOut
+from telegram.ext import Application
+
+from app.config import (
+    BROADCAST_CONCURRENCY,
+    BROADCAST_MAX_RETRIES,
+    BROADCAST_PER_CHAT_INTERVAL,
+    BROADCAST_PROGRESS_INTERVAL,
+    BROADCAST_RATE,
+    BROADCAST_SHUTDOWN_TIMEOUT,
+)
+
+logger = logging.getLogger(__name__)
+
+ChatIds = Union[Iterable[int], AsyncIterable[int]]
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._resume_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        if now > self._updated:
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._resume_at:
+                    await asyncio.sleep(self._resume_at - now)
+                    continue
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        # Telegram отвечает 429 на весь бот, поэтому останавливаем весь поток отправки
+        now = time.monotonic()
+        self._resume_at = max(self._resume_at, now + seconds)
+        self._tokens = 0
+        self._updated = self._resume_at
+
+
+class ChatLimiter:
+    """Minimum interval between two messages to the same chat."""
+
+    def __init__(self, interval: float, max_entries: int = 10000):
+        self.interval = interval
+        self.max_entries = max_entries
+        self._next_allowed: dict[int, float] = {}
+
+    async def wait(self, chat_id: int):
+        now = time.monotonic()
+        next_allowed = self._next_allowed.get(chat_id, 0.0)
+        if next_allowed > now:
+            await asyncio.sleep(next_allowed - now)
+            now = next_allowed
+        self._next_allowed[chat_id] = now + self.interval
+        if len(self._next_allowed) > self.max_entries:
+            self._prune(now)
+
+    def _prune(self, now: float):
+        self._next_allowed = {k: v for k, v in self._next_allowed.items() if v > now}
+
+
+# Общие для всех рассылок процесса лимиты Telegram: ~30 сообщений в секунду на бота
+# и ~1 сообщение в секунду в один чат
+global_bucket = TokenBucket(BROADCAST_RATE)
+chat_limiter = ChatLimiter(BROADCAST_PER_CHAT_INTERVAL)
+
+# Идущие рассылки: ссылка не даёт сборщику мусора убрать задачу, а shutdown их дожидается
+_running: set[asyncio.Task] = set()
+
+
+@dataclass
+class BroadcastStats:
+    total: int = 0
+    sent: int = 0
+    failed: int = 0
+    blocked: int = 0
+    retries: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+    finished_at: Optional[float] = None
+    blocked_ids: list[int] = field(default_factory=list)
+
+    @property
+    def processed(self) -> int:
+        return self.sent + self.failed + self.blocked
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    @property
+    def rate(self) -> float:
+        return self.processed / self.elapsed if self.elapsed > 0 else 0.0
+
+    def progress_text(self, title: str) -> str:
+        return (
+            f"📤 {title}: {self.processed}/{self.total}\n"
+            f"Доставлено: {self.sent}, заблокировали бота: {self.blocked}, ошибок: {self.failed}\n"
+            f"Скорость: {self.rate:.1f} сообщ./сек"
+        )
+
+    def summary_text(self, title: str) -> str:
+        return (
+            f"✅ {title} завершена за {self.elapsed:.1f} сек.\n"
+            f"Всего получателей: {self.total}\n"
+            f"Доставлено: {self.sent}\n"
+            f"Заблокировали бота: {self.blocked}\n"
+            f"Ошибок: {self.failed}\n"
+            f"Повторов после 429: {self.retries}"
+        )
+
+
+class BroadcastEngine:
+    def __init__(
+        self,
+        bot: Bot,
+        concurrency: int = BROADCAST_CONCURRENCY,
+        max_retries: int = BROADCAST_MAX_RETRIES,
+        bucket: Optional[TokenBucket] = None,
+        limiter: Optional[ChatLimiter] = None,
+    ):
+        self.bot = bot
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max_retries
+        self.bucket = bucket or global_bucket
+        self.limiter = limiter or chat_limiter
+
+    async def _send_one(self, chat_id: int, text: str, stats: BroadcastStats):
+        attempt = 0
+        while True:
+            await self.limiter.wait(chat_id)
+            await self.bucket.acquire()
+            try:
+                await self.bot.send_message(chat_id=chat_id, text=text)
+                stats.sent += 1
+                return
+            except RetryAfter as e:
+                retry_after = e.retry_after.total_seconds() if hasattr(e.retry_after, "total_seconds") else float(e.retry_after)
+                logger.warning("Flood limit at chat %s, retry after %ss", chat_id, retry_after)
+                self.bucket.pause(retry_after)
+                stats.retries += 1
+            except Forbidden:
+                stats.blocked += 1
+                stats.blocked_ids.append(chat_id)
+                return
+            except BadRequest as e:
+                # chat not found / user deactivated: повторять бессмысленно
+                logger.debug("Broadcast to %s rejected: %s", chat_id, e)
+                stats.failed += 1
+                return
+            except (TimedOut, NetworkError) as e:
+                logger.debug("Network error sending to %s: %s", chat_id, e)
+            attempt += 1
+            if attempt > self.max_retries:
+                stats.failed += 1
+                return
+
+    async def send(
+        self,
+        chat_ids: ChatIds,
+        text: str,
+        total: Optional[int] = None,
+        on_progress: Optional[Callable[[BroadcastStats], Awaitable[None]]] = None,
+        progress_interval: float = BROADCAST_PROGRESS_INTERVAL,
+    ) -> BroadcastStats:
+        stats = BroadcastStats(total=total or 0)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+
+        async def produce():
+            count = 0
+            if hasattr(chat_ids, "__aiter__"):
+                async for chat_id in chat_ids:
+                    await queue.put(chat_id)
+                    count += 1
+            else:
+                for chat_id in chat_ids:
+                    await queue.put(chat_id)
+                    count += 1
+            if not total:
+                stats.total = count
+            for _ in range(self.concurrency):
+                await queue.put(None)
+
+        async def work():
+            while True:
+                chat_id = await queue.get()
+                if chat_id is None:
+                    return
+                try:
+                    await self._send_one(chat_id, text, stats)
+                except Exception as e:
+                    logger.error("Unexpected error broadcasting to %s: %s", chat_id, e, exc_info=True)
+                    stats.failed += 1
+
+        async def report():
+            while True:
+                await asyncio.sleep(progress_interval)
+                try:
+                    await on_progress(stats)
+                except Exception as e:
+                    logger.debug("Progress callback failed: %s", e)
+
+        reporter = asyncio.create_task(report()) if on_progress else None
+        try:
+            await asyncio.gather(produce(), *(work() for _ in range(self.concurrency)))
+        finally:
+            if reporter:
+                reporter.cancel()
+            stats.finished_at = time.monotonic()
+        logger.info(
+            "Broadcast finished: %s/%s sent, %s blocked, %s failed, %s retries in %.1fs",
+            stats.sent, stats.total, stats.blocked, stats.failed, stats.retries, stats.elapsed,
+            extra={"event": "broadcast_finished", "sent": stats.sent, "total": stats.total},
+        )
+        return stats
+
+
+def start_broadcast(
+    app: Application,
+    chat_ids: ChatIds,
+    text: str,
+    report_chat_id: Optional[int] = None,
+    title: str = "Рассылка",
+    total: Optional[int] = None,
+    on_blocked: Optional[Callable[[list[int]], Awaitable[None]]] = None,
+) -> asyncio.Task:
+    """Run a broadcast in the background; progress and the final summary go to `report_chat_id`."""
+    engine = BroadcastEngine(app.bot)
+
+    async def run():
+        status_message = None
+        if report_chat_id is not None:
+            try:
+                status_message = await app.bot.send_message(
+                    chat_id=report_chat_id, text=f"📤 {title}: начинаю отправку {total or ''}".rstrip()
+                )
+            except Exception as e:
+                logger.debug("Could not send broadcast status message: %s", e)
+
+        async def on_progress(stats: BroadcastStats):
+            if status_message is not None:
+                await status_message.edit_text(stats.progress_text(title))
+
+        stats = await engine.send(chat_ids, text, total=total, on_progress=on_progress)
+        if on_blocked and stats.blocked_ids:
+            try:
+                await on_blocked(stats.blocked_ids)
+            except Exception as e:
+                logger.error("Error handling blocked chats: %s", e, exc_info=True)
+        if report_chat_id is not None:
+            try:
+                if status_message is not None:
+                    await status_message.edit_text(stats.summary_text(title))
+                else:
+                    await app.bot.send_message(chat_id=report_chat_id, text=stats.summary_text(title))
+            except Exception as e:
+                logger.debug("Could not send broadcast summary: %s", e)
+        return stats
+
+    task = asyncio.create_task(run())
+    _running.add(task)
+    task.add_done_callback(_finished)
+    return task
+
+
+def _finished(task: asyncio.Task):
+    _running.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Broadcast failed: %s", task.exception(), exc_info=task.exception())
+
+
+async def stop_broadcasts(timeout: float = BROADCAST_SHUTDOWN_TIMEOUT):
+    """Wait up to `timeout` seconds for running broadcasts, then cancel the rest."""
+    if not _running:
+        return
+    logger.info("Waiting for %s running broadcasts", len(_running))
+    _, pending = await asyncio.wait(set(_running), timeout=timeout)
+    for task in pending:
+        task.cancel()
+    if pending:
+        logger.warning("Cancelled %s unfinished broadcasts", len(pending))
+        await asyncio.gather(*pending, return_exceptions=True)
@@ -0,0 +1,162 @@
+"""Bulk import of historical users, sprints and words.
+
+    python -m app.bulk_import users users.csv
+    python -m app.bulk_import sprints sprints.csv
+    python -m app.bulk_import words words.csv [--sprint-id 7]
+
+CSV files need a header row with the table's column names (see COLUMNS); a
+/get_words export can be imported back with --sprint-id. Rows that already
+exist are skipped, so an interrupted import can simply be re-run.
+"""
+import argparse
+import asyncio
+import csv
+import itertools
+import logging
+import time
+from datetime import datetime
+from typing import AsyncIterable, Iterable, Optional, Union
+
+from sqlalchemy import insert, text
+from sqlalchemy.dialects import sqlite
+
+from app.db import engine, init_db
+from app.models import Base
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 10000
+
+COLUMNS = {
+    "users": ["id", "username", "joined_at"],
+    "sprints": ["id", "duration", "theme", "start_date", "end_date", "status"],
+    "words": ["user_id", "sprint_id", "words", "language", "submitted_at"],
+}
+# Столбцы выгрузки /get_words называются иначе
+_ALIASES = {"word": "words"}
+
+Rows = Union[Iterable[tuple], AsyncIterable[tuple]]
+
+
+def _parse_datetime(value: str) -> datetime:
+    return datetime.fromisoformat(value)
+
+
+_CONVERTERS = {
+    "id": int,
+    "user_id": int,
+    "sprint_id": int,
+    "duration": int,
+    "joined_at": _parse_datetime,
+    "start_date": _parse_datetime,
+    "end_date": _parse_datetime,
+    "submitted_at": _parse_datetime,
+}
+
+
+def read_csv(path: str, table: str, sprint_id: Optional[int] = None) -> Iterable[tuple]:
+    """Yield rows of `path` as tuples in COLUMNS[table] order, with values converted."""
+    columns = COLUMNS[table]
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = [_ALIASES.get(name, name) for name in next(reader)]
+        positions = {name: index for index, name in enumerate(header)}
+        if sprint_id is not None:
+            positions.pop("sprint_id", None)
+        missing = [name for name in columns if name not in positions and not (name == "sprint_id" and sprint_id is not None)]
+        if missing:
+            raise ValueError(f"{path}: missing columns {', '.join(missing)}")
+        for record in reader:
+            row = []
+            for name in columns:
+                if name == "sprint_id" and sprint_id is not None:
+                    row.append(sprint_id)
+                    continue
+                value = record[positions[name]]
+                if value == "":
+                    row.append(None)
+                else:
+                    row.append(_CONVERTERS.get(name, str)(value))
+            yield tuple(row)
+
+
+async def _chunks(rows: Rows, size: int):
+    if hasattr(rows, "__aiter__"):
+        chunk = []
+        async for row in rows:
+            chunk.append(row)
+            if len(chunk) >= size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+        return
+    iterator = iter(rows)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+async def _copy_chunk_postgres(conn, table: str, columns: list[str], chunk: list[tuple]):
+    # COPY в временную таблицу, затем INSERT ... ON CONFLICT DO NOTHING: быстро и повторяемо
+    raw = (await conn.get_raw_connection()).driver_connection
+    staging = f"_import_{table}"
+    column_list = ", ".join(columns)
+    await conn.execute(text(f"CREATE TEMP TABLE IF NOT EXISTS {staging} (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"))
+    await raw.copy_records_to_table(staging, records=chunk, columns=columns)
+    await conn.execute(text(f"INSERT INTO {table} ({column_list}) SELECT {column_list} FROM {staging} ON CONFLICT DO NOTHING"))
+
+
+async def _insert_chunk(conn, table: str, columns: list[str], chunk: list[tuple]):
+    # executemany одним подготовленным INSERT OR IGNORE
+    statement = sqlite.insert(Base.metadata.tables[table]).on_conflict_do_nothing()
+    await conn.execute(statement, [dict(zip(columns, row)) for row in chunk])
+
+
+async def _insert_generic(conn, table: str, columns: list[str], chunk: list[tuple]):
+    await conn.execute(insert(Base.metadata.tables[table]), [dict(zip(columns, row)) for row in chunk])
+
+
+async def bulk_insert(table: str, rows: Rows, columns: Optional[list[str]] = None, chunk_size: int = CHUNK_SIZE) -> int:
+    """Insert `rows` (tuples in `columns` order) into `table`, one transaction per chunk; returns rows read."""
+    columns = columns or COLUMNS[table]
+    dialect = engine.dialect.name
+    if dialect == "postgresql":
+        write_chunk = _copy_chunk_postgres
+    elif dialect == "sqlite":
+        write_chunk = _insert_chunk
+    else:
+        write_chunk = _insert_generic
+    total = 0
+    async for chunk in _chunks(rows, chunk_size):
+        async with engine.begin() as conn:
+            await write_chunk(conn, table, columns, chunk)
+        total += len(chunk)
+        logger.debug("Imported %s rows into %s", total, table)
+    if dialect == "postgresql" and "id" in columns:
+        # Явные id не двигают последовательность: иначе следующий INSERT получит занятый id
+        async with engine.begin() as conn:
+            await conn.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), GREATEST((SELECT max(id) FROM {table}), 1))"
+            ))
+    return total
+
+
+async def main(args):
+    await init_db()
+    started = time.perf_counter()
+    count = await bulk_insert(args.table, read_csv(args.path, args.table, args.sprint_id), chunk_size=args.chunk_size)
+    elapsed = time.perf_counter() - started
+    print(f"{args.table}: {count} rows in {elapsed:.1f}s ({count / elapsed:,.0f} rows/s)")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import historical data from CSV")
+    parser.add_argument("table", choices=sorted(COLUMNS))
+    parser.add_argument("path")
+    parser.add_argument("--sprint-id", type=int, help="sprint for a /get_words export without a sprint_id column")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,232 @@
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional
+
+from telegram import MessageEntity, Update
+from telegram.ext import ContextTypes
+
+from app.config import ADMIN_ID_SET
+from app.db import SessionLocal
+from app.metrics import HANDLER_ERRORS, HANDLER_LATENCY
+
+logger = logging.getLogger(__name__)
+
+HELP_HINT = "\nНапиши /help, чтобы увидеть свои возможности"
+ERROR_MESSAGE = "❌ Ой, что-то пошло не так!"
+_COMMAND_LINK_PREFIX = "tg://bot_command?command="
+_REQUIRED = object()
+
+
+class UsageError(Exception):
+    """Raised while parsing arguments; the message is sent to the user as is."""
+
+
+@dataclass(frozen=True)
+class Arg:
+    """One positional command argument.
+
+    `type` converts the raw token; with rest=True it receives the list of all
+    remaining tokens instead. `error` is the reply for a token `type` or
+    `choices` rejects (defaults to the command's usage message).
+    """
+
+    name: str
+    type: Callable[[Any], Any] = str
+    default: Any = _REQUIRED
+    choices: Optional[Any] = None
+    rest: bool = False
+    error: Optional[str] = None
+
+
+@dataclass
+class Command:
+    name: str
+    callback: Callable[..., Awaitable[Any]]
+    aliases: tuple[str, ...] = ()
+    admin: bool = False
+    args: tuple[Arg, ...] = ()
+    syntax: str = ""
+    description: str = ""
+    usage: str = ""
+    denied: str = "❌ Эта команда только для админа!"
+    error: str = ERROR_MESSAGE
+    session: bool = True
+    hint: bool = True
+
+    def message(self, text: str) -> str:
+        return text + HELP_HINT if self.hint else text
+
+    def usage_message(self) -> str:
+        return self.message(self.usage or f"❌ Используй: {self.syntax}")
+
+    def parse_args(self, tokens: list[str]) -> dict:
+        values = {}
+        position = 0
+        for arg in self.args:
+            if arg.rest:
+                raw = tokens[position:]
+                position = len(tokens)
+                if not raw and arg.default is not _REQUIRED:
+                    values[arg.name] = arg.default
+                    continue
+            elif position < len(tokens):
+                raw = tokens[position]
+                position += 1
+            elif arg.default is not _REQUIRED:
+                values[arg.name] = arg.default
+                continue
+            else:
+                raise UsageError(self.usage_message())
+            try:
+                value = arg.type(raw)
+            except (TypeError, ValueError):
+                raise UsageError(self.message(arg.error) if arg.error else self.usage_message())
+            if arg.choices is not None and value not in arg.choices:
+                raise UsageError(self.message(arg.error) if arg.error else self.usage_message())
+            if arg.rest and not value:
+                raise UsageError(self.usage_message())
+            values[arg.name] = value
+        return values
+
+
+def is_admin(user_id: int) -> bool:
+    return user_id in ADMIN_ID_SET
+
+
+async def respond(update: Update, text: str):
+    # Для нажатий на inline-кнопки ответ показываем всплывающим окном, иначе — сообщением
+    if update.callback_query is not None:
+        await update.callback_query.answer(text, show_alert=True)
+    elif update.effective_message is not None:
+        await update.effective_message.reply_text(text)
+
+
+def split_command(update: Update, bot_username: Optional[str]) -> Optional[tuple[str, list[str]]]:
+    """(command, args) of a message starting with /command or a tg://bot_command link."""
+    message = update.effective_message
+    if message is None or not message.text:
+        return None
+    text = message.text
+    entities = message.entities or ()
+    if entities and entities[0].type == MessageEntity.BOT_COMMAND and entities[0].offset == 0:
+        command, _, target = text[1:entities[0].length].partition("@")
+        if target and bot_username and target.lower() != bot_username.lower():
+            return None
+        return command.lower(), text[entities[0].length:].split()
+    for entity in entities:
+        if entity.type == MessageEntity.TEXT_LINK and entity.url and entity.url.startswith(_COMMAND_LINK_PREFIX):
+            command = entity.url[len(_COMMAND_LINK_PREFIX):].split("@")[0].lower()
+            rest = text[:entity.offset] + text[entity.offset + entity.length:]
+            return command, rest.split()
+    return None
+
+
+class CommandRegistry:
+    """Declarative command table with a single dispatch entry point.
+
+    One dict lookup replaces a chain of CommandHandler checks; admin access,
+    argument parsing, the per-update session, error replies and timing are
+    handled here instead of in every handler.
+    """
+
+    def __init__(self):
+        self._commands: dict[str, Command] = {}
+        self._ordered: list[Command] = []
+        self.fallback: Optional[Callable[..., Awaitable[Any]]] = None
+
+    def command(self, name: str, *aliases: str, **options):
+        def decorator(callback):
+            arguments = tuple(options.pop("args", ()))
+            spec = Command(name=name, callback=callback, aliases=aliases, args=arguments, **options)
+            for key in (name, *aliases):
+                if key in self._commands:
+                    raise ValueError(f"Command /{key} is already registered")
+                self._commands[key] = spec
+            self._ordered.append(spec)
+            return callback
+        return decorator
+
+    def unrecognized(self, callback):
+        self.fallback = callback
+        return callback
+
+    def get(self, name: str) -> Optional[Command]:
+        return self._commands.get(name)
+
+    def names(self) -> list[str]:
+        return list(self._commands)
+
+    def help_lines(self, admin: bool) -> list[str]:
+        return [
+            f"{spec.syntax} - {spec.description}"
+            for spec in self._ordered
+            if spec.description and (admin or not spec.admin)
+        ]
+
+    async def dispatch(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        parsed = split_command(update, context.bot.username)
+        if parsed is None:
+            return
+        name, tokens = parsed
+        context.args = tokens
+        spec = self.get(name)
+        if spec is None:
+            if self.fallback is not None:
+                await run_handler("handle_unrecognized_command", update, self.fallback, (update, context), session=False)
+            return
+        if spec.admin and not is_admin(update.effective_user.id):
+            await respond(update, spec.message(spec.denied))
+            return
+        try:
+            kwargs = spec.parse_args(tokens)
+        except UsageError as e:
+            await respond(update, str(e))
+            return
+        await run_handler(spec.name, update, spec.callback, (update, context), kwargs, spec.session, spec.message(spec.error))
+
+
+async def run_handler(
+    name: str,
+    update: Update,
+    callback,
+    args: tuple,
+    kwargs: Optional[dict] = None,
+    session: bool = True,
+    error: str = ERROR_MESSAGE,
+):
+    """Call a handler with an optional fresh session, logging, metrics and a generic error reply."""
+    started = time.perf_counter()
+    try:
+        if session:
+            async with SessionLocal() as db:
+                await callback(*args, db, **(kwargs or {}))
+        else:
+            await callback(*args, **(kwargs or {}))
+    except Exception as e:
+        HANDLER_ERRORS.labels(name).inc()
+        user_id = update.effective_user.id if update.effective_user else None
+        logger.error("Error in %s for user_id %s: %s", name, user_id, e, exc_info=True)
+        try:
+            await respond(update, error)
+        except Exception as reply_error:
+            logger.debug("Could not send error reply: %s", reply_error)
+    finally:
+        elapsed = time.perf_counter() - started
+        HANDLER_LATENCY.labels(name).observe(elapsed)
+        logger.debug("%s handled in %.1f ms", name, elapsed * 1000)
+
+
+def handler(name: str, session: bool = True, admin: bool = False, denied: str = "❌ Только для админа!", error: str = ERROR_MESSAGE):
+    """Same treatment for non-command callbacks (plain text, inline buttons)."""
+
+    def decorator(callback):
+        async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE):
+            if admin and not is_admin(update.effective_user.id):
+                await respond(update, denied)
+                return
+            await run_handler(name, update, callback, (update, context), session=session, error=error)
+        wrapper.__name__ = name
+        wrapper.__wrapped__ = callback
+        return wrapper
+    return decorator
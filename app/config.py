@@ -2,24 +2,163 @@ import os
 import logging
 
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
 
 # Telegram Bot Token
 TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
 
 # Admin IDs
 raw_admin_ids = os.getenv("ADMIN_IDS", "")
-logger.debug(f"Raw ADMIN_IDS from env: '{raw_admin_ids}'")
+logger.debug("Raw ADMIN_IDS from env: '%s'", raw_admin_ids)
 try:
     ADMIN_IDS = [int(x) for x in raw_admin_ids.split(",") if x]
 except ValueError as e:
-    logger.error(f"Error parsing ADMIN_IDS: {e}")
+    logger.error("Error parsing ADMIN_IDS: %s", e)
     ADMIN_IDS = []
-logger.debug(f"Parsed ADMIN_IDS: {ADMIN_IDS}")
-logger.debug(f"Admin IDs list: {', '.join(str(id) for id in ADMIN_IDS) if ADMIN_IDS else 'No admin IDs'}")
+logger.debug("Parsed ADMIN_IDS: %s", ADMIN_IDS)
+# Для проверок доступа: membership в frozenset вместо прохода по списку
+ADMIN_ID_SET = frozenset(ADMIN_IDS)
+logger.debug("Admin IDs list: %s", ', '.join(str(id) for id in ADMIN_IDS) if ADMIN_IDS else 'No admin IDs')
 
 # Database URL
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///sprintbot.db")
 
 # Webhook URL
 WEBHOOK_URL = os.getenv("WEBHOOK_URL")
+
+# Base URL of the Bot API server (e.g. a local fake Bot API for load tests)
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL")
+
+# Broadcast limits: Telegram allows ~30 messages/sec per bot and ~1 message/sec per chat
+BROADCAST_RATE = float(os.getenv("BROADCAST_RATE", "25"))
+BROADCAST_CONCURRENCY = int(os.getenv("BROADCAST_CONCURRENCY", "20"))
+BROADCAST_PER_CHAT_INTERVAL = float(os.getenv("BROADCAST_PER_CHAT_INTERVAL", "1.0"))
+BROADCAST_MAX_RETRIES = int(os.getenv("BROADCAST_MAX_RETRIES", "5"))
+BROADCAST_PROGRESS_INTERVAL = float(os.getenv("BROADCAST_PROGRESS_INTERVAL", "5"))
+# How long shutdown waits for running broadcasts before cancelling them
+BROADCAST_SHUTDOWN_TIMEOUT = float(os.getenv("BROADCAST_SHUTDOWN_TIMEOUT", "10"))
+
+# Connection pool (PostgreSQL). Keep pool_size + max_overflow below the server's connection limit
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+# Active sprint cache: max age in seconds, and an optional PostgreSQL LISTEN/NOTIFY
+# channel name for invalidating the cache in all workers at once
+SPRINT_CACHE_TTL = float(os.getenv("SPRINT_CACHE_TTL", "60"))
+SPRINT_CACHE_CHANNEL = os.getenv("SPRINT_CACHE_CHANNEL", "")
+
+# /get_words export: rows per fetched batch, gzip CSV above this estimated size,
+# and split into parts below Telegram's 50 MB bot upload limit
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "5000"))
+EXPORT_GZIP_THRESHOLD = int(os.getenv("EXPORT_GZIP_THRESHOLD", str(1024 * 1024)))
+EXPORT_PART_MAX_BYTES = int(os.getenv("EXPORT_PART_MAX_BYTES", str(45 * 1024 * 1024)))
+
+# Secret token Telegram sends in X-Telegram-Bot-Api-Secret-Token with every webhook call
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+
+# Webhook update queue: worker count (one chat is always served by the same worker),
+# total queue capacity, number of recent update_ids kept for deduplication,
+# and how long shutdown waits for queued updates
+UPDATE_WORKERS = int(os.getenv("UPDATE_WORKERS", "8"))
+UPDATE_QUEUE_SIZE = int(os.getenv("UPDATE_QUEUE_SIZE", "1000"))
+UPDATE_DEDUP_SIZE = int(os.getenv("UPDATE_DEDUP_SIZE", "10000"))
+UPDATE_DRAIN_TIMEOUT = float(os.getenv("UPDATE_DRAIN_TIMEOUT", "20"))
+
+# Persisted ledger of processed update_ids (survives restarts, shared by workers).
+# Telegram stops redelivering an update after 24 hours, so older entries are pruned;
+# claims arriving within UPDATE_LEDGER_BATCH_WAIT_MS are written in one INSERT
+UPDATE_LEDGER_ENABLED = os.getenv("UPDATE_LEDGER_ENABLED", "1") == "1"
+UPDATE_LEDGER_TTL = float(os.getenv("UPDATE_LEDGER_TTL", str(24 * 3600)))
+UPDATE_LEDGER_BATCH_WAIT_MS = float(os.getenv("UPDATE_LEDGER_BATCH_WAIT_MS", "2"))
+
+# Number of distinct normalized texts whose detected language is memoized
+LANG_CACHE_SIZE = int(os.getenv("LANG_CACHE_SIZE", "50000"))
+
+# Input validation (profanity + language detection) runs off the event loop:
+# "process", "thread" or "inline"; submissions are grouped into micro-batches
+VALIDATION_EXECUTOR = os.getenv("VALIDATION_EXECUTOR", "process")
+VALIDATION_WORKERS = int(os.getenv("VALIDATION_WORKERS", "2"))
+VALIDATION_TIMEOUT = float(os.getenv("VALIDATION_TIMEOUT", "3"))
+VALIDATION_BATCH_SIZE = int(os.getenv("VALIDATION_BATCH_SIZE", "32"))
+VALIDATION_BATCH_WAIT_MS = float(os.getenv("VALIDATION_BATCH_WAIT_MS", "5"))
+
+# Extra admin-maintained profanity wordlist (same format as app/wordlists/*.txt),
+# re-read together with the built-in lists by /reload_profanity
+PROFANITY_WORDLIST_PATH = os.getenv("PROFANITY_WORDLIST_PATH", "")
+# How often (seconds) each worker checks the shared wordlist version, so a
+# /reload_profanity received by one worker reaches the others
+PROFANITY_VERSION_CHECK_INTERVAL = float(os.getenv("PROFANITY_VERSION_CHECK_INTERVAL", "5"))
+
+# Rows per page in /list_users and /list_sprints
+LIST_PAGE_SIZE = int(os.getenv("LIST_PAGE_SIZE", "20"))
+
+# Logging: APP_ENV picks defaults (development -> DEBUG, production -> INFO with noisy
+# libraries at WARNING); LOG_LEVELS overrides per logger ("app.bot=DEBUG,httpx=WARNING");
+# LOG_SAMPLING keeps a fraction of sub-WARNING records ("app.main=0.01")
+APP_ENV = os.getenv("APP_ENV", "production")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "")
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+LOG_SAMPLING = os.getenv("LOG_SAMPLING", "")
+
+# Readiness check (/health): per-check timeout, and how long a successful getMe is trusted
+HEALTH_CHECK_TIMEOUT = float(os.getenv("HEALTH_CHECK_TIMEOUT", "3"))
+HEALTH_BOT_CHECK_INTERVAL = float(os.getenv("HEALTH_BOT_CHECK_INTERVAL", "30"))
+
+# Scheduled jobs (sprint expiry, daily report) are persisted here; defaults to DATABASE_URL
+SCHEDULER_JOBSTORE_URL = os.getenv("SCHEDULER_JOBSTORE_URL", "")
+
+# Leader election between instances/workers: only the lease holder sets the webhook
+# and runs scheduled jobs. The lease is renewed every LEADER_RENEW_INTERVAL seconds
+# and taken over by another instance LEADER_LEASE_TTL seconds after the holder stops renewing
+LEADER_LEASE_TTL = float(os.getenv("LEADER_LEASE_TTL", "30"))
+LEADER_RENEW_INTERVAL = float(os.getenv("LEADER_RENEW_INTERVAL", "10"))
+
+# words partitioning (python -m app.partitions): sprints per range partition
+WORDS_PARTITION_SIZE = int(os.getenv("WORDS_PARTITION_SIZE", "10"))
+
+# Fast boot for instances that sleep and cold-start (Render free tier): startup
+# returns as soon as /webhook can accept updates; validation warm-up and the first
+# leader election (setWebhook, scheduler catch-up) continue in the background
+FAST_BOOT = os.getenv("FAST_BOOT", "1") == "1"
+
+# Optional group commit of word submissions (off by default): accepted submissions are
+# written together in one multi-row INSERT every SUBMISSION_BATCH_WAIT_MS or
+# SUBMISSION_BATCH_SIZE rows, and users get their reply once the batch is committed.
+# At most SUBMISSION_QUEUE_SIZE submissions wait in memory; beyond that handlers wait for a slot
+SUBMISSION_BUFFER_ENABLED = os.getenv("SUBMISSION_BUFFER_ENABLED", "0") == "1"
+SUBMISSION_BATCH_WAIT_MS = float(os.getenv("SUBMISSION_BATCH_WAIT_MS", "5"))
+SUBMISSION_BATCH_SIZE = int(os.getenv("SUBMISSION_BATCH_SIZE", "500"))
+SUBMISSION_QUEUE_SIZE = int(os.getenv("SUBMISSION_QUEUE_SIZE", "10000"))
+
+# Per-user flood control before updates are queued (admins are exempt): bursts of
+# THROTTLE_BURST updates, then THROTTLE_RATE per second; THROTTLE_MUTE_AFTER dropped
+# updates in a row mute the user for THROTTLE_MUTE_SECONDS, doubling on repeat up to
+# THROTTLE_MAX_MUTE_SECONDS. Idle users are forgotten after THROTTLE_IDLE_TTL seconds
+THROTTLE_ENABLED = os.getenv("THROTTLE_ENABLED", "1") == "1"
+THROTTLE_RATE = float(os.getenv("THROTTLE_RATE", "1"))
+THROTTLE_BURST = float(os.getenv("THROTTLE_BURST", "5"))
+THROTTLE_MUTE_AFTER = int(os.getenv("THROTTLE_MUTE_AFTER", "10"))
+THROTTLE_MUTE_SECONDS = float(os.getenv("THROTTLE_MUTE_SECONDS", "60"))
+THROTTLE_MAX_MUTE_SECONDS = float(os.getenv("THROTTLE_MAX_MUTE_SECONDS", "3600"))
+THROTTLE_IDLE_TTL = float(os.getenv("THROTTLE_IDLE_TTL", "600"))
+THROTTLE_MAX_USERS = int(os.getenv("THROTTLE_MAX_USERS", "100000"))
+
+# Known users cached in memory (LRU of USER_CACHE_SIZE ids): /start writes only for new
+# users, changed usernames, users who unblocked the bot, or when last_seen is older
+# than USER_SEEN_INTERVAL seconds. Broadcast recipients are read RECIPIENTS_CHUNK_SIZE ids at a time
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "100000"))
+USER_SEEN_INTERVAL = float(os.getenv("USER_SEEN_INTERVAL", "3600"))
+RECIPIENTS_CHUNK_SIZE = int(os.getenv("RECIPIENTS_CHUNK_SIZE", "5000"))
+
+# /sprint_stats: word counters per sprint, updated from new rows only. ANALYTICS_TOP_K
+# counters per sprint (Space-Saving), at most ANALYTICS_MAX_SPRINTS sprints in memory.
+# Rows younger than ANALYTICS_LAG seconds are folded in on the next call, so a slow
+# transaction with a smaller id is not skipped. The folded counters are saved to the
+# sprint_stats table, and the leader folds active sprints every ANALYTICS_REFRESH_INTERVAL
+# seconds (0 turns that off), so /sprint_stats on any worker reads only a short tail
+ANALYTICS_TOP_K = int(os.getenv("ANALYTICS_TOP_K", "500"))
+ANALYTICS_MAX_SPRINTS = int(os.getenv("ANALYTICS_MAX_SPRINTS", "8"))
+ANALYTICS_LAG = float(os.getenv("ANALYTICS_LAG", "5"))
+ANALYTICS_REFRESH_INTERVAL = float(os.getenv("ANALYTICS_REFRESH_INTERVAL", "60"))
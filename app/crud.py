@@ -0,0 +1,46 @@
+from datetime import datetime
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Word
+
+_dialect_inserts = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def dialect_insert(db: AsyncSession, table):
+    # INSERT ... ON CONFLICT есть только в диалектных вариантах insert()
+    dialect = db.get_bind().dialect.name
+    try:
+        return _dialect_inserts[dialect](table)
+    except KeyError:
+        raise NotImplementedError(f"ON CONFLICT inserts are not supported for {dialect}")
+
+
+async def insert_words(db: AsyncSession, rows: list[dict], commit: bool = True) -> set[tuple[int, int]]:
+    """Multi-row INSERT ... ON CONFLICT DO NOTHING (and commit); returns (user_id, sprint_id) of inserted rows."""
+    stmt = (
+        dialect_insert(db, Word)
+        .values(rows)
+        .on_conflict_do_nothing(index_elements=[Word.user_id, Word.sprint_id])
+        .returning(Word.user_id, Word.sprint_id)
+    )
+    inserted = {tuple(row) for row in (await db.execute(stmt)).all()}
+    if commit:
+        await db.commit()
+    return inserted
+
+
+async def submit_words(db: AsyncSession, user_id: int, sprint_ids: list[int], words: str, language: str) -> list[int]:
+    """Insert one submission per sprint in a single statement; returns sprint ids that were actually inserted."""
+    if not sprint_ids:
+        return []
+    now = datetime.utcnow()
+    inserted = await insert_words(db, [
+        {"user_id": user_id, "sprint_id": sprint_id, "words": words, "language": language, "submitted_at": now}
+        for sprint_id in sprint_ids
+    ])
+    return [sprint_id for sprint_id in sprint_ids if (user_id, sprint_id) in inserted]
@@ -1,36 +1,142 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from app.config import DATABASE_URL
-from app.models import Base  # Import Base for table creation
+import asyncio
+import os
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from app.config import (
+    DATABASE_URL,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+)
+from app.metrics import instrument_engine
 import logging
 
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
 
-logger.debug(f"Connecting to database: {DATABASE_URL}")
+
+def async_database_url(url: str):
+    # Render отдаёт postgres://..., а asyncio-движку нужен явный async-драйвер
+    if url.startswith("postgres://"):
+        url = "postgresql://" + url[len("postgres://"):]
+    parsed = make_url(url)
+    connect_args = {}
+    if parsed.get_backend_name() == "postgresql":
+        sslmode = parsed.query.get("sslmode")
+        parsed = parsed.set(drivername="postgresql+asyncpg").difference_update_query(["sslmode"])
+        if sslmode and sslmode != "disable":
+            connect_args["ssl"] = True
+    elif parsed.get_backend_name() == "sqlite":
+        parsed = parsed.set(drivername="sqlite+aiosqlite")
+    return parsed, connect_args
+
+
+def sync_database_url(url: str) -> str:
+    # Для синхронных клиентов (хранилище заданий APScheduler): psycopg2 / sqlite3
+    if url.startswith("postgres://"):
+        url = "postgresql://" + url[len("postgres://"):]
+    return url
+
+
+def create_engine_from_url(url: str):
+    parsed, connect_args = async_database_url(url)
+    options = {"pool_pre_ping": True}
+    if parsed.get_backend_name() == "postgresql":
+        options.update(
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+        )
+    return create_async_engine(parsed, connect_args=connect_args, **options)
+
+
+logger.debug("Connecting to database: %s", make_url(DATABASE_URL).render_as_string(hide_password=True))
 try:
-    engine = create_engine(DATABASE_URL)
+    engine = create_engine_from_url(DATABASE_URL)
+    instrument_engine(engine)
     logger.debug("Database engine created successfully")
 except Exception as e:
-    logger.error(f"Error creating database engine: {e}", exc_info=True)
+    logger.error("Error creating database engine: %s", e, exc_info=True)
     raise
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# expire_on_commit=False: после commit объекты остаются читаемыми без повторного запроса
+SessionLocal = async_sessionmaker(engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+MIGRATION_ATTEMPTS = 5
+MIGRATIONS_DIR = os.path.join(os.path.dirname(ALEMBIC_INI), "migrations", "versions")
+
 
-def init_db():
-    logger.debug("Initializing database tables")
+def schema_head() -> str:
+    # Ревизии нумеруются подряд (0001, 0002, ...), а имя файла начинается с ревизии:
+    # последняя видна без импорта alembic и разбора скриптов
+    return max(name.split("_", 1)[0] for name in os.listdir(MIGRATIONS_DIR) if name.endswith(".py"))
+
+
+async def schema_version(conn) -> Optional[str]:
+    try:
+        return await conn.scalar(text("SELECT version_num FROM alembic_version"))
+    except Exception:
+        await conn.rollback()
+        return None
+
+
+def run_migrations(connection, revision: str = "head"):
+    # alembic нужен только при смене схемы; импорт стоит ~150 мс холодного старта
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(ALEMBIC_INI)
+    config.attributes["connection"] = connection
+    command.upgrade(config, revision)
+
+
+async def init_db():
+    head = schema_head()
     try:
-        Base.metadata.create_all(bind=engine)
-        logger.debug("Database tables created successfully")
+        async with engine.connect() as conn:
+            current = await schema_version(conn)
+            if current == head:
+                logger.debug("Database schema is at %s, skipping migrations", head)
+                return
+            logger.info("Migrating database schema from %s to %s", current, head)
+            postgres = conn.dialect.name == "postgresql"
+            if postgres:
+                # Несколько воркеров стартуют одновременно: мигрируем по очереди. Блокировка
+                # сессионная, потому что CREATE INDEX CONCURRENTLY коммитит транзакцию
+                await conn.execute(text("SELECT pg_advisory_lock(hashtext('sprintbot_schema'))"))
+                await conn.commit()
+            try:
+                for attempt in range(MIGRATION_ATTEMPTS):
+                    try:
+                        await conn.run_sync(run_migrations)
+                        break
+                    except Exception as e:
+                        # На SQLite блокировки нет: соседний воркер мог мигрировать одновременно
+                        if postgres or attempt == MIGRATION_ATTEMPTS - 1:
+                            raise
+                        await conn.rollback()
+                        logger.warning("Migration attempt failed, retrying: %s", e)
+                        await asyncio.sleep(0.5)
+                        if await schema_version(conn) == head:
+                            break
+            finally:
+                if postgres:
+                    await conn.execute(text("SELECT pg_advisory_unlock(hashtext('sprintbot_schema'))"))
+                    await conn.commit()
+        logger.debug("Database schema is up to date")
     except Exception as e:
-        logger.error(f"Error initializing database tables: {e}", exc_info=True)
+        logger.error("Error applying database migrations: %s", e, exc_info=True)
         raise
 
-def get_db():
-    logger.debug("Creating new database session")
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        logger.debug("Closing database session")
-        db.close()
+async def ping_db():
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+
+async def close_db():
+    logger.debug("Disposing database engine")
+    await engine.dispose()
@@ -0,0 +1,213 @@
+import asyncio
+import csv
+from abc import ABC, abstractmethod
+import gzip
+import io
+import logging
+import tempfile
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from telegram import Bot, InputFile
+
+from app.config import EXPORT_BATCH_SIZE, EXPORT_GZIP_THRESHOLD, EXPORT_PART_MAX_BYTES
+from app.models import Word
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency, only needed for parquet exports
+    pa = None
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+EXPORT_COLUMNS = ["word", "user_id", "language", "submitted_at"]
+EXPORT_FORMATS = ("csv", "parquet")
+PARQUET_AVAILABLE = pa is not None
+# Грубая оценка размера строки CSV, чтобы заранее решить, сжимать ли выгрузку
+_ESTIMATED_ROW_BYTES = 48
+_SPOOL_MAX_MEMORY = 1024 * 1024
+
+
+@dataclass
+class ExportPart:
+    file: tempfile.SpooledTemporaryFile
+    rows: int = 0
+    filename: str = ""
+
+    @property
+    def size(self) -> int:
+        position = self.file.tell()
+        self.file.seek(0, io.SEEK_END)
+        size = self.file.tell()
+        self.file.seek(position)
+        return size
+
+    def close(self):
+        self.file.close()
+
+
+class _PartWriter(ABC):
+    """Writes batches into consecutive parts, each kept under max_bytes."""
+
+    extension = ""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.parts: list[ExportPart] = []
+        self._current: Optional[ExportPart] = None
+
+    def _open_part(self) -> ExportPart:
+        part = ExportPart(file=tempfile.SpooledTemporaryFile(max_size=_SPOOL_MAX_MEMORY))
+        self.parts.append(part)
+        return part
+
+    def _close_part(self):
+        self._current = None
+
+    @abstractmethod
+    def write_rows(self, rows):
+        """Append a batch of rows, starting a new part when the current one is full."""
+
+    def finish(self, prefix: str) -> list[ExportPart]:
+        if self._current is not None:
+            self._close_part()
+        for number, part in enumerate(self.parts, start=1):
+            suffix = f"_part{number}" if len(self.parts) > 1 else ""
+            part.filename = f"{prefix}{suffix}{self.extension}"
+            part.file.seek(0)
+        return self.parts
+
+
+class CsvPartWriter(_PartWriter):
+    def __init__(self, max_bytes: int, compress: bool):
+        super().__init__(max_bytes)
+        self.compress = compress
+        self.extension = ".csv.gz" if compress else ".csv"
+        self._stream = None
+
+    def write_rows(self, rows):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if self._current is None:
+            self._current = self._open_part()
+            self._stream = gzip.GzipFile(fileobj=self._current.file, mode="wb", compresslevel=6) if self.compress else self._current.file
+            writer.writerow(EXPORT_COLUMNS)
+        writer.writerows(rows)
+        self._stream.write(buffer.getvalue().encode())
+        self._current.rows += len(rows)
+        # Для gzip размер на диске отстаёт на буфер компрессора, поэтому лимит берётся с запасом
+        if self._current.file.tell() >= self.max_bytes:
+            self._close_part()
+
+    def _close_part(self):
+        if self.compress and self._stream is not None:
+            self._stream.close()
+        self._stream = None
+        super()._close_part()
+
+
+class ParquetPartWriter(_PartWriter):
+    extension = ".parquet"
+
+    def __init__(self, max_bytes: int):
+        if pa is None:
+            raise RuntimeError("pyarrow is not installed")
+        super().__init__(max_bytes)
+        self.schema = pa.schema([
+            ("word", pa.string()),
+            ("user_id", pa.int64()),
+            ("language", pa.string()),
+            ("submitted_at", pa.timestamp("us")),
+        ])
+        self._writer = None
+
+    def write_rows(self, rows):
+        if self._current is None:
+            self._current = self._open_part()
+            self._writer = pq.ParquetWriter(self._current.file, self.schema, compression="zstd")
+        columns = list(zip(*rows)) if rows else [[] for _ in EXPORT_COLUMNS]
+        batch = pa.record_batch([pa.array(column, type=field.type) for column, field in zip(columns, self.schema)], schema=self.schema)
+        self._writer.write_batch(batch)
+        self._current.rows += len(rows)
+        if self._current.file.tell() >= self.max_bytes:
+            self._close_part()
+
+    def _close_part(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        super()._close_part()
+
+
+async def count_words(db: AsyncSession, sprint_id: int) -> int:
+    return await db.scalar(select(func.count()).select_from(Word).where(Word.sprint_id == sprint_id))
+
+
+async def iter_word_batches(db: AsyncSession, sprint_id: int, batch_size: int = EXPORT_BATCH_SIZE) -> AsyncIterator[list]:
+    # yield_per включает серверный курсор (asyncpg), строки не копятся в памяти целиком
+    result = await db.stream(
+        select(Word.words, Word.user_id, Word.language, Word.submitted_at)
+        .where(Word.sprint_id == sprint_id)
+        .order_by(Word.id)
+        .execution_options(yield_per=batch_size)
+    )
+    async for partition in result.partitions(batch_size):
+        yield [tuple(row) for row in partition]
+
+
+async def export_sprint_words(
+    db: AsyncSession,
+    sprint_id: int,
+    fmt: str = "csv",
+    max_part_bytes: int = EXPORT_PART_MAX_BYTES,
+    gzip_threshold: int = EXPORT_GZIP_THRESHOLD,
+) -> list[ExportPart]:
+    """Stream a sprint's words into one or more files, each small enough for a Telegram upload."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    total = await count_words(db, sprint_id)
+    if not total:
+        return []
+    if fmt == "parquet":
+        writer = ParquetPartWriter(max_part_bytes)
+    else:
+        writer = CsvPartWriter(max_part_bytes, compress=total * _ESTIMATED_ROW_BYTES >= gzip_threshold)
+    logger.debug("Exporting %s words of sprint %s as %s%s", total, sprint_id, fmt, writer.extension)
+    try:
+        async for rows in iter_word_batches(db, sprint_id):
+            # кодирование и сжатие — CPU-работа, уводим её с event loop
+            await asyncio.to_thread(writer.write_rows, rows)
+        return writer.finish(f"sprint_{sprint_id}_words")
+    except Exception:
+        for part in writer.parts:
+            part.close()
+        raise
+
+
+class _NamedFile:
+    """Read-only view of an export part with a name: PTB takes the upload name from
+    file.name, and a SpooledTemporaryFile still in memory reports None there."""
+
+    def __init__(self, file, name: str):
+        self._file = file
+        self.name = name
+
+    def read(self, size: int = -1) -> bytes:
+        return self._file.read(size)
+
+
+async def send_export(bot: Bot, chat_id: int, parts: list[ExportPart]):
+    for part in parts:
+        logger.debug("Sending %s: %s rows, %s bytes", part.filename, part.rows, part.size)
+        part.file.seek(0)
+        document = InputFile(_NamedFile(part.file, part.filename), filename=part.filename)
+        await bot.send_document(chat_id=chat_id, document=document)
+
+
+def close_export(parts: list[ExportPart]):
+    for part in parts:
+        part.close()
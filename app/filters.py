@@ -1,19 +1,35 @@
-from better_profanity import profanity
-from app.lang_detect import detect_language
+import time
+from typing import Optional
 
-def is_valid_input(words: str) -> tuple[bool, str]:
+from app import profanity
+from app.lang_detect import detect_language, warm_up as warm_up_lang_detect
+
+def is_valid_input(words: str, timings: Optional[dict] = None) -> tuple[bool, str]:
+    # timings, если передан, получает длительность каждой проверки в секундах
     # Check word count
     word_list = words.strip().split()
     if not 1 <= len(word_list) <= 3:
         return False, "❌ Эй, нужно от 1 до 3 слов, не больше, не меньше! (Hey, 1 to 3 words only, no more, no less!)"
     
     # Check for profanity
-    if profanity.contains_profanity(words):
+    started = time.perf_counter()
+    has_profanity = profanity.contains_profanity(words)
+    if timings is not None:
+        timings["profanity"] = time.perf_counter() - started
+    if has_profanity:
         return False, "❌ Ух, какие слова! Давай без мата, а? (Whoa, those words! Let's keep it clean, okay?)"
     
     # Check language
+    started = time.perf_counter()
     language = detect_language(words)
+    if timings is not None:
+        timings["language"] = time.perf_counter() - started
     if not language:
         return False, "❌ Это что, шифр инопланетян? Попробуй нормальные слова! (Is that alien code? Try normal words!)"
     
     return True, language
+
+def warm_up_filters():
+    # Словарь мата и профили языков грузятся лениво при первом вызове; делаем это заранее
+    profanity.get_matcher()
+    warm_up_lang_detect()
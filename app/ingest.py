@@ -0,0 +1,44 @@
+import json
+from typing import Optional
+
+from telegram import Update
+
+from app.bot import ALLOWED_UPDATES
+
+try:
+    import orjson
+except ImportError:  # optional dependency, the stdlib parser is ~2-3x slower
+    orjson = None
+
+# Тело ответа на каждый апдейт; готовые байты вместо сериализации словаря
+OK_BODY = b'{"status":"ok"}'
+
+# Причина отброса идёт в метку метрики: неизвестный ключ (без WEBHOOK_SECRET его может
+# прислать кто угодно) сводим к "other", чтобы число серий было ограничено
+_KNOWN_UPDATE_TYPES = frozenset(str(kind) for kind in Update.ALL_TYPES)
+
+
+def loads(body: bytes):
+    """Parse a webhook body once; raises ValueError on malformed JSON."""
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def ignored_reason(data: dict) -> Optional[str]:
+    """Why no handler would react to this update (its type, "other", "empty" or "no_text"); None if it should be queued.
+
+    Only the top-level keys and, for messages, the presence of text are looked
+    at, so edited messages, channel posts, stickers and photos are dropped
+    without building a telegram.Update.
+    """
+    kind = next((key for key in data if key != "update_id"), None)
+    if kind is None:
+        return "empty"
+    if kind not in ALLOWED_UPDATES:
+        return kind if kind in _KNOWN_UPDATE_TYPES else "other"
+    if kind == "message":
+        message = data[kind]
+        if not isinstance(message, dict) or not isinstance(message.get("text"), str):
+            return "no_text"
+    return None
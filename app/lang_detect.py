@@ -1,11 +1,154 @@
-from langdetect import detect, DetectorFactory
+from functools import lru_cache
+from typing import Iterable, Optional
+
+from langdetect.detector_factory import DetectorFactory, PROFILES_DIRECTORY
 from langdetect.lang_detect_exception import LangDetectException
 
+from app.config import LANG_CACHE_SIZE
+
 # Ensure consistent language detection results
 DetectorFactory.seed = 0
 
-def detect_language(text: str) -> str:
+_factory: Optional[DetectorFactory] = None
+
+# Диапазоны кодовых точек по письменностям; проверка идёт по порядку
+_SCRIPTS = (
+    ("latin", ((0x0041, 0x005A), (0x0061, 0x007A), (0x00C0, 0x024F), (0x1E00, 0x1EFF))),
+    ("cyrillic", ((0x0400, 0x052F),)),
+    ("greek", ((0x0370, 0x03FF),)),
+    ("hebrew", ((0x0590, 0x05FF),)),
+    ("arabic", ((0x0600, 0x06FF), (0x0750, 0x077F))),
+    ("devanagari", ((0x0900, 0x097F),)),
+    ("bengali", ((0x0980, 0x09FF),)),
+    ("gurmukhi", ((0x0A00, 0x0A7F),)),
+    ("gujarati", ((0x0A80, 0x0AFF),)),
+    ("tamil", ((0x0B80, 0x0BFF),)),
+    ("telugu", ((0x0C00, 0x0C7F),)),
+    ("kannada", ((0x0C80, 0x0CFF),)),
+    ("malayalam", ((0x0D00, 0x0D7F),)),
+    ("thai", ((0x0E00, 0x0E7F),)),
+    ("hangul", ((0x1100, 0x11FF), (0x3130, 0x318F), (0xAC00, 0xD7AF))),
+    ("kana", ((0x3040, 0x30FF),)),
+    ("han", ((0x3400, 0x4DBF), (0x4E00, 0x9FFF))),
+)
+
+# Письменности, которые в профилях langdetect соответствуют ровно одному языку
+_SINGLE_LANGUAGE_SCRIPTS = {
+    "greek": "el",
+    "hebrew": "he",
+    "bengali": "bn",
+    "gurmukhi": "pa",
+    "gujarati": "gu",
+    "tamil": "ta",
+    "telugu": "te",
+    "kannada": "kn",
+    "malayalam": "ml",
+    "thai": "th",
+    "hangul": "ko",
+}
+
+_UKRAINIAN_LETTERS = frozenset("іїєґ")
+_MACEDONIAN_LETTERS = frozenset("ѓќѕљњџј")
+# Буквы латиницы, встречающиеся только в одном из языков профилей langdetect
+_LATIN_MARKERS = {
+    "ß": "de",
+    "ñ": "es",
+    "ğ": "tr",
+    "ı": "tr",
+    "ő": "hu",
+    "ű": "hu",
+    "ł": "pl",
+    "ż": "pl",
+    "ř": "cs",
+    "ů": "cs",
+    "ș": "ro",
+    "ț": "ro",
+}
+
+
+def _char_script(char: str) -> Optional[str]:
+    code = ord(char)
+    for script, ranges in _SCRIPTS:
+        for low, high in ranges:
+            if low <= code <= high:
+                return script
+    return None
+
+
+def detect_script_language(text: str) -> Optional[str]:
+    """Settle unambiguous cases by Unicode script alone; None means "ask the model"."""
+    scripts = set()
+    for char in text:
+        if char.isalpha():
+            script = _char_script(char)
+            if script is None:
+                return None
+            scripts.add(script)
+    if not scripts:
+        return None
+    if "kana" in scripts and scripts <= {"kana", "han"}:
+        return "ja"
+    if len(scripts) != 1:
+        return None
+    script = scripts.pop()
+    if script in _SINGLE_LANGUAGE_SCRIPTS:
+        return _SINGLE_LANGUAGE_SCRIPTS[script]
+    if script == "cyrillic":
+        letters = set(text)
+        if letters & _UKRAINIAN_LETTERS:
+            return "uk"
+        if letters & _MACEDONIAN_LETTERS:
+            return "mk"
+        # На коротких словах модель путает ru/bg/mk/uk; аудитория бота в основном русскоязычная
+        return "ru"
+    if script == "latin":
+        markers = {_LATIN_MARKERS[char] for char in text if char in _LATIN_MARKERS}
+        if len(markers) == 1:
+            return markers.pop()
+    return None
+
+
+def warm_up() -> DetectorFactory:
+    """Load langdetect's n-gram profiles once and keep the factory for reuse."""
+    global _factory
+    if _factory is None:
+        factory = DetectorFactory()
+        factory.load_profile(PROFILES_DIRECTORY)
+        _factory = factory
+    return _factory
+
+
+def _detect_with_model(text: str) -> str:
+    detector = warm_up().create()
+    detector.append(text)
+    return detector.detect()
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+@lru_cache(maxsize=LANG_CACHE_SIZE)
+def _detect_normalized(text: str) -> str:
+    language = detect_script_language(text)
+    if language:
+        return language
     try:
-        return detect(text)
+        return _detect_with_model(text)
     except LangDetectException:
         return ""
+
+
+def detect_language(text: str) -> str:
+    return _detect_normalized(normalize_text(text))
+
+
+def detect_languages(texts: Iterable[str]) -> list[str]:
+    """Detect a batch of texts, running each distinct normalized text only once."""
+    normalized = [normalize_text(text) for text in texts]
+    results = {text: _detect_normalized(text) for text in set(normalized)}
+    return [results[text] for text in normalized]
+
+
+def cache_info():
+    return _detect_normalized.cache_info()
@@ -0,0 +1,153 @@
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from datetime import timedelta
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy import delete, func, or_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import LEADER_LEASE_TTL, LEADER_RENEW_INTERVAL
+from app.crud import dialect_insert
+from app.db import SessionLocal
+from app.models import LeaderLease
+
+logger = logging.getLogger(__name__)
+
+Callback = Callable[[], Awaitable[None]]
+
+
+def _db_now(db: AsyncSession, seconds: float = 0):
+    # Сроки аренды считаем по часам базы: часы экземпляров могут расходиться на секунды.
+    # Столбец без часового пояса, поэтому время в UTC, как и datetime.utcnow() в остальном коде
+    if db.get_bind().dialect.name == "postgresql":
+        return func.timezone("UTC", func.now()) + timedelta(seconds=seconds)
+    return func.datetime("now", f"{seconds:+f} seconds")
+
+
+class LeaderElector:
+    """Lease-row leader election; works the same on PostgreSQL and a shared SQLite file.
+
+    The holder renews `expires_at` every `renew_interval` seconds. Any other
+    instance takes the row over once the lease has expired, so a crashed
+    leader is replaced within `ttl` seconds. Expiry is judged by the
+    database clock, and on_elected runs as its own task, so a slow
+    setWebhook or catch-up does not hold back renewal.
+    """
+
+    def __init__(
+        self,
+        name: str = "main",
+        on_elected: Optional[Callback] = None,
+        on_demoted: Optional[Callback] = None,
+        on_renewed: Optional[Callback] = None,
+        ttl: float = LEADER_LEASE_TTL,
+        renew_interval: float = LEADER_RENEW_INTERVAL,
+    ):
+        self.name = name
+        self.identity = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.on_renewed = on_renewed
+        self.ttl = ttl
+        self.renew_interval = renew_interval
+        self.is_leader = False
+        self._task: Optional[asyncio.Task] = None
+        self._elected: Optional[asyncio.Task] = None
+
+    async def try_acquire(self) -> bool:
+        async with SessionLocal() as db:
+            now = _db_now(db)
+            expires_at = _db_now(db, self.ttl)
+            result = await db.execute(
+                update(LeaderLease)
+                .where(LeaderLease.name == self.name)
+                .where(or_(LeaderLease.holder == self.identity, LeaderLease.expires_at < now))
+                .values(holder=self.identity, expires_at=expires_at)
+            )
+            if result.rowcount == 0:
+                # Строки ещё нет (первый запуск) или аренда чужая и действующая
+                result = await db.execute(
+                    dialect_insert(db, LeaderLease)
+                    .values(name=self.name, holder=self.identity, expires_at=expires_at)
+                    .on_conflict_do_nothing(index_elements=[LeaderLease.name])
+                )
+            await db.commit()
+            return result.rowcount == 1
+
+    async def release(self):
+        async with SessionLocal() as db:
+            await db.execute(
+                delete(LeaderLease).where(LeaderLease.name == self.name, LeaderLease.holder == self.identity)
+            )
+            await db.commit()
+
+    async def _step(self):
+        try:
+            acquired = await self.try_acquire()
+        except Exception as e:
+            # Без связи с БД нельзя подтвердить аренду: безопаснее перестать быть лидером
+            logger.warning("Leader lease check failed: %s", e)
+            acquired = False
+        if acquired and not self.is_leader:
+            self.is_leader = True
+            logger.info("Became leader as %s", self.identity, extra={"event": "leader_elected"})
+            self._elected = asyncio.create_task(self._call(self.on_elected))
+        elif not acquired and self.is_leader:
+            self.is_leader = False
+            logger.warning("Lost leadership as %s", self.identity, extra={"event": "leader_demoted"})
+            await self._cancel_elected()
+            await self._call(self.on_demoted)
+        elif acquired:
+            await self._call(self.on_renewed)
+
+    @staticmethod
+    async def _call(callback: Optional[Callback]):
+        if callback is None:
+            return
+        try:
+            await callback()
+        except Exception as e:
+            logger.error("Leader callback %s failed: %s", getattr(callback, "__name__", callback), e, exc_info=True)
+
+    async def _cancel_elected(self):
+        # Аренду уже держит другой экземпляр: недоделанные задания лидера он выполнит сам
+        if self._elected is not None:
+            self._elected.cancel()
+            await asyncio.gather(self._elected, return_exceptions=True)
+            self._elected = None
+
+    async def _run(self, first_step: bool = False):
+        if first_step:
+            await self._step()
+        while True:
+            await asyncio.sleep(self.renew_interval)
+            await self._step()
+
+    async def start(self, wait: bool = True):
+        # Первая попытка сразу: одиночный экземпляр становится лидером ещё до конца startup.
+        # С wait=False она идёт в фоне, и startup не ждёт setWebhook и догоняющих заданий
+        if wait:
+            await self._step()
+            self._task = asyncio.create_task(self._run())
+            if self._elected is not None:
+                # Аренда продлевается в фоне, пока startup ждёт setWebhook и догоняющие задания
+                await asyncio.wait({self._elected})
+        else:
+            self._task = asyncio.create_task(self._run(first_step=True))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self._cancel_elected()
+        if self.is_leader:
+            self.is_leader = False
+            await self._call(self.on_demoted)
+            try:
+                await self.release()
+            except Exception as e:
+                logger.warning("Could not release leader lease: %s", e)
@@ -0,0 +1,125 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from typing import Optional
+
+from app.config import APP_ENV, LOG_FORMAT, LOG_LEVEL, LOG_LEVELS, LOG_SAMPLING
+
+# Значения по умолчанию для окружений; LOG_LEVEL и LOG_LEVELS их переопределяют
+ENV_DEFAULTS = {
+    "development": {"level": "DEBUG", "levels": {}},
+    "production": {"level": "INFO", "levels": {"httpx": "WARNING", "apscheduler": "WARNING", "telegram": "WARNING"}},
+}
+
+# Стандартные атрибуты LogRecord; всё остальное пришло через extra= и попадает в JSON
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Стандартный QueueHandler форматирует сообщение в вызывающем потоке; откладываем это до listener'а
+        return record
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps only a fraction of records below WARNING for the configured loggers."""
+
+    def __init__(self, rates: dict[str, float]):
+        super().__init__()
+        self.rates = rates
+
+    def _rate(self, name: str) -> float:
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition(".")[0]
+        return 1.0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+
+def parse_mapping(raw: str) -> dict[str, str]:
+    """`"app.bot=DEBUG,httpx=WARNING"` -> {"app.bot": "DEBUG", "httpx": "WARNING"}."""
+    mapping = {}
+    for item in raw.split(","):
+        name, sep, value = item.strip().partition("=")
+        if sep and name:
+            mapping[name.strip()] = value.strip()
+    return mapping
+
+
+def configure_logging(
+    env: str = APP_ENV,
+    level: str = LOG_LEVEL,
+    levels: str = LOG_LEVELS,
+    fmt: str = LOG_FORMAT,
+    sampling: str = LOG_SAMPLING,
+    stream=None,
+):
+    """Route all logging through a QueueHandler; formatting and I/O happen in the listener thread."""
+    global _listener
+    defaults = ENV_DEFAULTS.get(env, ENV_DEFAULTS["production"])
+    root_level = (level or defaults["level"]).upper()
+    module_levels = {**defaults["levels"], **parse_mapping(levels)}
+
+    if fmt == "json":
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(formatter)
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(log_queue)
+    rates = {name: float(rate) for name, rate in parse_mapping(sampling).items()}
+    if rates:
+        queue_handler.addFilter(SamplingFilter(rates))
+
+    stop_logging()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(root_level)
+    for name, module_level in module_levels.items():
+        logging.getLogger(name).setLevel(module_level.upper())
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+
+
+def stop_logging():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
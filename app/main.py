@@ -1,23 +1,104 @@
+import time
+
+# Время импорта — заметная часть холодного старта, поэтому засекаем его тоже
+_import_started = time.perf_counter()
+
+import asyncio
 import logging
+from app.logging_setup import configure_logging
+
+# Настраиваем логирование до импорта остальных модулей приложения
+configure_logging()
+
 from fastapi import FastAPI, Request, HTTPException
+from fastapi.responses import JSONResponse, Response
 from telegram.ext import Application
 from telegram import Update as TelegramUpdate
-from app.bot import setup_bot
-from app.db import get_db, init_db
-from app.config import TELEGRAM_TOKEN, WEBHOOK_URL
-from sqlalchemy.orm import Session
+from app.bot import ALLOWED_UPDATES, setup_bot
+from app.db import init_db, close_db, ping_db
+from app import metrics
+from app.sprint_cache import active_sprint_cache
+from app.leader import LeaderElector
+from app.scheduler import pause_scheduler, poll_jobs, resume_scheduler, start_scheduler, stop_scheduler
+from app.validation import validation_pipeline
+from app.config import (
+    TELEGRAM_TOKEN,
+    WEBHOOK_URL,
+    TELEGRAM_API_URL,
+    WEBHOOK_SECRET,
+    HEALTH_CHECK_TIMEOUT,
+    HEALTH_BOT_CHECK_INTERVAL,
+    UPDATE_LEDGER_ENABLED,
+    FAST_BOOT,
+    THROTTLE_ENABLED,
+)
+from app.update_queue import UpdateDispatcher, REJECTED
+from app.update_ledger import update_ledger
+from app.submission_buffer import submission_buffer
+from app.broadcast import stop_broadcasts
+from app.throttle import ALLOWED, MUTED, MUTED_MESSAGE, throttle, update_user_id
+from app.ingest import OK_BODY, ignored_reason, loads
 
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
+IMPORT_SECONDS = time.perf_counter() - _import_started
 
 app = FastAPI()
 
+def start_update_processing(telegram_app: Application):
+    async def process(data: dict):
+        update = TelegramUpdate.de_json(data, telegram_app.bot)
+        await telegram_app.process_update(update)
+
+    dispatcher = UpdateDispatcher(process, claim=update_ledger.claim if UPDATE_LEDGER_ENABLED else None)
+    dispatcher.start()
+    app.state.telegram_app = telegram_app
+    app.state.dispatcher = dispatcher
+    return dispatcher
+
+async def ensure_webhook(bot) -> bool:
+    # setWebhook на каждом старте лишний: вызов ограничен по частоте и сбрасывает соединения.
+    # 403 в last_error_message значит, что Telegram шлёт старый секрет — тогда ставим заново
+    info = await bot.get_webhook_info()
+    if (
+        info.url == WEBHOOK_URL
+        and "403" not in (info.last_error_message or "")
+        and set(info.allowed_updates or ()) == set(ALLOWED_UPDATES)
+    ):
+        logger.debug("Webhook is already set to %s", WEBHOOK_URL)
+        return False
+    logger.debug("Setting webhook to %s", WEBHOOK_URL)
+    await bot.set_webhook(WEBHOOK_URL, secret_token=WEBHOOK_SECRET or None, allowed_updates=list(ALLOWED_UPDATES))
+    logger.debug("Webhook set successfully")
+    return True
+
+class StartupTimer:
+    def __init__(self):
+        self.phases = {"import": IMPORT_SECONDS}
+        self._started = self._last = time.perf_counter()
+
+    def mark(self, phase: str):
+        now = time.perf_counter()
+        self.phases[phase] = now - self._last
+        self._last = now
+
+    def finish(self):
+        total = time.perf_counter() - self._started
+        for phase, seconds in self.phases.items():
+            metrics.STARTUP_SECONDS.labels(phase).set(seconds)
+        metrics.STARTUP_SECONDS.labels("total").set(total)
+        logger.info(
+            "Startup finished in %.0f ms (%s)", total * 1000,
+            ", ".join(f"{phase} {seconds * 1000:.0f} ms" for phase, seconds in self.phases.items()),
+            extra={"event": "startup", "fast_boot": FAST_BOOT, "startup_ms": round(total * 1000)},
+        )
+        return {phase: round(seconds * 1000) for phase, seconds in self.phases.items()} | {"total": round(total * 1000)}
+
 @app.on_event("startup")
 async def startup_event():
     logger.debug("Starting up FastAPI application")
     try:
-        logger.debug(f"TELEGRAM_TOKEN: {'Set' if TELEGRAM_TOKEN else 'Not set'}")
-        logger.debug(f"WEBHOOK_URL: {WEBHOOK_URL}")
+        logger.debug("TELEGRAM_TOKEN: %s", 'Set' if TELEGRAM_TOKEN else 'Not set')
+        logger.debug("WEBHOOK_URL: %s", WEBHOOK_URL)
         if not TELEGRAM_TOKEN:
             logger.error("TELEGRAM_TOKEN is not set")
             raise ValueError("TELEGRAM_TOKEN is not set")
@@ -25,61 +106,174 @@ async def startup_event():
             logger.error("WEBHOOK_URL is not set")
             raise ValueError("WEBHOOK_URL is not set")
 
+        timer = StartupTimer()
         logger.debug("Initializing database")
-        init_db()
+        await init_db()
         logger.debug("Database initialized")
+        timer.mark("database")
+        await active_sprint_cache.refresh()
+        await active_sprint_cache.start_listener()
+        timer.mark("sprint_cache")
 
-        logger.debug("Initializing Telegram bot application")
-        telegram_app = Application.builder().token(TELEGRAM_TOKEN).build()
+        if not FAST_BOOT:
+            logger.debug("Starting validation pipeline")
+            await validation_pipeline.start()
+            timer.mark("validation")
 
-        logger.debug("Initializing database session")
-        with next(get_db()) as db:
-            logger.debug("Database session initialized")
-            logger.debug("Setting up bot handlers")
-            setup_bot(telegram_app, db)
+        logger.debug("Initializing Telegram bot application")
+        # Размер пула как у PTB по умолчанию: рассылки и воркеры апдейтов шлют запросы параллельно
+        builder = Application.builder().token(TELEGRAM_TOKEN).request(metrics.InstrumentedRequest(connection_pool_size=256))
+        if TELEGRAM_API_URL:
+            logger.debug("Using Bot API server at %s", TELEGRAM_API_URL)
+            builder = builder.base_url(f"{TELEGRAM_API_URL}/bot").base_file_url(f"{TELEGRAM_API_URL}/file/bot")
+        telegram_app = builder.build()
 
-        logger.debug(f"Setting webhook to {WEBHOOK_URL}")
-        await telegram_app.bot.setWebhook(WEBHOOK_URL)
-        logger.debug("Webhook set successfully")
+        logger.debug("Setting up bot handlers")
+        setup_bot(telegram_app)
 
         logger.debug("Starting Telegram bot polling")
         await telegram_app.initialize()
-        app.state.telegram_app = telegram_app
+        start_update_processing(telegram_app)
+        start_scheduler(telegram_app)
+        timer.mark("telegram")
+
+        # /webhook обслуживает любой экземпляр, а webhook и задания планировщика — только лидер
+        webhook_pending = False
+
+        async def sync_webhook():
+            nonlocal webhook_pending
+            try:
+                await ensure_webhook(telegram_app.bot)
+                webhook_pending = False
+            except Exception as e:
+                # Сбой Telegram не должен оставлять лидера без планировщика: повторим при продлении аренды
+                webhook_pending = True
+                logger.warning("Failed to set the webhook, retrying on the next lease renewal: %s", e)
+
+        async def on_elected():
+            await sync_webhook()
+            await resume_scheduler()
+
+        async def on_renewed():
+            if webhook_pending:
+                await sync_webhook()
+            await poll_jobs()
+
+        app.state.leader = LeaderElector(on_elected=on_elected, on_demoted=pause_scheduler, on_renewed=on_renewed)
+        await app.state.leader.start(wait=not FAST_BOOT)
+        timer.mark("leader")
+        app.state.startup_ms = timer.finish()
+        if FAST_BOOT:
+            # Словари мата и профили langdetect грузятся уже после старта, чтобы не отнимать
+            # процессор у него; первые проверки дождутся прогрева
+            validation_pipeline.start_in_background()
         logger.debug("Startup completed successfully")
     except Exception as e:
-        logger.error(f"Error during startup: {e}", exc_info=True)
+        logger.error("Error during startup: %s", e, exc_info=True)
         raise
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.debug("Shutting down FastAPI application")
     try:
+        if hasattr(app.state, "leader"):
+            await app.state.leader.stop()
+        stop_scheduler()
+        if hasattr(app.state, "dispatcher"):
+            logger.debug("Draining update queue")
+            await app.state.dispatcher.stop()
+        await submission_buffer.stop()
+        # Рассылкам нужен бот, поэтому ждём их до его остановки
+        await stop_broadcasts()
         if hasattr(app.state, "telegram_app"):
             logger.debug("Stopping Telegram bot")
-            await app.state.telegram_app.stop()
+            if app.state.telegram_app.running:
+                await app.state.telegram_app.stop()
             await app.state.telegram_app.shutdown()
+        await validation_pipeline.stop()
+        await active_sprint_cache.stop_listener()
+        await close_db()
         logger.debug("Shutdown completed")
     except Exception as e:
-        logger.error(f"Error during shutdown: {e}", exc_info=True)
+        logger.error("Error during shutdown: %s", e, exc_info=True)
 
 @app.post("/webhook")
 async def webhook(request: Request):
-    logger.debug("Received webhook request")
+    if WEBHOOK_SECRET and request.headers.get("X-Telegram-Bot-Api-Secret-Token") != WEBHOOK_SECRET:
+        raise HTTPException(status_code=403, detail="Invalid secret token")
     try:
-        telegram_app = app.state.telegram_app
-        json_data = await request.json()
-        logger.debug(f"Webhook update: {json_data}")
-        update = TelegramUpdate.de_json(json_data, telegram_app.bot)
-        logger.debug(f"Parsed Telegram update: {update.to_dict()}")
-        logger.debug(f"Update contains command: {update.message.text.startswith('/') if update.message else False}")
-        await telegram_app.process_update(update)
-        logger.debug("Webhook processed successfully")
-        return {"status": "ok"}
+        # Тело разбирается один раз; telegram.Update строится уже в воркере
+        json_data = loads(await request.body())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON")
+    if not isinstance(json_data, dict) or not isinstance(json_data.get("update_id"), int):
+        raise HTTPException(status_code=400, detail="Not a Telegram update")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Webhook update %s", json_data["update_id"], extra={"update": json_data})
+    reason = ignored_reason(json_data)
+    if reason is not None:
+        metrics.IGNORED_UPDATES.labels(reason).inc()
+        return Response(OK_BODY, media_type="application/json")
+    if THROTTLE_ENABLED:
+        # Флуд отсекаем до очереди: ни журнала апдейтов, ни обработчиков, ни запросов к БД
+        user_id = update_user_id(json_data)
+        verdict = throttle.check(user_id)
+        if verdict != ALLOWED:
+            if verdict == MUTED:
+                task = asyncio.create_task(notify_muted(user_id))
+                _notify_tasks.add(task)
+                task.add_done_callback(_notify_tasks.discard)
+            return Response(OK_BODY, media_type="application/json")
+    # Отвечаем сразу, обработка идёт в воркерах; 503 заставит Telegram повторить доставку позже
+    status = app.state.dispatcher.submit(json_data)
+    if status == REJECTED:
+        raise HTTPException(status_code=503, detail="Update queue is full")
+    return Response(OK_BODY, media_type="application/json")
+
+_notify_tasks: set[asyncio.Task] = set()
+
+async def notify_muted(user_id: int):
+    # Одно сообщение на весь мут; остальные апдейты отбрасываются молча
+    seconds = round(throttle.muted_for(user_id))
+    try:
+        await app.state.telegram_app.bot.send_message(chat_id=user_id, text=MUTED_MESSAGE.format(seconds=seconds))
+    except Exception as e:
+        logger.debug("Could not notify muted user %s: %s", user_id, e)
+
+async def check_bot() -> None:
+    # getMe ходит в Telegram, поэтому успешный ответ кэшируем, чтобы частые пробы не тратили лимиты
+    now = time.monotonic()
+    if now - getattr(app.state, "bot_checked_at", float("-inf")) < HEALTH_BOT_CHECK_INTERVAL:
+        return
+    await app.state.telegram_app.bot.get_me()
+    app.state.bot_checked_at = now
+
+async def run_check(check) -> str:
+    try:
+        await asyncio.wait_for(check(), HEALTH_CHECK_TIMEOUT)
+        return "ok"
     except Exception as e:
-        logger.error(f"Error processing webhook: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=str(e))
+        logger.warning("Health check %s failed: %s", check.__name__, e)
+        return f"error: {type(e).__name__}"
 
 @app.get("/health")
 async def health_check():
-    logger.debug("Health check requested")
-    return {"status": "healthy"}
+    checks = {"database": await run_check(ping_db)}
+    if hasattr(app.state, "telegram_app"):
+        checks["bot"] = await run_check(check_bot)
+    else:
+        checks["bot"] = "not started"
+    ready = all(result == "ok" for result in checks.values())
+    response = {"status": "healthy" if ready else "unhealthy", "checks": checks}
+    if hasattr(app.state, "leader"):
+        response["leader"] = app.state.leader.is_leader
+    if hasattr(app.state, "dispatcher"):
+        response["update_queue"] = app.state.dispatcher.snapshot()
+    if hasattr(app.state, "startup_ms"):
+        response["startup_ms"] = app.state.startup_ms
+    return JSONResponse(response, status_code=200 if ready else 503)
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    body, content_type = metrics.render(getattr(app.state, "dispatcher", None))
+    return Response(content=body, media_type=content_type)
@@ -0,0 +1,104 @@
+import time
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from telegram.request import HTTPXRequest
+
+# Бакеты под задержки бота: от единиц миллисекунд до десятков секунд (выгрузки, рассылки)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+FAST_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+
+HANDLER_LATENCY = Histogram("bot_handler_seconds", "Time spent in a bot handler", ["handler"], buckets=LATENCY_BUCKETS)
+HANDLER_ERRORS = Counter("bot_handler_errors_total", "Exceptions raised by bot handlers", ["handler"])
+
+DB_QUERIES = Counter("db_queries_total", "SQL statements executed")
+DB_QUERY_SECONDS = Histogram("db_query_seconds", "SQL statement execution time", buckets=FAST_BUCKETS + (0.5, 1, 2.5))
+
+BOT_API_SECONDS = Histogram("bot_api_seconds", "Bot API request latency", ["method"], buckets=LATENCY_BUCKETS)
+BOT_API_ERRORS = Counter("bot_api_errors_total", "Bot API requests that failed or returned a non-200 status", ["method"])
+
+VALIDATION_STAGE_SECONDS = Histogram(
+    "validation_stage_seconds", "Per-text time of input validation stages", ["stage"], buckets=FAST_BUCKETS
+)
+VALIDATION_BATCH_SIZE = Histogram("validation_batch_size", "Texts per validation batch", buckets=(1, 2, 4, 8, 16, 32, 64))
+VALIDATION_TIMEOUTS = Counter("validation_timeouts_total", "Validations answered with the busy message")
+
+UPDATE_QUEUE_DEPTH = Gauge("update_queue_depth", "Updates waiting in the dispatcher queue")
+# Counter: prometheus_client сам добавляет суффикс _total, наружу метрика так и называется updates_total
+UPDATES_TOTAL = Counter("updates", "Updates by dispatcher outcome", ["outcome"])
+_UPDATE_OUTCOMES = ("enqueued", "processed", "failed", "duplicates", "rejected")
+_reported_updates = dict.fromkeys(_UPDATE_OUTCOMES, 0)
+for _outcome in _UPDATE_OUTCOMES:
+    UPDATES_TOTAL.labels(_outcome)
+
+IGNORED_UPDATES = Counter("ignored_updates_total", "Webhook updates dropped because no handler reacts to them", ["kind"])
+THROTTLED_UPDATES = Counter("throttled_updates_total", "Updates dropped by per-user flood control", ["reason"])
+THROTTLE_MUTES = Counter("throttle_mutes_total", "Users temporarily muted for flooding")
+
+SUBMISSION_BATCH_SIZE = Histogram(
+    "submission_batch_size", "Word submissions written per group commit", buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500)
+)
+
+STARTUP_SECONDS = Gauge("startup_seconds", "Time spent in each startup phase of this process", ["phase"])
+
+
+def instrument_engine(engine: AsyncEngine):
+    """Count and time every statement executed through `engine`."""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        DB_QUERIES.inc()
+        DB_QUERY_SECONDS.observe(time.perf_counter() - started)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(context):
+        # Упавший запрос не доходит до after_cursor_execute: не даём стеку расти
+        started = context.connection.info.get("query_started") if context.connection is not None else None
+        if started:
+            started.pop()
+
+
+def observe_validation(timings: list[dict]):
+    """Record per-stage timings collected by validate_batch (possibly in another process)."""
+    VALIDATION_BATCH_SIZE.observe(len(timings))
+    for stages in timings:
+        for stage, seconds in stages.items():
+            VALIDATION_STAGE_SECONDS.labels(stage).observe(seconds)
+
+
+class InstrumentedRequest(HTTPXRequest):
+    """HTTPXRequest that records latency and failures per Bot API method."""
+
+    async def do_request(self, url: str, method: str, *args, **kwargs):
+        api_method = url.rsplit("/", 1)[-1]
+        started = time.perf_counter()
+        try:
+            code, payload = await super().do_request(url, method, *args, **kwargs)
+        except Exception:
+            BOT_API_ERRORS.labels(api_method).inc()
+            raise
+        finally:
+            BOT_API_SECONDS.labels(api_method).observe(time.perf_counter() - started)
+        if code != 200:
+            BOT_API_ERRORS.labels(api_method).inc()
+        return code, payload
+
+
+def render(dispatcher=None) -> tuple[bytes, str]:
+    if dispatcher is not None:
+        snapshot = dispatcher.snapshot()
+        UPDATE_QUEUE_DEPTH.set(snapshot["depth"])
+        for outcome in _UPDATE_OUTCOMES:
+            # Счётчики диспетчера растут сами по себе: переносим в Counter прирост с прошлого опроса
+            value = snapshot[outcome]
+            if value > _reported_updates[outcome]:
+                UPDATES_TOTAL.labels(outcome).inc(value - _reported_updates[outcome])
+            _reported_updates[outcome] = value
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Enum
+from sqlalchemy import BigInteger, Boolean, Column, Integer, String, Text, DateTime, Enum, ForeignKey, Index, false
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
 import enum
@@ -11,9 +11,16 @@ class SprintStatus(enum.Enum):
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # text_pattern_ops позволяет PostgreSQL использовать индекс для LIKE 'префикс%'
+        Index("ix_users_username_prefix", "username", postgresql_ops={"username": "text_pattern_ops"}),
+    )
     id = Column(Integer, primary_key=True)
     username = Column(String, nullable=True)
-    joined_at = Column(DateTime, default=datetime.utcnow)
+    joined_at = Column(DateTime, default=datetime.utcnow, index=True)
+    # Заблокировавшие бота пропускаются в рассылках, пока снова не напишут /start
+    is_blocked = Column(Boolean, nullable=False, default=False, server_default=false())
+    last_seen = Column(DateTime, nullable=True)
 
 class Sprint(Base):
     __tablename__ = "sprints"
@@ -22,13 +29,60 @@ class Sprint(Base):
     theme = Column(String, nullable=False)
     start_date = Column(DateTime, default=datetime.utcnow)
     end_date = Column(DateTime)
-    status = Column(Enum(SprintStatus), default=SprintStatus.active)
+    status = Column(Enum(SprintStatus), default=SprintStatus.active, index=True)
 
 class Word(Base):
     __tablename__ = "words"
+    __table_args__ = (
+        # Одна заявка на пользователя в спринте; индекс же обслуживает поиск по user_id
+        Index("uq_words_user_sprint", "user_id", "sprint_id", unique=True),
+        Index("ix_words_sprint_submitted", "sprint_id", "submitted_at"),
+        Index("ix_words_submitted_at", "submitted_at"),
+        # Выгрузка идёт по спринту в порядке id: без этого индекса — сортировка всего спринта
+        Index("ix_words_sprint_id_id", "sprint_id", "id"),
+    )
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, nullable=False)
-    sprint_id = Column(Integer, nullable=False)
+    sprint_id = Column(Integer, ForeignKey("sprints.id", name="fk_words_sprint_id"), nullable=False)
     words = Column(String, nullable=False)
     language = Column(String, nullable=False)
     submitted_at = Column(DateTime, default=datetime.utcnow)
+
+class WordArchive(Base):
+    # Слова старых спринтов, вынесенные из words командой python -m app.partitions archive
+    __tablename__ = "words_archive"
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    user_id = Column(Integer, nullable=False)
+    sprint_id = Column(Integer, nullable=False, index=True)
+    words = Column(String, nullable=False)
+    language = Column(String, nullable=False)
+    submitted_at = Column(DateTime)
+    archived_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+class LeaderLease(Base):
+    # Аренда роли лидера: кто из экземпляров ставит webhook и выполняет задания планировщика
+    __tablename__ = "leader_leases"
+    name = Column(String, primary_key=True)
+    holder = Column(String, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+class SharedVersion(Base):
+    # Номер версии общего для всех воркеров ресурса (словари мата): воркер сверяет его со своей копией
+    __tablename__ = "shared_versions"
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+class SprintStatsSnapshot(Base):
+    # Свёрнутые счётчики /sprint_stats (JSON): следующий подсчёт в любом воркере дочитывает только строки после last_word_id
+    __tablename__ = "sprint_stats"
+    sprint_id = Column(Integer, primary_key=True, autoincrement=False)
+    last_word_id = Column(Integer, nullable=False)
+    state = Column(Text, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+class ProcessedUpdate(Base):
+    # update_id уже принятых апдейтов: повторная доставка от Telegram отбрасывается до обработчиков
+    __tablename__ = "processed_updates"
+    update_id = Column(BigInteger, primary_key=True, autoincrement=False)
+    received_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
@@ -0,0 +1,173 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+from urllib.parse import unquote
+
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+
+from app.config import LIST_PAGE_SIZE
+from app.models import Sprint, SprintStatus, User
+
+USERS = "lu"
+SPRINTS = "ls"
+NEXT = "n"
+PREV = "p"
+# Telegram ограничивает callback_data 64 байтами
+_CALLBACK_DATA_LIMIT = 64
+_MAX_THEME_LENGTH = 80
+# Место под префикс в байтах UTF-8 (уже с экранированием): "lu|n" + курсор до 19 цифр
+# + "|s:ГГГГ-ММ-ДД,p:" оставляют из 64 байт 25, так что callback_data никогда не обрезается
+_MAX_PREFIX_BYTES = 24
+# Разделители callback_data и сам символ экранирования внутри значений фильтров
+_ESCAPES = {"%": "%25", ",": "%2C", ":": "%3A", "|": "%7C"}
+
+
+@dataclass
+class Page:
+    rows: list
+    has_prev: bool
+    has_next: bool
+
+    @property
+    def first_id(self) -> int:
+        return self.rows[0].id
+
+    @property
+    def last_id(self) -> int:
+        return self.rows[-1].id
+
+
+async def fetch_page(db: AsyncSession, query: Select, id_column, cursor: int, direction: str, page_size: int = LIST_PAGE_SIZE) -> Page:
+    """Keyset page after (NEXT) or before (PREV) `cursor`; cost does not depend on the page number."""
+    if direction == PREV:
+        rows = (await db.execute(query.where(id_column < cursor).order_by(id_column.desc()).limit(page_size + 1))).all()
+        has_prev = len(rows) > page_size
+        rows = list(reversed(rows[:page_size]))
+        return Page(rows=rows, has_prev=has_prev, has_next=True)
+    rows = (await db.execute(query.where(id_column > cursor).order_by(id_column).limit(page_size + 1))).all()
+    return Page(rows=rows[:page_size], has_prev=cursor > 0, has_next=len(rows) > page_size)
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _escape_value(value: str) -> str:
+    return "".join(_ESCAPES.get(char, char) for char in value)
+
+
+def _truncate_prefix(prefix: str) -> str:
+    # Обрезаем по символам, считая байты экранированного значения: ни UTF-8, ни %XX не рвутся
+    size = 0
+    for index, char in enumerate(prefix):
+        size += len(_escape_value(char).encode())
+        if size > _MAX_PREFIX_BYTES:
+            return prefix[:index]
+    return prefix
+
+
+def _parse_since(value: str) -> str:
+    """ГГГГ-ММ-ДД in ISO form; ValueError for anything else."""
+    return datetime.strptime(value, "%Y-%m-%d").date().isoformat()
+
+
+def parse_user_filters(args: list[str]) -> dict:
+    """`/list_users [префикс] [since:ГГГГ-ММ-ДД]` -> {"prefix": ..., "since": ...}."""
+    filters = {}
+    for arg in args:
+        if arg.startswith("since:"):
+            filters["since"] = _parse_since(arg[len("since:"):])
+        else:
+            filters["prefix"] = _truncate_prefix(arg.lstrip("@"))
+    return filters
+
+
+def parse_sprint_filters(args: list[str]) -> dict:
+    """`/list_sprints [active|completed]`."""
+    filters = {}
+    for arg in args:
+        filters["status"] = SprintStatus(arg.lower()).value
+    return filters
+
+
+def users_query(filters: dict) -> Select:
+    query = select(User.id, User.username, User.joined_at)
+    if filters.get("prefix"):
+        query = query.where(User.username.like(_escape_like(filters["prefix"]) + "%", escape="\\"))
+    if filters.get("since"):
+        query = query.where(User.joined_at >= datetime.strptime(filters["since"], "%Y-%m-%d"))
+    return query
+
+
+def sprints_query(filters: dict) -> Select:
+    query = select(Sprint.id, Sprint.theme, Sprint.duration, Sprint.status)
+    if filters.get("status"):
+        query = query.where(Sprint.status == SprintStatus(filters["status"]))
+    return query
+
+
+async def fetch_users_page(db: AsyncSession, filters: dict, cursor: int = 0, direction: str = NEXT) -> Page:
+    return await fetch_page(db, users_query(filters), User.id, cursor, direction)
+
+
+async def fetch_sprints_page(db: AsyncSession, filters: dict, cursor: int = 0, direction: str = NEXT) -> Page:
+    return await fetch_page(db, sprints_query(filters), Sprint.id, cursor, direction)
+
+
+def encode_filters(filters: dict) -> str:
+    return ",".join(f"{key[0]}:{_escape_value(value)}" for key, value in sorted(filters.items()))
+
+
+def decode_filters(kind: str, raw: str) -> dict:
+    """Inverse of encode_filters; ValueError for filters no command could have produced."""
+    keys = {"p": "prefix", "s": "since"} if kind == USERS else {"s": "status"}
+    filters = {}
+    for item in raw.split(",") if raw else []:
+        key, _, value = item.partition(":")
+        if key in keys:
+            filters[keys[key]] = unquote(value)
+    if "since" in filters:
+        filters["since"] = _parse_since(filters["since"])
+    if "status" in filters:
+        filters["status"] = SprintStatus(filters["status"]).value
+    return filters
+
+
+def callback_data(kind: str, direction: str, cursor: int, filters: dict) -> str:
+    data = f"{kind}|{direction}{cursor}|{encode_filters(filters)}"
+    if len(data.encode()) > _CALLBACK_DATA_LIMIT:
+        # Обрезанные фильтры тихо поменяли бы выборку; parse_user_filters не даёт сюда дойти
+        raise ValueError(f"callback_data is longer than {_CALLBACK_DATA_LIMIT} bytes: {data!r}")
+    return data
+
+
+def parse_callback_data(data: str) -> tuple[str, str, int, dict]:
+    kind, position, raw_filters = data.split("|", 2)
+    return kind, position[0], int(position[1:]), decode_filters(kind, raw_filters)
+
+
+def page_keyboard(kind: str, page: Page, filters: dict) -> Optional[InlineKeyboardMarkup]:
+    buttons = []
+    if page.has_prev:
+        buttons.append(InlineKeyboardButton("◀️ Назад", callback_data=callback_data(kind, PREV, page.first_id, filters)))
+    if page.has_next:
+        buttons.append(InlineKeyboardButton("Вперёд ▶️", callback_data=callback_data(kind, NEXT, page.last_id, filters)))
+    return InlineKeyboardMarkup([buttons]) if buttons else None
+
+
+def render_users_page(page: Page) -> str:
+    lines = ["👥 Пользователи:"]
+    lines.extend(f"ID: {row.id}, Username: {row.username or 'none'}" for row in page.rows)
+    lines.append("\nНапиши /help для списка доступных команд")
+    return "\n".join(lines)
+
+
+def render_sprints_page(page: Page) -> str:
+    lines = ["📋 Список спринтов:"]
+    for row in page.rows:
+        theme = row.theme if len(row.theme) <= _MAX_THEME_LENGTH else row.theme[:_MAX_THEME_LENGTH - 1] + "…"
+        lines.append(f"ID: {row.id}, Тема: {theme}, Длительность: {row.duration} дней, Статус: {row.status.value}")
+    lines.append("\nНапиши /help для списка доступных команд")
+    return "\n".join(lines)
@@ -0,0 +1,217 @@
+"""Range partitioning and archiving of the words table.
+
+    python -m app.partitions status
+    python -m app.partitions partition      # PostgreSQL, one-off, locks words while copying
+    python -m app.partitions ensure         # create partitions for upcoming sprints
+    python -m app.partitions archive --before 120
+
+words is partitioned by sprint_id in ranges of WORDS_PARTITION_SIZE sprints
+plus a DEFAULT partition, so inserts never fail for a sprint without its own
+partition. archive detaches partitions whose sprints are all completed
+(the detached tables stay in the database as words_archive_sNNNNNN); on an
+unpartitioned table (and on SQLite) it moves the rows into words_archive.
+"""
+import argparse
+import asyncio
+import logging
+import re
+from datetime import datetime
+
+from sqlalchemy import delete, func, insert, literal, select, text
+
+from app.config import WORDS_PARTITION_SIZE
+from app.db import engine
+from app.models import Sprint, SprintStatus, Word, WordArchive
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PARTITION = "words_default"
+_WORDS_INDEXES = (
+    "CREATE UNIQUE INDEX uq_words_user_sprint ON words (user_id, sprint_id)",
+    "CREATE INDEX ix_words_sprint_submitted ON words (sprint_id, submitted_at)",
+    "CREATE INDEX ix_words_submitted_at ON words (submitted_at)",
+    "CREATE INDEX ix_words_sprint_id_id ON words (sprint_id, id)",
+)
+
+
+def partition_name(lower: int) -> str:
+    return f"words_s{lower:06d}"
+
+
+def partition_bounds(bound: str) -> tuple[int, int]:
+    # "FOR VALUES FROM (10) TO (20)" из pg_get_expr
+    lower, upper = re.findall(r"\((\d+)\)", bound)
+    return int(lower), int(upper)
+
+
+async def is_partitioned(conn) -> bool:
+    if conn.dialect.name != "postgresql":
+        return False
+    return bool(await conn.scalar(text(
+        "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('words')"
+    )))
+
+
+async def list_partitions(conn) -> list[tuple[str, str]]:
+    """(name, bound expression) of attached partitions."""
+    rows = await conn.execute(text(
+        "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = 'words'::regclass ORDER BY c.relname"
+    ))
+    return [tuple(row) for row in rows]
+
+
+async def _create_partitions(conn, upto: int, size: int, skip_failed: bool = False) -> list[str]:
+    existing = {name for name, _ in await list_partitions(conn)}
+    created = []
+    for lower in range(0, upto + 1, size):
+        name = partition_name(lower)
+        if name in existing:
+            continue
+        try:
+            # Своя точка сохранения на секцию: без неё ошибка оставит всю транзакцию прерванной
+            async with conn.begin_nested():
+                await conn.execute(text(
+                    f"CREATE TABLE {name} PARTITION OF words FOR VALUES FROM ({lower}) TO ({lower + size})"
+                ))
+        except Exception as e:
+            if not skip_failed:
+                raise
+            # Строки нужного диапазона уже лежат в DEFAULT: такую секцию создать нельзя
+            logger.error("Could not create words partition %s: %s", name, e)
+            continue
+        created.append(name)
+    return created
+
+
+async def partition_words(size: int = WORDS_PARTITION_SIZE):
+    """Convert words into a table partitioned by sprint_id (offline: writes to words wait for the copy)."""
+    async with engine.begin() as conn:
+        if conn.dialect.name != "postgresql":
+            raise RuntimeError("Partitioning needs PostgreSQL")
+        if await is_partitioned(conn):
+            logger.info("words is already partitioned")
+            return
+        await conn.execute(text("LOCK TABLE words IN ACCESS EXCLUSIVE MODE"))
+        max_sprint = await conn.scalar(select(func.max(Sprint.id))) or 0
+        # Ключ секционирования обязан входить в первичный ключ и уникальные индексы
+        await conn.execute(text(
+            "CREATE TABLE words_partitioned (LIKE words INCLUDING DEFAULTS) PARTITION BY RANGE (sprint_id)"
+        ))
+        await conn.execute(text("ALTER TABLE words_partitioned ADD PRIMARY KEY (id, sprint_id)"))
+        await conn.execute(text(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF words_partitioned DEFAULT"))
+        await conn.execute(text("ALTER SEQUENCE words_id_seq OWNED BY NONE"))
+        await conn.execute(text("ALTER TABLE words RENAME TO words_unpartitioned"))
+        await conn.execute(text("ALTER TABLE words_partitioned RENAME TO words"))
+        created = await _create_partitions(conn, max_sprint + size, size)
+        copied = (await conn.execute(text("INSERT INTO words SELECT * FROM words_unpartitioned"))).rowcount
+        await conn.execute(text("DROP TABLE words_unpartitioned"))
+        await conn.execute(text("ALTER SEQUENCE words_id_seq OWNED BY words.id"))
+        for statement in _WORDS_INDEXES:
+            await conn.execute(text(statement))
+        await conn.execute(text(
+            "ALTER TABLE words ADD CONSTRAINT fk_words_sprint_id FOREIGN KEY (sprint_id) REFERENCES sprints (id)"
+        ))
+    logger.info("words partitioned: %s rows copied into %s partitions", copied, len(created))
+
+
+async def ensure_partitions(size: int = WORDS_PARTITION_SIZE, ahead: int = 1) -> list[str]:
+    """Create partitions up to `ahead` ranges past the newest sprint; no-op when words is not partitioned."""
+    async with engine.begin() as conn:
+        if not await is_partitioned(conn):
+            return []
+        max_sprint = await conn.scalar(select(func.max(Sprint.id))) or 0
+        created = await _create_partitions(conn, max_sprint + ahead * size, size, skip_failed=True)
+    if created:
+        logger.info("Created words partitions: %s", ", ".join(created))
+    return created
+
+
+async def _completed_below(conn, before: int) -> list[int]:
+    return list((await conn.execute(
+        select(Sprint.id).where(Sprint.id < before, Sprint.status == SprintStatus.completed).order_by(Sprint.id)
+    )).scalars())
+
+
+async def archive_sprints(before: int) -> list[str]:
+    """Move words of completed sprints with id < `before` out of the working table."""
+    async with engine.connect() as conn:
+        partitioned = await is_partitioned(conn)
+        completed = await _completed_below(conn, before)
+    if partitioned:
+        return await _detach_partitions(before, set(completed))
+    archived = []
+    archived_at = datetime.utcnow()
+    for sprint_id in completed:
+        # Спринт за транзакцию: блокировки короткие, прерванный архив можно просто повторить
+        async with engine.begin() as conn:
+            columns = [Word.id, Word.user_id, Word.sprint_id, Word.words, Word.language, Word.submitted_at]
+            moved = (await conn.execute(
+                insert(WordArchive).from_select(
+                    ["id", "user_id", "sprint_id", "words", "language", "submitted_at", "archived_at"],
+                    select(*columns, literal(archived_at)).where(Word.sprint_id == sprint_id),
+                )
+            )).rowcount
+            if not moved:
+                continue
+            await conn.execute(delete(Word).where(Word.sprint_id == sprint_id))
+        archived.append(f"sprint {sprint_id}: {moved} rows")
+    return archived
+
+
+async def _detach_partitions(before: int, completed: set[int]) -> list[str]:
+    async with engine.begin() as conn:
+        sprint_ids = set((await conn.execute(select(Sprint.id).where(Sprint.id < before))).scalars())
+        detached = []
+        for name, bound in await list_partitions(conn):
+            if name == DEFAULT_PARTITION:
+                continue
+            lower, upper = partition_bounds(bound)
+            in_range = {sprint_id for sprint_id in sprint_ids if lower <= sprint_id < upper}
+            # Отцепляем только целиком старые секции, где все спринты уже закрыты
+            if upper > before or not in_range <= completed:
+                continue
+            await conn.execute(text(f"ALTER TABLE words DETACH PARTITION {name}"))
+            await conn.execute(text(f"ALTER TABLE {name} RENAME TO words_archive_{name[len('words_'):]}"))
+            detached.append(name)
+    return detached
+
+
+async def status() -> dict:
+    async with engine.connect() as conn:
+        partitioned = await is_partitioned(conn)
+        return {
+            "dialect": conn.dialect.name,
+            "partitioned": partitioned,
+            "partitions": await list_partitions(conn) if partitioned else [],
+            "words": await conn.scalar(select(func.count()).select_from(Word)),
+            "archived": await conn.scalar(select(func.count()).select_from(WordArchive)),
+        }
+
+
+async def main(args):
+    from app.db import init_db
+
+    await init_db()
+    try:
+        if args.action == "partition":
+            await partition_words(args.size)
+        elif args.action == "ensure":
+            print(await ensure_partitions(args.size) or "nothing to create")
+        elif args.action == "archive":
+            for line in await archive_sprints(args.before) or ["nothing to archive"]:
+                print(line)
+        print(await status())
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Partition and archive the words table")
+    parser.add_argument("action", choices=["status", "partition", "ensure", "archive"])
+    parser.add_argument("--size", type=int, default=WORDS_PARTITION_SIZE, help="sprints per partition")
+    parser.add_argument("--before", type=int, help="archive sprints with id below this")
+    args = parser.parse_args()
+    if args.action == "archive" and args.before is None:
+        parser.error("archive needs --before")
+    asyncio.run(main(args))
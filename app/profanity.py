@@ -0,0 +1,210 @@
+import logging
+import os
+import threading
+from collections import deque
+from typing import Iterable, Optional
+
+from app.config import PROFANITY_WORDLIST_PATH
+
+logger = logging.getLogger(__name__)
+
+WORDLIST_DIR = os.path.join(os.path.dirname(__file__), "wordlists")
+BUILTIN_WORDLISTS = ("ru.txt", "en.txt")
+
+# Похожие буквы и leetspeak, приводимые к письменности, которая преобладает в слове
+_TO_CYRILLIC = str.maketrans({
+    "a": "а", "b": "в", "c": "с", "e": "е", "h": "н", "k": "к", "m": "м", "n": "п",
+    "o": "о", "p": "р", "r": "г", "t": "т", "u": "и", "x": "х", "y": "у",
+    "0": "о", "3": "з", "4": "ч", "6": "б", "@": "а",
+})
+_TO_LATIN = str.maketrans({
+    "а": "a", "в": "b", "е": "e", "к": "k", "м": "m", "н": "h", "о": "o", "р": "p",
+    "с": "c", "т": "t", "у": "y", "х": "x", "і": "i",
+    "0": "o", "1": "i", "3": "e", "4": "a", "5": "s", "7": "t", "8": "b",
+    "@": "a", "$": "s", "!": "i", "|": "l",
+})
+# Символы, которые внутри слова считаются буквами (sh!t, @ss), а по краям — пунктуацией
+_LEET_CHARS = frozenset("@$!|")
+_EDGE_PUNCTUATION = "!|"
+
+
+def _is_cyrillic(char: str) -> bool:
+    return "Ѐ" <= char <= "ӿ"
+
+
+def _split_tokens(text: str) -> list[str]:
+    tokens = []
+    current = []
+    for char in text:
+        if char.isalnum() or char in _LEET_CHARS:
+            current.append(char)
+        elif current:
+            tokens.append("".join(current))
+            current = []
+    if current:
+        tokens.append("".join(current))
+    return [token for token in (t.strip(_EDGE_PUNCTUATION) for t in tokens) if token]
+
+
+def normalize(text: str) -> str:
+    """Lowercase, fold ё, homoglyphs and leetspeak into the word's script, join words with spaces."""
+    tokens = []
+    for token in _split_tokens(text.lower().replace("ё", "е")):
+        cyrillic = sum(1 for char in token if _is_cyrillic(char))
+        latin = sum(1 for char in token if "a" <= char <= "z")
+        if cyrillic and latin:
+            # Смешанное слово (cyкa, xуй) — проверяем оба прочтения
+            tokens.append(token.translate(_TO_CYRILLIC))
+            tokens.append(token.translate(_TO_LATIN))
+        elif cyrillic:
+            tokens.append(token.translate(_TO_CYRILLIC))
+        else:
+            tokens.append(token.translate(_TO_LATIN))
+    return " ".join(tokens)
+
+
+class ProfanityMatcher:
+    """Aho-Corasick automaton over normalized entries; search is linear in the input length.
+
+    An entry ending with "*" matches at the start of a word (a stem), any other
+    entry only matches a whole word or phrase. An entry starting with "!" is an
+    exception: a match whose word is that word (or starts with that stem) is
+    skipped, so "еб*" can stay broad without flagging "ебонит".
+    """
+
+    def __init__(self, entries: Iterable[str]):
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        # Для каждого узла: (длина совпадения, совпадение по основе, исходная запись)
+        self._output: list[list[tuple[int, bool, str]]] = [[]]
+        self.size = 0
+        exact_exceptions, stem_exceptions = set(), set()
+        for entry in entries:
+            if entry.startswith("!"):
+                word = normalize(entry[1:].rstrip("*"))
+                if word:
+                    (stem_exceptions if entry.endswith("*") else exact_exceptions).add(word)
+            else:
+                self._add(entry)
+        self._exact_exceptions = frozenset(exact_exceptions)
+        self._stem_exceptions = tuple(sorted(stem_exceptions))
+        self._build()
+
+    def _add(self, entry: str):
+        is_stem = entry.endswith("*")
+        word = normalize(entry.rstrip("*"))
+        if not word:
+            return
+        node = 0
+        for char in word:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            node = next_node
+        self._output[node].append((len(word), is_stem, entry))
+        self.size += 1
+
+    def _build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def find(self, text: str) -> Optional[str]:
+        """Return the first matching wordlist entry in already normalized text."""
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        node = 0
+        length = len(text)
+        for end, char in enumerate(text, start=1):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for match_length, is_stem, entry in output[node]:
+                start = end - match_length
+                if start > 0 and text[start - 1] != " ":
+                    continue
+                if not is_stem and end < length and text[end] != " ":
+                    continue
+                if self._is_exception(text, start):
+                    continue
+                return entry
+        return None
+
+    def _is_exception(self, text: str, start: int) -> bool:
+        if not self._exact_exceptions and not self._stem_exceptions:
+            return False
+        word_end = text.find(" ", start)
+        word = text[start:word_end] if word_end >= 0 else text[start:]
+        return word in self._exact_exceptions or word.startswith(self._stem_exceptions)
+
+
+def read_wordlist(path: str) -> list[str]:
+    entries = []
+    with open(path, encoding="utf-8") as wordlist:
+        for line in wordlist:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                entries.append(line)
+    return entries
+
+
+def wordlist_paths() -> list[str]:
+    paths = [os.path.join(WORDLIST_DIR, name) for name in BUILTIN_WORDLISTS]
+    if PROFANITY_WORDLIST_PATH:
+        paths.append(PROFANITY_WORDLIST_PATH)
+    return paths
+
+
+_matcher: Optional[ProfanityMatcher] = None
+_lock = threading.Lock()
+version = 0
+
+
+def load() -> ProfanityMatcher:
+    """Compile all wordlists; the new automaton replaces the old one atomically."""
+    global _matcher, version
+    entries = []
+    for path in wordlist_paths():
+        try:
+            entries.extend(read_wordlist(path))
+        except FileNotFoundError:
+            logger.error("Profanity wordlist not found: %s", path)
+    matcher = ProfanityMatcher(entries)
+    with _lock:
+        _matcher = matcher
+        version += 1
+    logger.debug("Profanity matcher compiled: %s entries, version %s", matcher.size, version)
+    return matcher
+
+
+def ensure_version(expected: int):
+    # Воркеры пула сверяют версию словарей с основным процессом и перечитывают их после /reload_profanity
+    global version
+    if expected and expected != version:
+        load()
+        version = expected
+
+
+def get_matcher() -> ProfanityMatcher:
+    matcher = _matcher
+    return matcher if matcher is not None else load()
+
+
+def find_profanity(text: str) -> Optional[str]:
+    return get_matcher().find(normalize(text))
+
+
+def contains_profanity(text: str) -> bool:
+    return find_profanity(text) is not None
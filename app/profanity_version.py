@@ -0,0 +1,88 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import select
+
+from app import profanity
+from app.config import PROFANITY_VERSION_CHECK_INTERVAL
+from app.crud import dialect_insert
+from app.db import SessionLocal
+from app.models import SharedVersion
+
+logger = logging.getLogger(__name__)
+
+
+class SharedProfanityVersion:
+    """Wordlist version shared by all workers through the shared_versions table.
+
+    /reload_profanity bumps the number in the database. Every worker reads it
+    at most once per `check_interval` seconds before validating a submission
+    and recompiles its own automaton when the number has moved. Kept out of
+    app.profanity, which the validation process pool imports without a database.
+    """
+
+    NAME = "profanity"
+
+    def __init__(self, check_interval: float = PROFANITY_VERSION_CHECK_INTERVAL):
+        self.check_interval = check_interval
+        self.loaded: Optional[int] = None
+        self._checked_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    def _is_fresh(self) -> bool:
+        return self._checked_at is not None and time.monotonic() - self._checked_at < self.check_interval
+
+    async def _read(self) -> int:
+        async with SessionLocal() as db:
+            version = await db.scalar(select(SharedVersion.version).where(SharedVersion.name == self.NAME))
+        return version or 0
+
+    async def _bump(self) -> int:
+        async with SessionLocal() as db:
+            stmt = dialect_insert(db, SharedVersion).values(name=self.NAME, version=1, updated_at=datetime.utcnow())
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[SharedVersion.name],
+                set_={"version": SharedVersion.version + 1, "updated_at": stmt.excluded.updated_at},
+            )
+            await db.execute(stmt)
+            version = await db.scalar(select(SharedVersion.version).where(SharedVersion.name == self.NAME))
+            await db.commit()
+        return version
+
+    async def reload(self) -> tuple[profanity.ProfanityMatcher, int]:
+        """Publish a new version and recompile here; the other workers follow within check_interval."""
+        async with self._lock:
+            version = await self._bump()
+            matcher = await asyncio.to_thread(profanity.load)
+            self.loaded = version
+            self._checked_at = time.monotonic()
+        return matcher, version
+
+    async def ensure_current(self):
+        if self._is_fresh():
+            return
+        async with self._lock:
+            if self._is_fresh():
+                return
+            try:
+                version = await self._read()
+            except Exception as e:
+                # Недоступная база не должна останавливать проверку слов: работаем со старыми словарями
+                logger.warning("Failed to read the shared profanity version: %s", e)
+                self._checked_at = time.monotonic()
+                return
+            self._checked_at = time.monotonic()
+            if self.loaded is None:
+                # Первая проверка после старта: словари только что прочитаны с диска
+                self.loaded = version
+                return
+            if version != self.loaded:
+                logger.info("Profanity wordlists changed to version %s, reloading", version)
+                await asyncio.to_thread(profanity.load)
+                self.loaded = version
+
+
+profanity_version = SharedProfanityVersion()
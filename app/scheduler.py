@@ -0,0 +1,273 @@
+import asyncio
+import logging
+from array import array
+from datetime import datetime, timedelta
+from typing import Optional
+
+from apscheduler.jobstores.base import JobLookupError
+from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+from sqlalchemy import distinct, extract, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from telegram import Bot
+from telegram.ext import Application
+
+from app.analytics import sprint_analytics
+from app.broadcast import start_broadcast
+from app.config import ADMIN_IDS, ANALYTICS_REFRESH_INTERVAL, DATABASE_URL, SCHEDULER_JOBSTORE_URL
+from app.db import SessionLocal, sync_database_url
+from app.export import close_export, export_sprint_words, send_export
+from app.partitions import ensure_partitions
+from app.models import Sprint, SprintStatus, User, Word
+from app.sprint_cache import active_sprint_cache
+from app.update_ledger import update_ledger
+from app.users import user_registry
+
+logger = logging.getLogger(__name__)
+
+DAILY_REPORT_JOB = "daily-report"
+PRUNE_LEDGER_JOB = "prune-update-ledger"
+WORDS_PARTITIONS_JOB = "ensure-words-partitions"
+SPRINT_STATS_JOB = "refresh-sprint-stats"
+
+# Задания хранятся в БД и переживают перезапуск. Задание, пропущенное пока бот
+# лежал, выполняется сразу после старта (misfire_grace_time=None), а несколько
+# пропущенных запусков одного задания схлопываются в один (coalesce)
+scheduler = AsyncIOScheduler(
+    timezone="UTC",
+    jobstores={"default": SQLAlchemyJobStore(url=sync_database_url(SCHEDULER_JOBSTORE_URL or DATABASE_URL))},
+    job_defaults={"coalesce": True, "misfire_grace_time": None},
+)
+
+# Задания в хранилище ссылаются на функции модуля по имени, а бот берут отсюда
+_application: Optional[Application] = None
+
+
+def sprint_job_id(sprint_id: int) -> str:
+    return f"sprint-expiry-{sprint_id}"
+
+
+# SQLAlchemyJobStore синхронный: add_job/remove_job/get_job ходят в базу блокирующе,
+# поэтому из обработчиков команд зовём их в потоке (APScheduler сам берёт блокировку хранилища)
+async def schedule_sprint_expiry(sprint_id: int, end_date: datetime):
+    await asyncio.to_thread(
+        scheduler.add_job,
+        expire_sprint,
+        "date",
+        run_date=end_date,
+        args=[sprint_id],
+        id=sprint_job_id(sprint_id),
+        replace_existing=True,
+    )
+    logger.debug("Sprint %s will expire at %s", sprint_id, end_date)
+
+
+async def cancel_sprint_expiry(sprint_id: int):
+    try:
+        await asyncio.to_thread(scheduler.remove_job, sprint_job_id(sprint_id))
+    except JobLookupError:
+        pass
+
+
+async def close_sprint(db: AsyncSession, sprint_id: int) -> bool:
+    """Mark an active sprint completed; False if it was already closed (by an admin or another worker)."""
+    result = await db.execute(
+        update(Sprint)
+        .where(Sprint.id == sprint_id, Sprint.status == SprintStatus.active)
+        .values(status=SprintStatus.completed)
+    )
+    await db.commit()
+    return result.rowcount == 1
+
+
+async def expire_sprint(sprint_id: int):
+    async with SessionLocal() as db:
+        if not await close_sprint(db, sprint_id):
+            logger.debug("Sprint %s is already closed", sprint_id)
+            return
+        logger.info("Sprint %s expired", sprint_id, extra={"event": "sprint_expired", "sprint_id": sprint_id})
+        await active_sprint_cache.invalidate()
+        sprint = await db.get(Sprint, sprint_id)
+        rows = (await db.execute(
+            select(Word.user_id, User.is_blocked)
+            .outerjoin(User, User.id == Word.user_id)
+            .where(Word.sprint_id == sprint_id)
+            .distinct()
+        )).all()
+        await notify_admins(db, sprint, len(rows))
+    # Заблокировавшим бота не пишем; участники без строки в users получают сообщение
+    recipients = array("q", (user_id for user_id, blocked in rows if not blocked))
+    if recipients:
+        start_broadcast(
+            _application,
+            recipients,
+            f"🏁 Спринт #{sprint.id} «{sprint.theme}» завершён! Спасибо за твои слова, жди следующий!",
+            title=f"Уведомление о завершении спринта #{sprint.id}",
+            total=len(recipients),
+            on_blocked=user_registry.mark_blocked,
+        )
+
+
+async def notify_admins(db: AsyncSession, sprint: Sprint, participants: int):
+    bot = _application.bot
+    parts = await export_sprint_words(db, sprint.id, "csv")
+    text = (
+        f"⏰ Спринт #{sprint.id} «{sprint.theme}» завершён автоматически.\n"
+        f"Участников: {participants}. " + ("Слова во вложении." if parts else "Слов нет.")
+    )
+    try:
+        for admin_id in ADMIN_IDS:
+            try:
+                await bot.send_message(chat_id=admin_id, text=text)
+                await send_export(bot, admin_id, parts)
+            except Exception as e:
+                logger.error("Could not notify admin %s about sprint %s: %s", admin_id, sprint.id, e, exc_info=True)
+    finally:
+        close_export(parts)
+
+
+async def catch_up_sprints():
+    """Close sprints whose end_date passed while nothing was scheduled and make sure the rest have a job."""
+    now = datetime.utcnow()
+    async with SessionLocal() as db:
+        rows = (await db.execute(
+            select(Sprint.id, Sprint.end_date)
+            .where(Sprint.status == SprintStatus.active, Sprint.end_date.is_not(None))
+            .order_by(Sprint.end_date)
+        )).all()
+    for sprint_id, end_date in rows:
+        if end_date <= now:
+            await cancel_sprint_expiry(sprint_id)
+            await expire_sprint(sprint_id)
+        elif await asyncio.to_thread(scheduler.get_job, sprint_job_id(sprint_id)) is None:
+            await schedule_sprint_expiry(sprint_id, end_date)
+
+
+async def prune_update_ledger():
+    await update_ledger.prune()
+
+
+async def ensure_words_partitions():
+    # Секции заводятся заранее, пока строки новых спринтов не начали копиться в DEFAULT
+    await ensure_partitions()
+
+
+async def refresh_sprint_stats():
+    # Счётчики активных спринтов сохраняются заранее: /sprint_stats в любом воркере дочитывает только хвост
+    for sprint in await active_sprint_cache.get():
+        await sprint_analytics.stats(sprint.id)
+
+
+async def run_daily_report():
+    async with SessionLocal() as db:
+        await daily_report(_application.bot, db)
+
+
+async def daily_report(bot: Bot, db: AsyncSession):
+    logger.debug("Daily report started")
+    try:
+        # Задача срабатывает в 00:00 UTC, поэтому отчитываемся за только что закончившиеся сутки
+        today = datetime.utcnow().date() - timedelta(days=1)
+        start_of_day = datetime.combine(today, datetime.min.time())
+        end_of_day = start_of_day + timedelta(days=1)
+        new_users = await db.scalar(
+            select(func.count()).select_from(User).where(User.joined_at >= start_of_day, User.joined_at < end_of_day)
+        )
+        # Все счётчики по спринтам одним GROUP BY вместо отдельного count() на каждый спринт
+        sprint_totals = (await db.execute(
+            select(Sprint.id, Sprint.status, func.count(Word.id))
+            .outerjoin(Word, Word.sprint_id == Sprint.id)
+            .group_by(Sprint.id, Sprint.status)
+            .order_by(Sprint.id)
+        )).all()
+        # Слова за сутки: один проход по диапазону индекса submitted_at
+        hour = extract("hour", Word.submitted_at)
+        today_groups = (await db.execute(
+            select(Word.language, hour, func.count())
+            .where(Word.submitted_at >= start_of_day, Word.submitted_at < end_of_day)
+            .group_by(Word.language, hour)
+        )).all()
+        unique_users = await db.scalar(
+            select(func.count(distinct(Word.user_id))).where(Word.submitted_at >= start_of_day, Word.submitted_at < end_of_day)
+        )
+
+        by_language: dict[str, int] = {}
+        by_hour: dict[int, int] = {}
+        for language, hour_value, count in today_groups:
+            by_language[language] = by_language.get(language, 0) + count
+            by_hour[int(hour_value)] = by_hour.get(int(hour_value), 0) + count
+        new_words = sum(by_language.values())
+
+        lines = [
+            f"📊 Отчёт за {today}:",
+            f"Новых пользователей: {new_users}",
+            f"Новых слов: {new_words}",
+            f"Участников: {unique_users}",
+        ]
+        if by_language:
+            languages = ", ".join(f"{lang}: {count}" for lang, count in sorted(by_language.items(), key=lambda item: -item[1]))
+            lines.append(f"Языки: {languages}")
+            hours = ", ".join(f"{h:02d}ч: {count}" for h, count in sorted(by_hour.items()))
+            lines.append(f"По часам (UTC): {hours}")
+        for sprint_id, status, total_words in sprint_totals:
+            lines.append(f"Спринт #{sprint_id} ({status.value}): {total_words} слов")
+        report = "\n".join(lines) + "\n"
+        for admin_id in ADMIN_IDS:
+            await bot.send_message(chat_id=admin_id, text=report)
+    except Exception as e:
+        logger.error("Error in daily_report: %s", e, exc_info=True)
+    finally:
+        logger.debug("Daily report finished")
+
+def _ensure_job(func, trigger, job_id: str, **kwargs):
+    # replace_existing пересчитал бы next_run_time от текущего момента, и запуск, пропущенный
+    # пока бот лежал, молча потерялся бы. Сохранённое задание трогаем, только если сменилось расписание
+    job = scheduler.get_job(job_id)
+    if job is None:
+        scheduler.add_job(func, trigger, id=job_id, **kwargs)
+    elif str(job.trigger) != str(trigger):
+        scheduler.reschedule_job(job_id, trigger=trigger)
+        logger.info("Job %s rescheduled to %s", job_id, trigger)
+
+
+def start_scheduler(application: Application):
+    """Start paused: every instance can add jobs to the shared store, only the leader runs them."""
+    global _application
+    _application = application
+    # Хранилище открывается в start(): до него get_job не видит сохранённых заданий
+    scheduler.start(paused=True)
+    _ensure_job(run_daily_report, CronTrigger(hour=0, minute=0, timezone="UTC"), DAILY_REPORT_JOB, misfire_grace_time=3600)
+    _ensure_job(prune_update_ledger, IntervalTrigger(minutes=15, timezone="UTC"), PRUNE_LEDGER_JOB)
+    _ensure_job(ensure_words_partitions, IntervalTrigger(hours=6, timezone="UTC"), WORDS_PARTITIONS_JOB)
+    if ANALYTICS_REFRESH_INTERVAL > 0:
+        _ensure_job(refresh_sprint_stats, IntervalTrigger(seconds=ANALYTICS_REFRESH_INTERVAL, timezone="UTC"), SPRINT_STATS_JOB)
+    else:
+        try:
+            scheduler.remove_job(SPRINT_STATS_JOB)
+        except JobLookupError:
+            pass
+    logger.debug("Scheduler started (paused) with %s jobs", len(scheduler.get_jobs()))
+
+
+async def resume_scheduler():
+    scheduler.resume()
+    await catch_up_sprints()
+    logger.debug("Scheduler resumed")
+
+
+async def pause_scheduler():
+    scheduler.pause()
+    logger.debug("Scheduler paused")
+
+
+async def poll_jobs():
+    # Задания, добавленные другими экземплярами, лидер видит только при следующем
+    # пробуждении планировщика; будим его при каждом продлении аренды
+    scheduler.wakeup()
+
+
+def stop_scheduler():
+    if scheduler.running:
+        scheduler.shutdown(wait=False)
@@ -0,0 +1,201 @@
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import or_, select, text
+
+from app.config import DATABASE_URL, SPRINT_CACHE_CHANNEL, SPRINT_CACHE_TTL
+from app.db import SessionLocal, async_database_url, engine
+from app.models import Sprint, SprintStatus
+
+logger = logging.getLogger(__name__)
+
+# Проверка соединения LISTEN и паузы между попытками переподключения, секунды
+_KEEPALIVE_INTERVAL = 30
+_RECONNECT_DELAYS = (1, 2, 5, 10, 30)
+
+
+@dataclass(frozen=True)
+class ActiveSprint:
+    id: int
+    theme: str
+    duration: int
+    end_date: Optional[datetime]
+
+
+class ActiveSprintCache:
+    """Process-local snapshot of active sprints.
+
+    Reloaded on invalidate() (/start_sprint, /end_sprint), when the earliest
+    end_date passes, and every SPRINT_CACHE_TTL seconds as a safety net for
+    other workers' changes when no invalidation channel is configured.
+    """
+
+    def __init__(self, ttl: float = SPRINT_CACHE_TTL):
+        self.ttl = ttl
+        self._sprints: tuple[ActiveSprint, ...] = ()
+        self._loaded_at: Optional[float] = None
+        self._next_expiry: Optional[datetime] = None
+        self._lock = asyncio.Lock()
+        self._listener = None
+
+    def _is_stale(self) -> bool:
+        if self._loaded_at is None:
+            return True
+        if self.ttl and time.monotonic() - self._loaded_at > self.ttl:
+            return True
+        return self._next_expiry is not None and datetime.utcnow() >= self._next_expiry
+
+    async def refresh(self) -> tuple[ActiveSprint, ...]:
+        async with self._lock:
+            now = datetime.utcnow()
+            async with SessionLocal() as db:
+                rows = (await db.execute(
+                    select(Sprint.id, Sprint.theme, Sprint.duration, Sprint.end_date)
+                    .where(Sprint.status == SprintStatus.active)
+                    .where(or_(Sprint.end_date.is_(None), Sprint.end_date > now))
+                    .order_by(Sprint.id)
+                )).all()
+            self._sprints = tuple(ActiveSprint(*row) for row in rows)
+            end_dates = [s.end_date for s in self._sprints if s.end_date is not None]
+            self._next_expiry = min(end_dates) if end_dates else None
+            self._loaded_at = time.monotonic()
+            logger.debug("Active sprint cache loaded: %s, next expiry: %s", [s.id for s in self._sprints], self._next_expiry)
+            return self._sprints
+
+    async def get(self) -> tuple[ActiveSprint, ...]:
+        if self._is_stale():
+            return await self.refresh()
+        return self._sprints
+
+    def mark_stale(self):
+        self._loaded_at = None
+
+    async def invalidate(self):
+        await self.refresh()
+        if self._listener is not None:
+            await self._listener.publish()
+
+    async def start_listener(self):
+        if not SPRINT_CACHE_CHANNEL:
+            return
+        listener = PostgresInvalidationChannel(SPRINT_CACHE_CHANNEL, self.mark_stale)
+        if await listener.start():
+            self._listener = listener
+
+    async def stop_listener(self):
+        if self._listener is not None:
+            await self._listener.stop()
+            self._listener = None
+
+
+class PostgresInvalidationChannel:
+    """LISTEN/NOTIFY channel so every worker drops its snapshot after a change elsewhere.
+
+    The listening connection is watched: when it drops (Postgres restart,
+    failover) or stops answering the keepalive, it is reopened with backoff.
+    The snapshot is dropped on loss and again on reconnect, because
+    notifications sent in between are not replayed.
+    """
+
+    def __init__(self, channel: str, on_invalidate):
+        self.channel = channel
+        self.on_invalidate = on_invalidate
+        self._conn = None
+        self._dsn = None
+        self._connect_args: dict = {}
+        self._lost: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._pid = str(os.getpid())
+
+    async def start(self) -> bool:
+        url, connect_args = async_database_url(DATABASE_URL)
+        if url.get_backend_name() != "postgresql":
+            logger.warning("SPRINT_CACHE_CHANNEL is set but the database is not PostgreSQL; relying on SPRINT_CACHE_TTL")
+            return False
+        self._dsn = url.set(drivername="postgresql").render_as_string(hide_password=False)
+        self._connect_args = connect_args
+        await self._connect()
+        self._task = asyncio.create_task(self._watch())
+        logger.debug("Listening for sprint cache invalidations on '%s'", self.channel)
+        return True
+
+    async def _connect(self):
+        import asyncpg
+
+        lost = asyncio.Event()
+        conn = await asyncpg.connect(self._dsn, **self._connect_args)
+        conn.add_termination_listener(lambda connection: lost.set())
+        await conn.add_listener(self.channel, self._on_notify)
+        self._conn, self._lost = conn, lost
+
+    async def _is_alive(self) -> bool:
+        try:
+            await asyncio.wait_for(self._lost.wait(), _KEEPALIVE_INTERVAL)
+            return False
+        except asyncio.TimeoutError:
+            pass
+        # Оборванный без FIN TCP (failover) termination listener не замечает
+        try:
+            await asyncio.wait_for(self._conn.execute("SELECT 1"), _KEEPALIVE_INTERVAL)
+            return True
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            return False
+
+    async def _watch(self):
+        while True:
+            if await self._is_alive():
+                continue
+            logger.warning("Sprint cache invalidation channel '%s' lost, reconnecting", self.channel)
+            await self._close_connection()
+            self.on_invalidate()
+            attempt = 0
+            while True:
+                await asyncio.sleep(_RECONNECT_DELAYS[min(attempt, len(_RECONNECT_DELAYS) - 1)])
+                attempt += 1
+                try:
+                    await self._connect()
+                    break
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.warning("Sprint cache channel reconnect attempt %s failed: %s", attempt, e)
+            # Уведомления, отправленные без соединения, потеряны: снимок перечитывается
+            self.on_invalidate()
+            logger.info("Sprint cache invalidation channel '%s' reconnected", self.channel)
+
+    def _on_notify(self, connection, pid, channel, payload):
+        if payload != self._pid:
+            logger.debug("Sprint cache invalidated by worker %s", payload)
+            self.on_invalidate()
+
+    async def publish(self):
+        try:
+            async with engine.begin() as conn:
+                await conn.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": self.channel, "payload": self._pid})
+        except Exception as e:
+            logger.error("Failed to publish sprint cache invalidation: %s", e, exc_info=True)
+
+    async def _close_connection(self):
+        conn, self._conn = self._conn, None
+        if conn is not None and not conn.is_closed():
+            try:
+                await conn.close(timeout=_KEEPALIVE_INTERVAL)
+            except Exception:
+                conn.terminate()
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self._close_connection()
+
+
+active_sprint_cache = ActiveSprintCache()
@@ -0,0 +1,141 @@
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+
+from app import metrics
+from app.config import SUBMISSION_BATCH_SIZE, SUBMISSION_BATCH_WAIT_MS, SUBMISSION_QUEUE_SIZE
+from app.crud import insert_words
+from app.db import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Параметров в одном INSERT не больше 32767 (asyncpg), по 5 на строку
+_MAX_ROWS_PER_INSERT = 32767 // 5
+
+
+@dataclass
+class _Submission:
+    user_id: int
+    sprint_ids: list[int]
+    words: str
+    language: str
+    submitted_at: datetime
+    future: asyncio.Future = field(repr=False)
+
+
+class SubmissionBuffer:
+    """Write-behind group commit for word submissions.
+
+    submit() has the same contract as crud.submit_words, but submissions that
+    arrive while a batch is waiting (up to batch_wait) or being written are
+    inserted together with one multi-row INSERT and one commit. Each caller is
+    resumed only after its batch is committed, so replies never get ahead of
+    the data. At most `max_pending` submissions wait in memory.
+    """
+
+    def __init__(
+        self,
+        batch_wait: float = SUBMISSION_BATCH_WAIT_MS / 1000,
+        batch_size: int = SUBMISSION_BATCH_SIZE,
+        max_pending: int = SUBMISSION_QUEUE_SIZE,
+    ):
+        self.batch_wait = batch_wait
+        self.batch_size = max(1, batch_size)
+        self.max_pending = max(1, max_pending)
+        self._pending: list[_Submission] = []
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._filled: Optional[asyncio.Event] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._closing = False
+        self.batches = 0
+        self.rows = 0
+
+    async def submit(self, user_id: int, sprint_ids: list[int], words: str, language: str) -> list[int]:
+        if not sprint_ids:
+            return []
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+            self._filled = asyncio.Event()
+        # Очередь полна — ждём места: обработчик задерживается, а не копит память
+        await self._slots.acquire()
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append(_Submission(user_id, sprint_ids, words, language, datetime.utcnow(), future))
+        if len(self._pending) >= self.batch_size:
+            self._filled.set()
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._run())
+        return await future
+
+    async def _run(self):
+        # Одна запись за раз: пока идёт commit, новые заявки копятся в следующую пачку
+        while self._pending:
+            if len(self._pending) < self.batch_size and not self._closing:
+                try:
+                    await asyncio.wait_for(self._filled.wait(), self.batch_wait)
+                except asyncio.TimeoutError:
+                    pass
+            batch, self._pending = self._pending[:self.batch_size], self._pending[self.batch_size:]
+            if len(self._pending) < self.batch_size:
+                self._filled.clear()
+            try:
+                await self._write(batch)
+            finally:
+                for _ in batch:
+                    self._slots.release()
+        self._flush_task = None
+
+    async def _write(self, batch: list[_Submission]):
+        rows, owners = [], {}
+        for submission in batch:
+            for sprint_id in submission.sprint_ids:
+                key = (submission.user_id, sprint_id)
+                # Две заявки одного пользователя в одной пачке: принимается первая
+                if key in owners:
+                    continue
+                owners[key] = submission
+                rows.append({
+                    "user_id": submission.user_id,
+                    "sprint_id": sprint_id,
+                    "words": submission.words,
+                    "language": submission.language,
+                    "submitted_at": submission.submitted_at,
+                })
+        try:
+            inserted = set()
+            async with SessionLocal() as db:
+                # Все части пачки в одной транзакции: ошибка в любой откатывает всю пачку,
+                # и никто не получит отказ за строку, которая на самом деле записана
+                for start in range(0, len(rows), _MAX_ROWS_PER_INSERT):
+                    inserted |= await insert_words(db, rows[start:start + _MAX_ROWS_PER_INSERT], commit=False)
+                await db.commit()
+        except Exception as e:
+            logger.error("Could not write %s submissions: %s", len(batch), e, exc_info=True)
+            for submission in batch:
+                if not submission.future.done():
+                    submission.future.set_exception(e)
+            return
+        self.batches += 1
+        self.rows += len(rows)
+        metrics.SUBMISSION_BATCH_SIZE.observe(len(batch))
+        for submission in batch:
+            if submission.future.done():
+                continue
+            submission.future.set_result([
+                sprint_id for sprint_id in submission.sprint_ids
+                if (submission.user_id, sprint_id) in inserted and owners[(submission.user_id, sprint_id)] is submission
+            ])
+
+    async def stop(self):
+        """Write everything still buffered; called on shutdown after the update queue is drained."""
+        self._closing = True
+        if self._filled is not None:
+            self._filled.set()
+        while self._flush_task is not None:
+            await asyncio.shield(self._flush_task)
+        self._closing = False
+        logger.debug("Submission buffer flushed: %s rows in %s batches", self.rows, self.batches)
+
+
+submission_buffer = SubmissionBuffer()
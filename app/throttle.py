@@ -0,0 +1,135 @@
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from app import metrics
+from app.config import (
+    ADMIN_ID_SET,
+    THROTTLE_BURST,
+    THROTTLE_IDLE_TTL,
+    THROTTLE_MAX_USERS,
+    THROTTLE_MAX_MUTE_SECONDS,
+    THROTTLE_MUTE_AFTER,
+    THROTTLE_MUTE_SECONDS,
+    THROTTLE_RATE,
+)
+
+ALLOWED = "allowed"
+DROPPED = "dropped"
+MUTED = "muted"  # апдейт отброшен и пользователь только что получил мут
+
+MUTED_MESSAGE = "🚫 Слишком много сообщений! Отдохни {seconds} сек. (Too many messages, take a break!)"
+
+
+def update_user_id(data: dict) -> Optional[int]:
+    """Sender of a raw update, without building telegram.Update."""
+    for value in data.values():
+        if isinstance(value, dict):
+            sender = value.get("from")
+            if isinstance(sender, dict):
+                return sender.get("id")
+    return None
+
+
+class _Bucket:
+    __slots__ = ("tokens", "updated", "strikes", "muted_until", "mutes")
+
+    def __init__(self, tokens: float, now: float):
+        self.tokens = tokens
+        self.updated = now
+        self.strikes = 0
+        self.muted_until = 0.0
+        self.mutes = 0
+
+
+class UserThrottle:
+    """Per-user token buckets checked before an update is queued.
+
+    Each user gets `burst` updates at once and `rate` per second after that;
+    the excess is dropped. `mute_after` drops without the bucket refilling in
+    between mute the user for `mute_seconds`, doubling on every repeat up to
+    `max_mute_seconds`. Buckets live in an OrderedDict by last activity and
+    are evicted after `idle_ttl` seconds or when there are more than
+    `max_users`; nothing here touches the database.
+    """
+
+    def __init__(
+        self,
+        rate: float = THROTTLE_RATE,
+        burst: float = THROTTLE_BURST,
+        mute_after: int = THROTTLE_MUTE_AFTER,
+        mute_seconds: float = THROTTLE_MUTE_SECONDS,
+        max_mute_seconds: float = THROTTLE_MAX_MUTE_SECONDS,
+        idle_ttl: float = THROTTLE_IDLE_TTL,
+        max_users: int = THROTTLE_MAX_USERS,
+        exempt: frozenset = ADMIN_ID_SET,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.mute_after = max(1, mute_after)
+        self.mute_seconds = mute_seconds
+        self.max_mute_seconds = max(mute_seconds, max_mute_seconds)
+        self.idle_ttl = idle_ttl
+        self.max_users = max(1, max_users)
+        self.exempt = exempt
+        self.clock = clock
+        self._buckets: OrderedDict[int, _Bucket] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def check(self, user_id: Optional[int]) -> str:
+        if user_id is None or user_id in self.exempt:
+            return ALLOWED
+        now = self.clock()
+        bucket = self._buckets.get(user_id)
+        if bucket is None:
+            bucket = self._buckets[user_id] = _Bucket(self.burst, now)
+            self._evict(now)
+        else:
+            self._buckets.move_to_end(user_id)
+        if now < bucket.muted_until:
+            # Спам во время мута тоже тратит ведро: после мута оно начнёт наполняться с нуля
+            bucket.tokens = 0
+            bucket.updated = now
+            metrics.THROTTLED_UPDATES.labels("muted").inc()
+            return DROPPED
+        bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * self.rate)
+        bucket.updated = now
+        if bucket.tokens >= self.burst:
+            # Пользователь успокоился настолько, что ведро успело наполниться
+            bucket.strikes = 0
+        if bucket.tokens >= 1:
+            bucket.tokens -= 1
+            return ALLOWED
+        bucket.strikes += 1
+        metrics.THROTTLED_UPDATES.labels("rate").inc()
+        if bucket.strikes < self.mute_after:
+            return DROPPED
+        bucket.strikes = 0
+        bucket.muted_until = now + self.mute_duration(bucket.mutes)
+        bucket.mutes += 1
+        metrics.THROTTLE_MUTES.inc()
+        return MUTED
+
+    def mute_duration(self, previous_mutes: int) -> float:
+        return min(self.max_mute_seconds, self.mute_seconds * 2 ** min(previous_mutes, 16))
+
+    def muted_for(self, user_id: int) -> float:
+        bucket = self._buckets.get(user_id)
+        return max(0.0, bucket.muted_until - self.clock()) if bucket else 0.0
+
+    def _evict(self, now: float):
+        buckets = self._buckets
+        while len(buckets) > self.max_users:
+            buckets.popitem(last=False)
+        # Самые давно активные — в начале; замьюченных не забываем до конца мута
+        while buckets:
+            bucket = next(iter(buckets.values()))
+            if now - bucket.updated < self.idle_ttl or now < bucket.muted_until:
+                break
+            buckets.popitem(last=False)
+
+
+throttle = UserThrottle()
@@ -0,0 +1,77 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete
+
+from app.config import UPDATE_LEDGER_BATCH_WAIT_MS, UPDATE_LEDGER_TTL
+from app.crud import dialect_insert
+from app.db import SessionLocal
+from app.models import ProcessedUpdate
+
+logger = logging.getLogger(__name__)
+
+
+class UpdateLedger:
+    """Persisted set of claimed update_ids shared by all workers and restarts.
+
+    claim() returns True only for the first claim of an id anywhere. Claims
+    that arrive together are written with a single INSERT ... ON CONFLICT DO
+    NOTHING RETURNING, so a burst of updates costs one round trip.
+    """
+
+    def __init__(self, ttl: float = UPDATE_LEDGER_TTL, batch_wait: float = UPDATE_LEDGER_BATCH_WAIT_MS / 1000):
+        self.ttl = ttl
+        self.batch_wait = batch_wait
+        self._pending: dict[int, asyncio.Future] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def claim(self, update_id: int) -> bool:
+        if update_id in self._pending:
+            # Тот же апдейт уже ждёт записи в этой пачке
+            return False
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending[update_id] = future
+        if self._flush_task is None:
+            self._flush_task = loop.create_task(self._flush())
+        return await future
+
+    async def _flush(self):
+        await asyncio.sleep(self.batch_wait)
+        pending, self._pending = self._pending, {}
+        self._flush_task = None
+        try:
+            inserted = set(await self._insert(list(pending)))
+        except Exception as e:
+            # Лучше изредка обработать апдейт дважды, чем молча потерять уже подтверждённый
+            logger.warning("Update ledger unavailable, processing %s updates unchecked: %s", len(pending), e)
+            inserted = set(pending)
+        for update_id, future in pending.items():
+            if not future.done():
+                future.set_result(update_id in inserted)
+
+    async def _insert(self, update_ids: list[int]) -> list[int]:
+        now = datetime.utcnow()
+        async with SessionLocal() as db:
+            stmt = (
+                dialect_insert(db, ProcessedUpdate)
+                .values([{"update_id": update_id, "received_at": now} for update_id in update_ids])
+                .on_conflict_do_nothing(index_elements=[ProcessedUpdate.update_id])
+                .returning(ProcessedUpdate.update_id)
+            )
+            inserted = (await db.execute(stmt)).scalars().all()
+            await db.commit()
+        return list(inserted)
+
+    async def prune(self) -> int:
+        cutoff = datetime.utcnow() - timedelta(seconds=self.ttl)
+        async with SessionLocal() as db:
+            result = await db.execute(delete(ProcessedUpdate).where(ProcessedUpdate.received_at < cutoff))
+            await db.commit()
+        logger.debug("Pruned %s update ledger entries", result.rowcount)
+        return result.rowcount
+
+
+update_ledger = UpdateLedger()
@@ -0,0 +1,172 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable, Optional
+
+from app.config import UPDATE_DEDUP_SIZE, UPDATE_DRAIN_TIMEOUT, UPDATE_QUEUE_SIZE, UPDATE_WORKERS
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+DUPLICATE = "duplicate"
+REJECTED = "rejected"
+
+
+class RecentIds:
+    """Bounded set of recently seen ids: O(1) lookups, oldest ids are forgotten first."""
+
+    def __init__(self, size: int):
+        self._order: deque = deque(maxlen=size)
+        self._ids: set = set()
+
+    def __contains__(self, item) -> bool:
+        return item in self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def add(self, item):
+        if len(self._order) == self._order.maxlen:
+            self._ids.discard(self._order[0])
+        self._order.append(item)
+        self._ids.add(item)
+
+
+def update_chat_id(data: dict) -> Optional[int]:
+    """Chat (or user) id of a raw update, used to keep one chat's updates in order."""
+    for key in ("message", "edited_message", "channel_post", "edited_channel_post"):
+        message = data.get(key)
+        if message:
+            return message.get("chat", {}).get("id")
+    callback = data.get("callback_query")
+    if callback:
+        message = callback.get("message")
+        if message:
+            return message.get("chat", {}).get("id")
+        return callback.get("from", {}).get("id")
+    for value in data.values():
+        if isinstance(value, dict) and isinstance(value.get("from"), dict):
+            return value["from"].get("id")
+    return None
+
+
+class UpdateDispatcher:
+    """Bounded queue of raw updates drained by a pool of workers.
+
+    Updates are sharded by chat id, so one chat's updates are handled in order
+    by a single worker while different chats run in parallel.
+    """
+
+    def __init__(
+        self,
+        process: Callable[[dict], Awaitable[None]],
+        workers: int = UPDATE_WORKERS,
+        queue_size: int = UPDATE_QUEUE_SIZE,
+        dedup_size: int = UPDATE_DEDUP_SIZE,
+        claim: Optional[Callable[[int], Awaitable[bool]]] = None,
+    ):
+        self.process = process
+        # claim(update_id) -> False, если апдейт уже взял другой воркер или процесс до перезапуска
+        self.claim = claim
+        self.workers = max(1, workers)
+        shard_size = max(1, queue_size // self.workers)
+        self._queues = [asyncio.Queue(maxsize=shard_size) for _ in range(self.workers)]
+        self._tasks: list[asyncio.Task] = []
+        self._seen = RecentIds(dedup_size)
+        self._accepting = False
+        self.stats = {
+            "enqueued": 0,
+            "processed": 0,
+            "failed": 0,
+            "duplicates": 0,
+            "rejected": 0,
+            "max_depth": 0,
+            "last_wait_ms": 0.0,
+            "max_wait_ms": 0.0,
+            "last_process_ms": 0.0,
+        }
+
+    @property
+    def depth(self) -> int:
+        return sum(queue.qsize() for queue in self._queues)
+
+    @property
+    def capacity(self) -> int:
+        return sum(queue.maxsize for queue in self._queues)
+
+    def snapshot(self) -> dict:
+        return {
+            **self.stats,
+            "depth": self.depth,
+            "capacity": self.capacity,
+            "workers": self.workers,
+            "accepting": self._accepting,
+        }
+
+    def seen(self, update_id: int) -> bool:
+        return update_id in self._seen
+
+    def submit(self, data: dict) -> str:
+        update_id = data["update_id"]
+        if update_id in self._seen:
+            self.stats["duplicates"] += 1
+            return DUPLICATE
+        if not self._accepting:
+            self.stats["rejected"] += 1
+            return REJECTED
+        chat_id = update_chat_id(data) or 0
+        queue = self._queues[hash(chat_id) % self.workers]
+        try:
+            queue.put_nowait((time.monotonic(), data))
+        except asyncio.QueueFull:
+            self.stats["rejected"] += 1
+            logger.warning("Update queue shard is full, rejecting update %s", update_id)
+            return REJECTED
+        self._seen.add(update_id)
+        self.stats["enqueued"] += 1
+        depth = self.depth
+        if depth > self.stats["max_depth"]:
+            self.stats["max_depth"] = depth
+        return QUEUED
+
+    async def _work(self, queue: asyncio.Queue):
+        while True:
+            enqueued_at, data = await queue.get()
+            started = time.monotonic()
+            wait_ms = (started - enqueued_at) * 1000
+            self.stats["last_wait_ms"] = wait_ms
+            if wait_ms > self.stats["max_wait_ms"]:
+                self.stats["max_wait_ms"] = wait_ms
+            try:
+                if self.claim is not None and not await self.claim(data["update_id"]):
+                    self.stats["duplicates"] += 1
+                    continue
+                await self.process(data)
+                self.stats["processed"] += 1
+            except Exception as e:
+                self.stats["failed"] += 1
+                logger.error("Error processing update %s: %s", data.get('update_id'), e, exc_info=True)
+            finally:
+                self.stats["last_process_ms"] = (time.monotonic() - started) * 1000
+                queue.task_done()
+
+    def start(self):
+        self._accepting = True
+        self._tasks = [asyncio.create_task(self._work(queue)) for queue in self._queues]
+        logger.debug("Update dispatcher started with %s workers", self.workers)
+
+    async def join(self):
+        await asyncio.gather(*(queue.join() for queue in self._queues))
+
+    async def stop(self, timeout: float = UPDATE_DRAIN_TIMEOUT):
+        self._accepting = False
+        try:
+            await asyncio.wait_for(self.join(), timeout)
+            logger.debug("Update queue drained")
+        except asyncio.TimeoutError:
+            logger.warning("Update queue not drained within %ss, dropping %s updates", timeout, self.depth)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
@@ -0,0 +1,133 @@
+import logging
+from array import array
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Iterable
+
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import RECIPIENTS_CHUNK_SIZE, USER_CACHE_SIZE, USER_SEEN_INTERVAL
+from app.crud import dialect_insert
+from app.db import SessionLocal
+from app.models import User
+
+logger = logging.getLogger(__name__)
+
+# Не больше параметров в одном IN (...), чем переварят и SQLite, и asyncpg
+_MAX_IDS_PER_UPDATE = 1000
+
+
+class UserRegistry:
+    """Process-local LRU of users whose row is known to be up to date.
+
+    touch() skips the database when the user is cached with the same username
+    and was seen less than `seen_interval` seconds ago; otherwise it writes one
+    INSERT ... ON CONFLICT DO UPDATE. Another worker's changes are picked up at
+    the latest after `seen_interval`, when the cached entry stops counting.
+    """
+
+    def __init__(self, max_size: int = USER_CACHE_SIZE, seen_interval: float = USER_SEEN_INTERVAL):
+        self.max_size = max(1, max_size)
+        self.seen_interval = timedelta(seconds=seen_interval)
+        self._known: OrderedDict[int, tuple[str, datetime]] = OrderedDict()
+        self.hits = 0
+        self.writes = 0
+
+    def __len__(self) -> int:
+        return len(self._known)
+
+    def _is_current(self, user_id: int, username: str, now: datetime) -> bool:
+        entry = self._known.get(user_id)
+        if entry is None or entry[0] != username or now - entry[1] >= self.seen_interval:
+            return False
+        self._known.move_to_end(user_id)
+        return True
+
+    def _remember(self, user_id: int, username: str, seen_at: datetime):
+        self._known[user_id] = (username, seen_at)
+        self._known.move_to_end(user_id)
+        while len(self._known) > self.max_size:
+            self._known.popitem(last=False)
+
+    def forget(self, user_ids: Iterable[int]):
+        for user_id in user_ids:
+            self._known.pop(user_id, None)
+
+    async def touch(self, db: AsyncSession, user_id: int, username: str) -> bool:
+        """Register or refresh a user (and clear is_blocked); False when nothing had to be written."""
+        now = datetime.utcnow()
+        if self._is_current(user_id, username, now):
+            self.hits += 1
+            return False
+        stmt = dialect_insert(db, User).values(
+            id=user_id, username=username, joined_at=now, last_seen=now, is_blocked=False
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[User.id],
+            set_={"username": stmt.excluded.username, "last_seen": stmt.excluded.last_seen, "is_blocked": False},
+            # Строку, которую только что обновил другой воркер, не переписываем
+            where=or_(
+                User.username.is_distinct_from(stmt.excluded.username),
+                User.is_blocked,
+                User.last_seen.is_(None),
+                User.last_seen < now - self.seen_interval,
+            ),
+        )
+        await db.execute(stmt)
+        await db.commit()
+        self._remember(user_id, username, now)
+        self.writes += 1
+        return True
+
+    async def set_blocked(self, user_ids: Iterable[int], blocked: bool = True) -> int:
+        """Mark users as (un)blocked; returns the number of rows changed."""
+        user_ids = list(user_ids)
+        # Следующий /start должен дойти до базы и снять отметку
+        self.forget(user_ids)
+        changed = 0
+        async with SessionLocal() as db:
+            for start in range(0, len(user_ids), _MAX_IDS_PER_UPDATE):
+                result = await db.execute(
+                    update(User)
+                    .where(User.id.in_(user_ids[start:start + _MAX_IDS_PER_UPDATE]), User.is_blocked.is_not(blocked))
+                    .values(is_blocked=blocked)
+                )
+                changed += result.rowcount
+            await db.commit()
+        logger.info("Marked %s users as %s", changed, "blocked" if blocked else "unblocked")
+        return changed
+
+    async def mark_blocked(self, user_ids: list[int]):
+        # Сигнатура под on_blocked в start_broadcast
+        await self.set_blocked(user_ids)
+
+    async def count_recipients(self, db: AsyncSession) -> int:
+        return await db.scalar(select(func.count()).select_from(User).where(User.is_blocked.is_(False)))
+
+    async def recipient_chunks(self, chunk_size: int = RECIPIENTS_CHUNK_SIZE) -> AsyncIterator[array]:
+        """Ids of users who have not blocked the bot, as int64 arrays, by keyset pages over the primary key.
+
+        Every page uses its own short session, so a long broadcast does not hold
+        a pooled connection between pages.
+        """
+        last_id = None
+        while True:
+            query = select(User.id).where(User.is_blocked.is_(False)).order_by(User.id).limit(chunk_size)
+            if last_id is not None:
+                query = query.where(User.id > last_id)
+            async with SessionLocal() as db:
+                ids = array("q", (await db.execute(query)).scalars())
+            if ids:
+                yield ids
+            if len(ids) < chunk_size:
+                return
+            last_id = ids[-1]
+
+    async def recipient_ids(self, chunk_size: int = RECIPIENTS_CHUNK_SIZE) -> AsyncIterator[int]:
+        async for chunk in self.recipient_chunks(chunk_size):
+            for user_id in chunk:
+                yield user_id
+
+
+user_registry = UserRegistry()
@@ -0,0 +1,202 @@
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+
+from app.config import (
+    VALIDATION_BATCH_SIZE,
+    VALIDATION_BATCH_WAIT_MS,
+    VALIDATION_EXECUTOR,
+    VALIDATION_TIMEOUT,
+    VALIDATION_WORKERS,
+)
+from app import metrics, profanity
+from app.filters import is_valid_input, warm_up_filters
+
+logger = logging.getLogger(__name__)
+
+BUSY_MESSAGE = "⏳ Слишком много сообщений сразу, попробуй ещё раз через минутку! (Too busy right now, try again in a minute!)"
+
+
+def validate_batch(texts: list[str], profanity_version: int = 0) -> tuple[list[tuple[bool, str]], list[dict]]:
+    """Results plus per-text stage timings; metrics live in the main process, so timings travel back."""
+    profanity.ensure_version(profanity_version)
+    results, timings = [], []
+    for text in texts:
+        stages: dict = {}
+        results.append(is_valid_input(text, stages))
+        timings.append(stages)
+    return results, timings
+
+
+def _warm_worker():
+    # Выполняется один раз в каждом воркере: словари и профили языков грузятся заранее
+    warm_up_filters()
+
+
+class ValidationPipeline:
+    """Runs is_valid_input off the event loop, in micro-batches, with a timeout fallback.
+
+    mode is "process" (ProcessPoolExecutor), "thread" (ThreadPoolExecutor) or
+    "inline" (call directly on the loop, for tests and tiny deployments).
+    """
+
+    def __init__(
+        self,
+        mode: str = VALIDATION_EXECUTOR,
+        workers: int = VALIDATION_WORKERS,
+        timeout: float = VALIDATION_TIMEOUT,
+        batch_size: int = VALIDATION_BATCH_SIZE,
+        batch_wait: float = VALIDATION_BATCH_WAIT_MS / 1000,
+    ):
+        if mode not in ("process", "thread", "inline"):
+            raise ValueError(f"Unknown VALIDATION_EXECUTOR: {mode}")
+        self.mode = mode
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.batch_size = max(1, batch_size)
+        self.batch_wait = batch_wait
+        self._executor: Optional[Executor] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._batcher: Optional[asyncio.Task] = None
+        self._starting: Optional[asyncio.Task] = None
+        self._local_warm_up: Optional[asyncio.Task] = None
+        self.timeouts = 0
+
+    async def start(self):
+        # Основной процесс тоже держит словари: по их версии воркеры узнают о /reload_profanity
+        await asyncio.to_thread(profanity.get_matcher)
+        if self.mode == "inline":
+            await asyncio.to_thread(warm_up_filters)
+            return
+        if self.mode == "process":
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_warm_worker,
+            )
+        else:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers,
+                thread_name_prefix="validation",
+                initializer=_warm_worker,
+            )
+        loop = asyncio.get_running_loop()
+        # Поднимаем все воркеры сразу, чтобы первая волна сообщений не ждала их запуска
+        await asyncio.gather(*(loop.run_in_executor(self._executor, validate_batch, []) for _ in range(self.workers)))
+        self._queue = asyncio.Queue()
+        self._batcher = asyncio.create_task(self._run_batcher())
+        logger.debug("Validation pipeline started: %s x%s", self.mode, self.workers)
+
+    def start_in_background(self):
+        """Warm up without holding back startup; until the workers are up, texts are checked in a thread."""
+        if self.mode != "inline":
+            # Прогрев в основном процессе занимает ~0.5 с, а запуск воркеров — секунды:
+            # первые сообщения после пробуждения не ждут пул процессов
+            self._local_warm_up = asyncio.create_task(asyncio.to_thread(warm_up_filters))
+        self._starting = asyncio.create_task(self._start_after_warm_up())
+
+    async def _start_after_warm_up(self):
+        # Воркеры запускаем следом, а не параллельно: на одном ядре они задержали бы прогрев
+        if self._local_warm_up is not None:
+            await self._local_warm_up
+        await self.start()
+
+    async def _validate_in_thread(self, text: str) -> tuple[bool, str]:
+        await asyncio.shield(self._local_warm_up)
+        results, timings = await asyncio.to_thread(validate_batch, [text], profanity.version)
+        metrics.observe_validation(timings)
+        return results[0]
+
+    async def _wait_started(self):
+        try:
+            # Апдейт уже подтверждён Telegram, так что ждать прогрева можно без таймаута
+            await asyncio.shield(self._starting)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("Validation pipeline failed to start, validating inline: %s", e, exc_info=True)
+        self._starting = None
+
+    async def stop(self):
+        for task in (self._starting, self._local_warm_up):
+            if task is not None:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+        self._starting = self._local_warm_up = None
+        if self._batcher is not None:
+            self._batcher.cancel()
+            await asyncio.gather(self._batcher, return_exceptions=True)
+            self._batcher = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def validate(self, text: str) -> tuple[bool, str]:
+        if self._starting is not None:
+            if self._local_warm_up is not None and not self._starting.done():
+                return await self._validate_in_thread(text)
+            await self._wait_started()
+        if self._queue is None:
+            results, timings = validate_batch([text], profanity.version)
+            metrics.observe_validation(timings)
+            return results[0]
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((text, future))
+        try:
+            # По таймауту wait_for отменяет future: _resolve его пропустит, и ошибку пачки
+            # не придётся никому читать ("Future exception was never retrieved")
+            return await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            # Лучше попросить повторить, чем пропустить непроверенные слова или держать апдейт
+            self.timeouts += 1
+            metrics.VALIDATION_TIMEOUTS.inc()
+            logger.warning("Validation timed out after %ss, queue size %s", self.timeout, self._queue.qsize())
+            return False, BUSY_MESSAGE
+
+    async def _collect_batch(self) -> list:
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.batch_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run_batcher(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect_batch()
+            futures = [future for _, future in batch]
+            executor_future = loop.run_in_executor(
+                self._executor, validate_batch, [text for text, _ in batch], profanity.version
+            )
+            executor_future.add_done_callback(lambda done, futures=futures: self._resolve(done, futures))
+
+    @staticmethod
+    def _resolve(done: asyncio.Future, futures: list):
+        if done.cancelled():
+            for future in futures:
+                if not future.done():
+                    future.cancel()
+            return
+        error = done.exception()
+        if error is None:
+            results, timings = done.result()
+            metrics.observe_validation(timings)
+        for index, future in enumerate(futures):
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(results[index])
+
+
+validation_pipeline = ValidationPipeline()
@@ -0,0 +1,125 @@
+"""/sprint_stats cost: first build, incremental refresh, and top-k accuracy against an exact count.
+
+    python -m bench.analytics --words 300000 --new 5000
+    BENCH_DATABASE_URL=postgresql://... python -m bench.analytics
+
+Seeds one sprint with `words` submissions drawn from a Zipf-like vocabulary
+in several languages, builds SprintStats from scratch, then adds `new` rows
+and times the refresh that folds in only those, and the first call of a
+fresh SprintAnalytics (another worker, or after a restart), which starts
+from the counters saved in sprint_stats. The top words are compared with an
+exact Counter over the same rows (built the old way: every row read again).
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+VOCABULARY = {
+    "ru": ["солнце", "солнца", "море", "моря", "морем", "ветер", "дом", "дома", "книга", "книги", "лес", "леса",
+           "дорога", "дороги", "небо", "звезда", "звёзды", "кот", "кошка", "река", "город", "ночь", "свет"],
+    "en": ["sun", "river", "rivers", "light", "stone", "stones", "sea", "wind", "house", "houses", "book", "night"],
+    "uk": ["сонце", "море", "зірка", "зірки", "ліс", "місто", "річка", "світло"],
+}
+LANGUAGES = ["ru"] * 6 + ["en"] * 3 + ["uk"]
+
+
+def rare_word(index: int) -> str:
+    letters = []
+    while index:
+        index, letter = divmod(index, 26)
+        letters.append(chr(ord("a") + letter))
+    return "zz" + "".join(letters)
+
+
+def submissions(count: int, sprint_id: int, first_user: int, started: datetime, seed: int):
+    rnd = random.Random(seed)
+    for i in range(count):
+        language = rnd.choice(LANGUAGES)
+        vocabulary = VOCABULARY[language]
+        # Хвост распределения — редкие выдуманные слова, чтобы резюме Space-Saving вытесняло счётчики
+        words = " ".join(
+            vocabulary[index] if index < len(vocabulary) else rare_word(index)
+            for index in (int(rnd.paretovariate(0.6)) - 1 for _ in range(rnd.choice((1, 3))))
+        )
+        yield first_user + i, sprint_id, words, language, started + timedelta(seconds=i * 0.5)
+
+
+async def run(args):
+    from sqlalchemy import insert, select
+
+    from app.analytics import SprintAnalytics, render_stats, tokens
+    from app.bulk_import import bulk_insert
+    from app.db import SessionLocal, engine, init_db
+    from app.models import Sprint, Word
+
+    await init_db()
+    async with SessionLocal() as db:
+        sprint_id = (await db.execute(insert(Sprint).values(duration=7, theme="bench").returning(Sprint.id))).scalar()
+        await db.commit()
+    started = datetime.utcnow() - timedelta(days=3)
+    await bulk_insert("words", submissions(args.words, sprint_id, 1, started, seed=1))
+
+    analytics = SprintAnalytics(top_k=args.top_k, lag=0)
+    t = time.perf_counter()
+    stats = await analytics.stats(sprint_id)
+    build = time.perf_counter() - t
+    print(f"{engine.dialect.name}: first build over {stats.submissions} submissions in {build:.2f}s, "
+          f"{len(stats.words)} counters")
+
+    await bulk_insert("words", submissions(
+        args.new, sprint_id, args.words + 1, datetime.utcnow() - timedelta(seconds=args.new * 0.5 + 1), seed=2
+    ))
+    t = time.perf_counter()
+    stats = await analytics.stats(sprint_id)
+    refresh = time.perf_counter() - t
+    t = time.perf_counter()
+    await analytics.stats(sprint_id)
+    idle = time.perf_counter() - t
+    print(f"refresh after {args.new} new submissions: {refresh * 1000:.1f} ms, with nothing new: {idle * 1000:.1f} ms")
+
+    t = time.perf_counter()
+    restored = await SprintAnalytics(top_k=args.top_k, lag=0).stats(sprint_id)
+    restart = time.perf_counter() - t
+    print(f"first call in a fresh process (saved counters): {restart * 1000:.1f} ms, "
+          f"{restored.submissions} submissions, top {'same' if restored.words.top(args.limit) == stats.words.top(args.limit) else 'differs'}")
+
+    t = time.perf_counter()
+    exact: Counter = Counter()
+    async with SessionLocal() as db:
+        result = await db.stream(select(Word.words, Word.language).where(Word.sprint_id == sprint_id))
+        async for words, language in result:
+            exact.update(key for key, _ in tokens(words, language))
+    full_scan = time.perf_counter() - t
+    top = [count for _, count, _ in stats.words.top(args.limit)]
+    expected = [count for _, count in exact.most_common(args.limit)]
+    print(f"exact full scan: {full_scan:.2f}s, {len(exact)} distinct lemmas; "
+          f"top-{args.limit} counts {'match' if top == expected else 'differ: ' + str(top) + ' vs ' + str(expected)}")
+    print()
+    print(render_stats(stats, args.limit))
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--words", type=int, default=300000)
+    parser.add_argument("--new", type=int, default=5000)
+    parser.add_argument("--top-k", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    if os.getenv("BENCH_DATABASE_URL"):
+        os.environ["DATABASE_URL"] = os.environ["BENCH_DATABASE_URL"]
+    else:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='sprintbot-analytics-'), 'bench.db')}"
+    os.environ.setdefault("TELEGRAM_TOKEN", "123:bench")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
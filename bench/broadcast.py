@@ -0,0 +1,49 @@
+"""Broadcast throughput against the in-process fake Bot API.
+
+    python -m bench.broadcast --users 5000 --rate 30 --429-rate 0.01
+"""
+import argparse
+import asyncio
+
+from telegram import Bot
+
+from app.broadcast import BroadcastEngine, ChatLimiter, TokenBucket
+from bench.fake_bot_api import FakeBotAPI, FakeBotRequest
+
+
+async def main(args):
+    api = FakeBotAPI(
+        latency=args.latency / 1000,
+        rate_429=args.rate_429,
+        retry_after=args.retry_after,
+        blocked_rate=args.blocked_rate,
+        seed=42,
+    )
+    bot = Bot("123:fake", request=FakeBotRequest(api))
+    await bot.initialize()
+    engine = BroadcastEngine(
+        bot,
+        concurrency=args.concurrency,
+        bucket=TokenBucket(args.rate),
+        limiter=ChatLimiter(1.0),
+    )
+
+    async def on_progress(stats):
+        print(stats.progress_text("progress"))
+
+    stats = await engine.send(range(1, args.users + 1), "📢 bench", on_progress=on_progress, progress_interval=2)
+    print(stats.summary_text("Broadcast"))
+    print(f"Throughput: {stats.rate:.1f} msg/s (limit {args.rate}/s), API calls: {api.calls}")
+    await bot.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--rate", type=float, default=30)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=50, help="ms per API call")
+    parser.add_argument("--429-rate", dest="rate_429", type=float, default=0.01)
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--blocked-rate", type=float, default=0.02)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,101 @@
+"""Cold start: how soon a freshly started instance answers the first update.
+
+    python -m bench.cold_start --boots 3
+    FAST_BOOT=0 python -m bench.cold_start --boots 3
+
+Starts the fake Bot API, then boots app.main under uvicorn several times
+against the same database (the first boot migrates a fresh schema, later ones
+find it current) and for each boot reports:
+  - ready: process start until POST /webhook is accepted,
+  - reply: process start until the reply to a word submission reached the
+    fake Bot API (this includes validation warm-up),
+  - setWebhook calls made by that boot and the startup phases from /health.
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+import urllib.error
+
+from bench.leader_election import get_json, post_json, spawn, wait_for
+
+FAKE_API_PORT = 8191
+BOT_PORT = 8290
+
+
+def submission(update_id: int) -> dict:
+    return {"update_id": update_id, "message": {
+        "message_id": update_id, "date": int(time.time()), "chat": {"id": 7, "type": "private"},
+        "from": {"id": 7, "is_bot": False, "first_name": "x"}, "text": f"солнце {update_id}"[:20]}}
+
+
+def try_post(url: str, payload: dict) -> bool:
+    try:
+        return post_json(url, payload) == 200
+    except (urllib.error.URLError, ConnectionError, TimeoutError):
+        return False
+
+
+def seed_active_sprint(path: str):
+    with sqlite3.connect(path) as conn:
+        if not conn.execute("SELECT 1 FROM sprints WHERE status = 'active'").fetchone():
+            conn.execute(
+                "INSERT INTO sprints (duration, theme, start_date, end_date, status) "
+                "VALUES (7, 'bench', datetime('now'), datetime('now', '+7 days'), 'active')"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--boots", type=int, default=3)
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix="sprintbot-coldstart-"), "bot.db")
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{db_path}",
+        "TELEGRAM_TOKEN": "123:bench",
+        "ADMIN_IDS": "1",
+        "WEBHOOK_URL": "https://example.invalid/webhook",
+        "TELEGRAM_API_URL": f"http://127.0.0.1:{FAKE_API_PORT}",
+        "FAKE_LATENCY_MS": "0",
+        "FAKE_JITTER_MS": "0",
+        "FAKE_429_RATE": "0",
+        "FAKE_BLOCKED_RATE": "0",
+        "LOG_LEVEL": os.getenv("LOG_LEVEL", "WARNING"),
+    }
+    fake_api = spawn(["bench.fake_bot_api:app", "--port", str(FAKE_API_PORT)], env)
+    try:
+        wait_for(lambda: get_json(f"http://127.0.0.1:{FAKE_API_PORT}/stats") is not None, 15)
+        for boot in range(1, args.boots + 1):
+            before = get_json(f"http://127.0.0.1:{FAKE_API_PORT}/stats")
+            update = submission(boot)
+            started = time.monotonic()
+            bot = spawn(["app.main:app", "--port", str(BOT_PORT)], env)
+            try:
+                if boot == 1:
+                    # Первый запуск создаёт схему; активный спринт нужен, чтобы слова дошли до проверки
+                    wait_for(lambda: get_json(f"http://127.0.0.1:{BOT_PORT}/health") is not None, 60, 0.01)
+                    seed_active_sprint(db_path)
+                    started = None
+                wait_for(lambda: try_post(f"http://127.0.0.1:{BOT_PORT}/webhook", update), 60, 0.01)
+                ready = time.monotonic() - started if started else None
+                sent = before.get("sendMessage", 0)
+                wait_for(lambda: get_json(f"http://127.0.0.1:{FAKE_API_PORT}/stats").get("sendMessage", 0) > sent, 60, 0.01)
+                reply = time.monotonic() - started if started else None
+                health = get_json(f"http://127.0.0.1:{BOT_PORT}/health") or {}
+                calls = get_json(f"http://127.0.0.1:{FAKE_API_PORT}/stats")
+                set_webhook = calls.get("setWebhook", 0) - before.get("setWebhook", 0)
+                timing = f"ready {ready:.2f}s, reply {reply:.2f}s" if started else "schema created (not timed)"
+                print(f"boot {boot}: {timing}, setWebhook calls {set_webhook}, startup {health.get('startup_ms')}")
+            finally:
+                bot.terminate()
+                bot.wait(10)
+    finally:
+        fake_api.terminate()
+        fake_api.wait(10)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Command routing micro-benchmark: one dict lookup vs a chain of CommandHandler checks.
+
+    python -m bench.dispatch --updates 50000
+
+Only routing is measured (finding the callback for an update), not the handlers.
+"""
+import argparse
+import os
+import random
+import time
+
+os.environ.setdefault("TELEGRAM_TOKEN", "123:bench")
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+TEXTS = ["/start", "/whoami", "/help", "/get_words 3", "/list_users a", "/end_sprint 2", "/unknown", "солнце", "море ветер"]
+
+
+def build_updates(count: int, bot) -> list:
+    from telegram import Update
+
+    from bench.webhook_load import make_update
+
+    rnd = random.Random(0)
+    return [Update.de_json(make_update(i, 100 + i % 50, rnd.choice(TEXTS)), bot) for i in range(1, count + 1)]
+
+
+def chain_handlers(bot_command_link):
+    # Так были устроены обработчики до реестра: по CommandHandler на команду плюс два запасных
+    from telegram.ext import CommandHandler, MessageHandler, filters
+
+    async def noop(update, context):
+        pass
+
+    names = ["start", "whoami", "help", "start_sprint", "startsprint", "test_sprint", "end_sprint", "get_words",
+             "list_sprints", "list_users", "broadcast", "reload_profanity"]
+    handlers = [CommandHandler(name, noop, filters=filters.COMMAND | bot_command_link) for name in names]
+    handlers.append(MessageHandler(filters.COMMAND, noop))
+    handlers.append(MessageHandler(filters.TEXT & ~filters.COMMAND, noop))
+    return handlers
+
+
+def registry_handlers(bot_command_link):
+    from telegram.ext import MessageHandler, filters
+
+    async def noop(update, context):
+        pass
+
+    return [MessageHandler(filters.COMMAND | bot_command_link, noop), MessageHandler(filters.TEXT & ~filters.COMMAND, noop)]
+
+
+def route(handlers, update):
+    for handler in handlers:
+        if handler.check_update(update):
+            return handler
+    return None
+
+
+def measure(name: str, route_one, updates: list):
+    started = time.perf_counter()
+    for update in updates:
+        route_one(update)
+    elapsed = time.perf_counter() - started
+    print(f"{name:<36} {len(updates) / elapsed:>12,.0f} updates/s  {elapsed / len(updates) * 1e6:.2f} µs/update")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--updates", type=int, default=50000)
+    args = parser.parse_args()
+
+    from telegram import Bot, User
+
+    from app.bot import bot_command_link, commands
+    from app.commands import split_command
+
+    bot = Bot("123:bench")
+    bot._bot_user = User(1, "Bench", True, username="bench_bot")
+    updates = build_updates(args.updates, bot)
+
+    chain = chain_handlers(bot_command_link)
+    measure("CommandHandler chain", lambda update: route(chain, update), updates)
+
+    registry = registry_handlers(bot_command_link)
+
+    def route_registry(update):
+        handler = route(registry, update)
+        if handler is registry[0]:
+            parsed = split_command(update, "bench_bot")
+            if parsed is not None:
+                commands.get(parsed[0])
+
+    measure("registry (filter + dict lookup)", route_registry, updates)
+
+
+if __name__ == "__main__":
+    main()
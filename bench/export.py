@@ -0,0 +1,63 @@
+"""Export benchmark: seed N words into a temporary SQLite database and time /get_words export.
+
+    python -m bench.export --words 1000000 --format csv
+"""
+import argparse
+import asyncio
+import os
+import random
+import resource
+import sqlite3
+import tempfile
+import time
+
+WORDS = ["солнце", "море", "ветер", "дом", "книга", "sun", "river", "light", "stone", "дорога лес", "hello world"]
+LANGUAGES = ["ru", "en", "uk", "de"]
+
+
+def seed_words(path: str, count: int, sprint_id: int = 1):
+    rnd = random.Random(0)
+    with sqlite3.connect(path) as conn:
+        conn.executemany(
+            "INSERT INTO words (user_id, sprint_id, words, language, submitted_at) VALUES (?, ?, ?, ?, datetime('now'))",
+            ((i, sprint_id, rnd.choice(WORDS), rnd.choice(LANGUAGES)) for i in range(1, count + 1)),
+        )
+
+
+async def run(args):
+    from app.db import SessionLocal, init_db
+    from app.export import close_export, export_sprint_words
+
+    await init_db()
+    started = time.perf_counter()
+    seed_words(os.environ["BENCH_DB_PATH"], args.words)
+    print(f"seeded {args.words} words in {time.perf_counter() - started:.1f}s")
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    async with SessionLocal() as db:
+        parts = await export_sprint_words(db, 1, args.format)
+    elapsed = time.perf_counter() - started
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"exported {sum(p.rows for p in parts)} rows as {args.format} in {elapsed:.2f}s "
+          f"({args.words / elapsed:,.0f} rows/s)")
+    for part in parts:
+        print(f"  {part.filename}: {part.rows} rows, {part.size / 1024 / 1024:.1f} MiB")
+    print(f"peak RSS growth during export: {(rss_after - rss_before) / 1024:.1f} MiB")
+    close_export(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--words", type=int, default=1_000_000)
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix="sprintbot-bench-"), "bench.db")
+    os.environ["BENCH_DB_PATH"] = db_path
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Local fake Telegram Bot API with injectable 429s, blocked chats and latency.
+
+Run as a server and point the bot at it with TELEGRAM_API_URL:
+
+    uvicorn bench.fake_bot_api:app --port 8081
+    TELEGRAM_API_URL=http://localhost:8081 uvicorn app.main:app
+
+or use FakeBotRequest to talk to it in-process without any network.
+"""
+import asyncio
+import json
+import os
+import random
+import time
+from typing import Optional, Tuple
+from urllib.parse import parse_qsl
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from telegram.request import BaseRequest, RequestData
+
+
+class FakeBotAPI:
+    def __init__(
+        self,
+        latency: float = float(os.getenv("FAKE_LATENCY_MS", "50")) / 1000,
+        jitter: float = float(os.getenv("FAKE_JITTER_MS", "20")) / 1000,
+        rate_429: float = float(os.getenv("FAKE_429_RATE", "0.01")),
+        retry_after: int = int(os.getenv("FAKE_RETRY_AFTER", "1")),
+        blocked_rate: float = float(os.getenv("FAKE_BLOCKED_RATE", "0.02")),
+        seed: Optional[int] = None,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.blocked_rate = blocked_rate
+        self.random = random.Random(seed)
+        self.calls: dict[str, int] = {}
+        self.message_id = 0
+        self.webhook_url = ""
+        self.allowed_updates: list[str] = []
+
+    async def call(self, method: str, params: dict) -> Tuple[int, dict]:
+        self.calls[method] = self.calls.get(method, 0) + 1
+        delay = self.latency + self.random.uniform(0, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        if method in ("sendMessage", "sendDocument", "editMessageText"):
+            if self.random.random() < self.rate_429:
+                return 429, {
+                    "ok": False,
+                    "error_code": 429,
+                    "description": f"Too Many Requests: retry after {self.retry_after}",
+                    "parameters": {"retry_after": self.retry_after},
+                }
+            if method == "sendMessage" and self.random.random() < self.blocked_rate:
+                return 403, {"ok": False, "error_code": 403, "description": "Forbidden: bot was blocked by the user"}
+
+        if method == "getMe":
+            result = {"id": 1, "is_bot": True, "first_name": "Fake", "username": "fake_bot"}
+        elif method in ("sendMessage", "sendDocument", "editMessageText"):
+            self.message_id += 1
+            chat_id = params.get("chat_id", 0)
+            result = {
+                "message_id": params.get("message_id", self.message_id),
+                "date": int(time.time()),
+                "chat": {"id": int(chat_id), "type": "private"},
+                "text": params.get("text", ""),
+            }
+        elif method == "getWebhookInfo":
+            result = {"url": self.webhook_url, "has_custom_certificate": False, "pending_update_count": 0}
+            if self.allowed_updates:
+                result["allowed_updates"] = self.allowed_updates
+        elif method == "setWebhook":
+            self.webhook_url = params.get("url", "")
+            allowed_updates = params.get("allowed_updates") or []
+            # PTB передаёт списки строкой JSON
+            self.allowed_updates = json.loads(allowed_updates) if isinstance(allowed_updates, str) else list(allowed_updates)
+            result = True
+        else:
+            result = True
+        return 200, {"ok": True, "result": result}
+
+
+class FakeBotRequest(BaseRequest):
+    """PTB request backend that answers from FakeBotAPI in-process."""
+
+    def __init__(self, api: Optional[FakeBotAPI] = None):
+        self.api = api or FakeBotAPI()
+
+    @property
+    def read_timeout(self) -> Optional[float]:
+        return None
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+    async def do_request(
+        self,
+        url: str,
+        method: str,
+        request_data: Optional[RequestData] = None,
+        read_timeout=BaseRequest.DEFAULT_NONE,
+        write_timeout=BaseRequest.DEFAULT_NONE,
+        connect_timeout=BaseRequest.DEFAULT_NONE,
+        pool_timeout=BaseRequest.DEFAULT_NONE,
+    ) -> Tuple[int, bytes]:
+        params = request_data.parameters if request_data else {}
+        status, body = await self.api.call(url.rsplit("/", 1)[-1], params)
+        return status, json.dumps(body).encode()
+
+
+fake_api = FakeBotAPI()
+app = FastAPI()
+
+
+@app.post("/bot{token}/{method}")
+async def bot_method(token: str, method: str, request: Request):
+    params: dict = {}
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("application/json"):
+        params = await request.json()
+    elif content_type.startswith("application/x-www-form-urlencoded"):
+        # PTB шлёт обычные методы формой; разбираем сами, чтобы не требовать python-multipart
+        params = dict(parse_qsl((await request.body()).decode()))
+    elif content_type.startswith("multipart/"):
+        params = dict(await request.form())
+    status, body = await fake_api.call(method, params)
+    return JSONResponse(body, status_code=status)
+
+
+@app.get("/stats")
+async def stats():
+    return fake_api.calls
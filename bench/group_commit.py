@@ -0,0 +1,92 @@
+"""Word submissions per second with and without group commit.
+
+    python -m bench.group_commit --submissions 5000 --concurrency 32
+    BENCH_DATABASE_URL=postgresql://... python -m bench.group_commit
+
+Simulates the burst right after a sprint-start broadcast: `concurrency`
+users submit at the same time, each submission has to be durable before the
+reply. "direct" is crud.submit_words with a session and commit per
+submission, "buffered" goes through SubmissionBuffer.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+
+async def run_mode(mode: str, args, first_user: int) -> dict:
+    from app.crud import submit_words
+    from app.db import SessionLocal
+    from app.submission_buffer import SubmissionBuffer
+
+    buffer = SubmissionBuffer(batch_wait=args.batch_wait_ms / 1000, batch_size=args.batch_size)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = []
+
+    async def submit(user_id: int):
+        async with semaphore:
+            started = time.perf_counter()
+            if mode == "buffered":
+                inserted = await buffer.submit(user_id, [1], "солнце", "ru")
+            else:
+                async with SessionLocal() as db:
+                    inserted = await submit_words(db, user_id, [1], "солнце", "ru")
+            assert inserted == [1]
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(submit(first_user + i) for i in range(args.submissions)))
+    elapsed = time.perf_counter() - started
+    await buffer.stop()
+    latencies.sort()
+    return {
+        "rate": args.submissions / elapsed,
+        "commits": buffer.batches if mode == "buffered" else args.submissions,
+        "p50": statistics.median(latencies) * 1000,
+        "p99": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+async def run(args):
+    from sqlalchemy import insert
+
+    from app.db import SessionLocal, engine, init_db
+    from app.models import Sprint
+
+    await init_db()
+    async with SessionLocal() as db:
+        if await db.get(Sprint, 1) is None:
+            await db.execute(insert(Sprint).values(id=1, duration=7, theme="bench"))
+            await db.commit()
+    print(f"{engine.dialect.name}: {args.submissions} submissions, concurrency {args.concurrency}")
+    for index, mode in enumerate(("direct", "buffered")):
+        # Разные пользователи в каждом режиме, чтобы все вставки были новыми
+        result = await run_mode(mode, args, 10_000_000 * (index + 1) + int(time.time()) % 1_000_000 * 10)
+        print(
+            f"{mode:<9} {result['rate']:8.0f} submissions/s  {result['commits']:6} commits  "
+            f"p50 {result['p50']:7.1f} ms  p99 {result['p99']:7.1f} ms"
+        )
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--submissions", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--batch-wait-ms", type=float, default=5)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    if os.getenv("BENCH_DATABASE_URL"):
+        os.environ["DATABASE_URL"] = os.environ["BENCH_DATABASE_URL"]
+    else:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='sprintbot-gc-'), 'bench.db')}"
+    os.environ.setdefault("TELEGRAM_TOKEN", "123:bench")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
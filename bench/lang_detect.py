@@ -0,0 +1,65 @@
+"""Language detection micro-benchmark on a realistic sprint corpus (1-3 words, heavy repetition).
+
+    python -m bench.lang_detect --samples 20000
+"""
+import argparse
+import random
+import time
+
+VOCABULARY = [
+    "солнце", "море", "ветер", "дом", "книга", "дорога домой", "тёплый вечер", "первый снег",
+    "кот", "счастье", "весна пришла", "любовь", "дружба навсегда", "мечта", "свобода",
+    "sun", "river", "light", "stone", "hello world", "good morning", "deep blue sea", "freedom",
+    "сонце", "їжак", "щастя", "дім", "вітер", "Straße", "Liebe", "mañana", "corazón",
+    "amour", "bonjour", "ciao bella", "こんにちは", "사랑", "καλημέρα", "szczęście", "łza",
+]
+
+
+def zipf_corpus(size: int, seed: int = 0) -> list[str]:
+    rnd = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(len(VOCABULARY))]
+    return rnd.choices(VOCABULARY, weights=weights, k=size)
+
+
+def measure(name: str, detect, corpus: list[str]):
+    started = time.perf_counter()
+    for text in corpus:
+        detect(text)
+    elapsed = time.perf_counter() - started
+    print(f"{name:<32} {len(corpus) / elapsed:>12,.0f} detections/s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--samples", type=int, default=20000)
+    args = parser.parse_args()
+    corpus = zipf_corpus(args.samples)
+
+    from langdetect import DetectorFactory, detect
+    from langdetect.lang_detect_exception import LangDetectException
+
+    from app import lang_detect
+
+    DetectorFactory.seed = 0
+
+    def baseline(text):
+        try:
+            return detect(text)
+        except LangDetectException:
+            return ""
+
+    baseline(corpus[0])  # загрузка профилей не входит в замер
+    measure("langdetect.detect (before)", baseline, corpus)
+    lang_detect.warm_up()
+    measure("model only, shared factory", lambda t: lang_detect._detect_with_model(lang_detect.normalize_text(t)), corpus)
+    measure("script fast path only", lambda t: lang_detect.detect_script_language(lang_detect.normalize_text(t)), corpus)
+    lang_detect._detect_normalized.cache_clear()
+    measure("detect_language (cold cache)", lang_detect.detect_language, corpus)
+    measure("detect_language (warm cache)", lang_detect.detect_language, corpus)
+    print(f"cache: {lang_detect.cache_info()}")
+    settled = sum(1 for word in VOCABULARY if lang_detect.detect_script_language(lang_detect.normalize_text(word)))
+    print(f"fast path settles {settled}/{len(VOCABULARY)} distinct vocabulary entries")
+
+
+if __name__ == "__main__":
+    main()
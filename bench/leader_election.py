@@ -0,0 +1,128 @@
+"""Run several bot instances against one SQLite file and check that exactly one leads.
+
+    python -m bench.leader_election --instances 3
+
+Starts the fake Bot API and N uvicorn processes of app.main (each with its own
+port, sharing DATABASE_URL), then:
+  1. waits until one instance reports leader=true in /health,
+  2. checks setWebhook was called once,
+  3. kills the leader and measures how long the takeover takes,
+  4. posts an update to a follower's /webhook to show every instance serves it.
+"""
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+FAKE_API_PORT = 8181
+BASE_PORT = 8200
+
+
+def get_json(url: str):
+    try:
+        with urllib.request.urlopen(url, timeout=5) as response:
+            return json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return json.loads(e.read())
+    except (urllib.error.URLError, ConnectionError, TimeoutError):
+        return None
+
+
+def post_json(url: str, payload: dict) -> int:
+    request = urllib.request.Request(url, json.dumps(payload).encode(), {"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=5) as response:
+        return response.status
+
+
+def wait_for(predicate, timeout: float, interval: float = 0.25):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        result = predicate()
+        if result:
+            return result
+        time.sleep(interval)
+    return None
+
+
+def leaders(ports: list[int]) -> list[int]:
+    found = []
+    for port in ports:
+        health = get_json(f"http://127.0.0.1:{port}/health")
+        if health and health.get("leader"):
+            found.append(port)
+    return found
+
+
+def spawn(args: list[str], env: dict) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", *args], env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--instances", type=int, default=3)
+    parser.add_argument("--ttl", type=float, default=6)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="sprintbot-leader-")
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{os.path.join(tmpdir, 'bot.db')}",
+        "TELEGRAM_TOKEN": "123:bench",
+        "ADMIN_IDS": "1",
+        "WEBHOOK_URL": "https://example.invalid/webhook",
+        "TELEGRAM_API_URL": f"http://127.0.0.1:{FAKE_API_PORT}",
+        "VALIDATION_EXECUTOR": "thread",
+        "LEADER_LEASE_TTL": str(args.ttl),
+        "LEADER_RENEW_INTERVAL": str(args.ttl / 3),
+        "FAKE_LATENCY_MS": "0",
+        "FAKE_429_RATE": "0",
+        "FAKE_BLOCKED_RATE": "0",
+        "LOG_LEVEL": os.getenv("LOG_LEVEL", "WARNING"),
+    }
+    processes: dict[int, subprocess.Popen] = {}
+    fake_api = spawn(["bench.fake_bot_api:app", "--port", str(FAKE_API_PORT)], env)
+    try:
+        wait_for(lambda: get_json(f"http://127.0.0.1:{FAKE_API_PORT}/stats") is not None, 15)
+        ports = [BASE_PORT + i for i in range(args.instances)]
+        for port in ports:
+            processes[port] = spawn(["app.main:app", "--port", str(port)], env)
+        wait_for(lambda: all(get_json(f"http://127.0.0.1:{p}/health") for p in ports), 60)
+
+        current = wait_for(lambda: leaders(ports), 30)
+        print(f"leaders after start: {current}")
+        calls = get_json(f"http://127.0.0.1:{FAKE_API_PORT}/stats")
+        print(f"setWebhook calls: {calls.get('setWebhook', 0)}")
+
+        follower = next(p for p in ports if p not in (current or []))
+        status = post_json(f"http://127.0.0.1:{follower}/webhook", {"update_id": 1, "message": {
+            "message_id": 1, "date": int(time.time()), "chat": {"id": 5, "type": "private"},
+            "from": {"id": 5, "is_bot": False, "first_name": "x"}, "text": "/whoami",
+            "entities": [{"type": "bot_command", "offset": 0, "length": 7}]}})
+        print(f"follower {follower} /webhook -> {status}")
+
+        if current:
+            leader = current[0]
+            killed_at = time.monotonic()
+            processes.pop(leader).send_signal(signal.SIGKILL)
+            remaining = [p for p in ports if p != leader]
+            new_leader = wait_for(lambda: leaders(remaining), args.ttl * 3)
+            print(f"killed leader {leader}; new leader {new_leader} after {time.monotonic() - killed_at:.1f}s")
+            calls = get_json(f"http://127.0.0.1:{FAKE_API_PORT}/stats")
+            print(f"setWebhook calls: {calls.get('setWebhook', 0)}, sendMessage calls: {calls.get('sendMessage', 0)}")
+    finally:
+        for process in [*processes.values(), fake_api]:
+            process.terminate()
+        for process in [*processes.values(), fake_api]:
+            process.wait(10)
+
+
+if __name__ == "__main__":
+    main()
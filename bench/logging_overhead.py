@@ -0,0 +1,53 @@
+"""Compare webhook throughput under different logging configurations.
+
+    python -m bench.logging_overhead --updates 2000
+
+Runs bench.webhook_load in a fresh process per configuration (logging is set up
+at import time) with stderr sent to /dev/null, so only the cost of producing
+and formatting records is measured, not the terminal.
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+CONFIGS = [
+    ("DEBUG, text", {"LOG_LEVEL": "DEBUG", "LOG_FORMAT": "text"}),
+    ("DEBUG, json", {"LOG_LEVEL": "DEBUG", "LOG_FORMAT": "json"}),
+    ("DEBUG, json, 1% sampled", {"LOG_LEVEL": "DEBUG", "LOG_FORMAT": "json", "LOG_SAMPLING": "app=0.01,telegram=0.01,httpx=0.01"}),
+    ("production defaults", {"APP_ENV": "production"}),
+    ("WARNING", {"LOG_LEVEL": "WARNING"}),
+]
+
+
+def run_config(env_overrides: dict, args) -> str:
+    env = {**os.environ, **env_overrides}
+    result = subprocess.run(
+        [sys.executable, "-m", "bench.webhook_load", "--updates", str(args.updates), "--concurrency", str(args.concurrency)],
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+        check=True,
+    )
+    return result.stdout
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--updates", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    for name, env_overrides in CONFIGS:
+        output = run_config(env_overrides, args)
+        match = re.search(r"throughput: ([\d.]+) updates/s processed", output)
+        latency = re.search(r"ack latency p50: ([\d.]+) ms, p99: ([\d.]+) ms", output)
+        throughput = match.group(1) if match else "?"
+        p50, p99 = latency.groups() if latency else ("?", "?")
+        print(f"{name:<28} {throughput:>8} updates/s   ack p50 {p50} ms, p99 {p99} ms")
+
+
+if __name__ == "__main__":
+    main()
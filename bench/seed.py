@@ -0,0 +1,81 @@
+"""Seed the database with synthetic users, sprints and words through app.bulk_import.
+
+    DATABASE_URL=postgresql://... python -m bench.seed --users 1000000 --sprints 20 --participation 0.3
+
+Rows are generated lazily and written in chunks, so millions of rows need no
+more memory than one chunk. The last sprint is left active.
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+
+WORDS = ["солнце", "море", "ветер", "дом", "книга", "дорога", "лес", "sun", "river", "light", "stone", "hello world"]
+LANGUAGES = ["ru", "ru", "ru", "en", "uk"]
+FIRST_USER_ID = 1000000
+
+
+def users(count: int, now: datetime, seed: int = 1):
+    rnd = random.Random(seed)
+    for user_id in range(FIRST_USER_ID, FIRST_USER_ID + count):
+        yield user_id, f"user{user_id}", now - timedelta(seconds=rnd.randrange(90 * 86400))
+
+
+def sprints(count: int, now: datetime):
+    for sprint_id in range(1, count + 1):
+        # Завершённые спринты идут подряд по неделе, последний — активный
+        end = now - timedelta(days=7 * (count - sprint_id)) + timedelta(days=1)
+        status = "active" if sprint_id == count else "completed"
+        yield sprint_id, 7, f"bench {sprint_id}", end - timedelta(days=7), end, status
+
+
+def words(user_count: int, sprint_count: int, participation: float, now: datetime, seed: int = 2):
+    rnd = random.Random(seed)
+    for sprint_id in range(1, sprint_count + 1):
+        end = now - timedelta(days=7 * (sprint_count - sprint_id)) + timedelta(days=1)
+        for user_id in range(FIRST_USER_ID, FIRST_USER_ID + user_count):
+            if rnd.random() >= participation:
+                continue
+            submitted_at = min(end, now) - timedelta(seconds=rnd.randrange(6 * 86400))
+            yield user_id, sprint_id, rnd.choice(WORDS), rnd.choice(LANGUAGES), submitted_at
+
+
+async def seed(user_count: int, sprint_count: int, participation: float, chunk_size: int = 10000) -> dict:
+    """Create the schema and load synthetic data; returns rows written per table."""
+    from app.bulk_import import bulk_insert
+    from app.db import init_db
+
+    await init_db()
+    now = datetime.utcnow()
+    counts = {}
+    for table, rows in (
+        ("users", users(user_count, now)),
+        ("sprints", sprints(sprint_count, now)),
+        ("words", words(user_count, sprint_count, participation, now)),
+    ):
+        started = time.perf_counter()
+        counts[table] = await bulk_insert(table, rows, chunk_size=chunk_size)
+        elapsed = time.perf_counter() - started
+        print(f"seeded {table}: {counts[table]} rows in {elapsed:.1f}s ({counts[table] / elapsed:,.0f} rows/s)")
+    return counts
+
+
+async def run(args):
+    from app.db import engine
+
+    await seed(args.users, args.sprints, args.participation, args.chunk_size)
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--sprints", type=int, default=10)
+    parser.add_argument("--participation", type=float, default=0.3, help="share of users submitting in each sprint")
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
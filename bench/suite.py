@@ -0,0 +1,232 @@
+"""Synthetic load suite: seed a database, replay updates through /webhook, report p50/p99.
+
+    python -m bench.suite --users 100000 --save bench-baseline.json
+    python -m bench.suite --users 100000 --baseline bench-baseline.json --tolerance 0.25
+
+Scenarios: word submissions, /start by new users and again by the same users,
+/get_words on the seeded active sprint, daily_report and a broadcast to seeded
+users. Bot API calls go to the in-process FakeBotAPI, so nothing leaves the
+machine. Update latency is measured from the POST to the moment the
+dispatcher finished processing it.
+
+With --baseline the run fails (exit code 1) when a scenario's throughput drops
+or its p99 grows by more than --tolerance; --save writes the results for the
+next comparison. By default a throwaway SQLite file is used; set
+BENCH_DATABASE_URL to run against PostgreSQL.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+from bench.webhook_load import WORDS, make_update
+
+ADMIN_ID = 1
+
+
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def summarize(ops: int, elapsed: float, latencies: list[float], unit: str = "updates") -> dict:
+    return {
+        "ops": ops,
+        "unit": unit,
+        "throughput": ops / elapsed if elapsed > 0 else 0.0,
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+
+def compare(baseline: dict, results: dict, tolerance: float) -> list[str]:
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        if result["throughput"] < before["throughput"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {result['throughput']:.1f} < {before['throughput']:.1f}")
+        if result["p99_ms"] > before["p99_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p99 {result['p99_ms']:.1f} ms > {before['p99_ms']:.1f} ms")
+    return regressions
+
+
+class Harness:
+    def __init__(self, client, dispatcher, concurrency: int):
+        self.client = client
+        self.dispatcher = dispatcher
+        self.concurrency = concurrency
+        self.next_update_id = 1
+        self.posted: dict[int, float] = {}
+        self.done: dict[int, float] = {}
+        process = dispatcher.process
+
+        async def timed_process(data: dict):
+            try:
+                await process(data)
+            finally:
+                self.done[data["update_id"]] = time.perf_counter()
+
+        dispatcher.process = timed_process
+
+    def update(self, user_id: int, text: str) -> dict:
+        update = make_update(self.next_update_id, user_id, text)
+        self.next_update_id += 1
+        return update
+
+    async def replay(self, updates: list[dict], concurrency: int = 0) -> dict:
+        semaphore = asyncio.Semaphore(concurrency or self.concurrency)
+
+        async def post(update: dict):
+            async with semaphore:
+                self.posted[update["update_id"]] = time.perf_counter()
+                response = await self.client.post("/webhook", json=update)
+                if response.status_code != 200:
+                    raise RuntimeError(f"/webhook answered {response.status_code}")
+                if concurrency == 1:
+                    # Последовательный сценарий: следующий апдейт только после обработки предыдущего
+                    await self.dispatcher.join()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(post(update) for update in updates))
+        await self.dispatcher.join()
+        elapsed = time.perf_counter() - started
+        latencies = [self.done[u["update_id"]] - self.posted[u["update_id"]] for u in updates]
+        return summarize(len(updates), elapsed, latencies)
+
+
+async def run_scenarios(args, first_user_id: int, active_sprint_id: int) -> dict:
+    import httpx
+    from telegram.ext import Application
+
+    from app import main as app_main
+    from app.bot import setup_bot
+    from app.broadcast import BroadcastEngine, ChatLimiter, TokenBucket
+    from app.db import SessionLocal
+    from app.scheduler import daily_report
+    from bench.fake_bot_api import FakeBotAPI, FakeBotRequest
+
+    api = FakeBotAPI(latency=args.api_latency_ms / 1000, jitter=0, rate_429=0, blocked_rate=0, seed=1)
+    telegram_app = Application.builder().token("123:bench").request(FakeBotRequest(api)).build()
+    setup_bot(telegram_app)
+    await telegram_app.initialize()
+    dispatcher = app_main.start_update_processing(telegram_app)
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app_main.app), base_url="http://bench")
+    harness = Harness(client, dispatcher, args.concurrency)
+    # Новые пользователи, которых нет в засеянных данных
+    new_user = iter(range(first_user_id + args.users, first_user_id + args.users + 10 * args.updates))
+    results = {}
+    try:
+        results["submissions"] = await harness.replay(
+            [harness.update(next(new_user), WORDS[i % len(WORDS)]) for i in range(args.updates)]
+        )
+        start_users = [next(new_user) for _ in range(args.updates)]
+        results["start"] = await harness.replay([harness.update(user_id, "/start") for user_id in start_users])
+        # Повторный /start тех же пользователей: обычный случай, в базу писать нечего
+        results["start_repeat"] = await harness.replay([harness.update(user_id, "/start") for user_id in start_users])
+        results["get_words"] = await harness.replay(
+            [harness.update(ADMIN_ID, f"/get_words {active_sprint_id}") for _ in range(args.exports)], concurrency=1
+        )
+
+        latencies = []
+        started = time.perf_counter()
+        for _ in range(args.reports):
+            report_started = time.perf_counter()
+            async with SessionLocal() as db:
+                await daily_report(telegram_app.bot, db)
+            latencies.append(time.perf_counter() - report_started)
+        results["daily_report"] = summarize(args.reports, time.perf_counter() - started, latencies, "reports")
+
+        # Лимиты Telegram здесь не измеряем: ведро и пауза на чат не должны ограничивать движок
+        broadcast_api = FakeBotAPI(latency=args.api_latency_ms / 1000, jitter=0, rate_429=0, blocked_rate=0.02, seed=2)
+        broadcast_app = Application.builder().token("123:bench").request(FakeBotRequest(broadcast_api)).build()
+        await broadcast_app.initialize()
+        engine = BroadcastEngine(broadcast_app.bot, bucket=TokenBucket(1e9), limiter=ChatLimiter(0))
+        recipients = min(args.broadcast, args.users)
+        sent_at: dict[int, float] = {}
+        latencies = []
+        send_message = broadcast_api.call
+
+        async def timed_call(method: str, params: dict):
+            chat_id = int(params.get("chat_id", 0))
+            sent_at.setdefault(chat_id, time.perf_counter())
+            try:
+                return await send_message(method, params)
+            finally:
+                latencies.append(time.perf_counter() - sent_at.pop(chat_id))
+
+        broadcast_api.call = timed_call
+        stats = await engine.send(range(first_user_id, first_user_id + recipients), "bench broadcast")
+        results["broadcast"] = summarize(stats.processed, stats.elapsed, latencies, "messages")
+        await broadcast_app.shutdown()
+    finally:
+        await client.aclose()
+        await dispatcher.stop()
+        await telegram_app.shutdown()
+    return results
+
+
+async def run(args) -> dict:
+    from app.db import engine
+    from bench.seed import FIRST_USER_ID, seed
+
+    counts = await seed(args.users, args.sprints, args.participation)
+    print(f"seeded: {counts}")
+    try:
+        return await run_scenarios(args, FIRST_USER_ID, active_sprint_id=args.sprints)
+    finally:
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=20000, help="seeded users")
+    parser.add_argument("--sprints", type=int, default=5, help="seeded sprints, the last one active")
+    parser.add_argument("--participation", type=float, default=0.3)
+    parser.add_argument("--updates", type=int, default=1000, help="updates per submission and /start scenario")
+    parser.add_argument("--exports", type=int, default=5, help="/get_words requests")
+    parser.add_argument("--reports", type=int, default=5, help="daily_report runs")
+    parser.add_argument("--broadcast", type=int, default=5000, help="broadcast recipients")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--api-latency-ms", type=float, default=5)
+    parser.add_argument("--save", help="write results as JSON")
+    parser.add_argument("--baseline", help="compare with results saved by --save")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    if os.getenv("BENCH_DATABASE_URL"):
+        os.environ["DATABASE_URL"] = os.environ["BENCH_DATABASE_URL"]
+    else:
+        db_path = os.path.join(tempfile.mkdtemp(prefix="sprintbot-suite-"), "bench.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ.setdefault("TELEGRAM_TOKEN", "123:bench")
+    os.environ.setdefault("ADMIN_IDS", str(ADMIN_ID))
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    results = asyncio.run(run(args))
+    print(f"{'scenario':<14}{'ops':>8}{'throughput':>18}{'p50 ms':>10}{'p99 ms':>10}")
+    for name, result in results.items():
+        throughput = f"{result['throughput']:.1f} {result['unit']}/s"
+        print(f"{name:<14}{result['ops']:>8}{throughput:>18}{result['p50_ms']:>10.1f}{result['p99_ms']:>10.1f}")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(json.load(f), results, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print(f"no regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
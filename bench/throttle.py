@@ -0,0 +1,90 @@
+"""Flood through /webhook with and without per-user throttling.
+
+    python -m bench.throttle --spam 2000 --users 100
+    python -m bench.throttle --spam 2000 --users 100 --disable
+
+One user floods the bot with `spam` messages while `users` regular users send
+two words each. Reports how many updates reached the handlers or were
+rejected by the full queue, SQL statements executed and Bot API calls made, plus the cost of one
+UserThrottle.check() call.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import timeit
+
+SPAMMER_ID = 999
+
+
+async def run(args):
+    import httpx
+    from telegram.ext import Application
+
+    from app import main as app_main
+    from app.bot import setup_bot
+    from app.db import init_db
+    from app.metrics import DB_QUERIES
+    from app.sprint_cache import active_sprint_cache
+    from app.throttle import UserThrottle
+    from bench.fake_bot_api import FakeBotAPI, FakeBotRequest
+    from bench.webhook_load import make_update, seed_active_sprint
+
+    await init_db()
+    seed_active_sprint(os.environ["BENCH_DB_PATH"])
+    await active_sprint_cache.refresh()
+    api = FakeBotAPI(latency=0.005, jitter=0, rate_429=0, blocked_rate=0, seed=1)
+    telegram_app = Application.builder().token("123:bench").request(FakeBotRequest(api)).build()
+    setup_bot(telegram_app)
+    await telegram_app.initialize()
+    dispatcher = app_main.start_update_processing(telegram_app)
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app_main.app), base_url="http://bench")
+
+    updates = [make_update(i, SPAMMER_ID, f"спам {i}") for i in range(1, args.spam + 1)]
+    update_id = args.spam
+    for round_ in range(2):
+        for user in range(args.users):
+            update_id += 1
+            updates.append(make_update(update_id, 100000 + user, ["солнце", "море"][round_]))
+
+    queries_before = DB_QUERIES._value.get()
+    started = time.perf_counter()
+    for update in updates:
+        await client.post("/webhook", json=update)
+    await dispatcher.join()
+    elapsed = time.perf_counter() - started
+    await asyncio.sleep(0.1)
+
+    print(f"throttling {'off' if args.disable else 'on'}: {len(updates)} updates posted in {elapsed:.2f}s")
+    print(f"reached handlers: {dispatcher.stats['processed']}, rejected by the queue: {dispatcher.stats['rejected']}, SQL statements: {DB_QUERIES._value.get() - queries_before:.0f}, "
+          f"Bot API calls: {sum(api.calls.values())}")
+    throttle = UserThrottle()
+    user_ids = iter(range(10**9))
+    per_call = min(timeit.repeat(lambda: throttle.check(next(user_ids) % 50000), number=100000, repeat=3)) / 100000
+    print(f"UserThrottle.check: {per_call * 1e9:.0f} ns/call, 50000 users tracked")
+
+    await client.aclose()
+    await dispatcher.stop()
+    await telegram_app.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--spam", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--disable", action="store_true")
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix="sprintbot-throttle-"), "bench.db")
+    os.environ["BENCH_DB_PATH"] = db_path
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ["THROTTLE_ENABLED"] = "0" if args.disable else "1"
+    os.environ.setdefault("TELEGRAM_TOKEN", "123:bench")
+    os.environ.setdefault("ADMIN_IDS", "1")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Requests/sec of the /webhook endpoint alone, replaying a corpus of updates.
+
+    python -m bench.webhook_ingest --requests 20000
+    python -m bench.webhook_ingest --corpus my-updates.jsonl
+
+The corpus holds one Telegram update per line, in the exact JSON Telegram
+delivers (bench/corpus/updates.jsonl: a private-bot mix of text messages,
+commands, inline buttons, edits, stickers, photos, channel posts and member
+updates). Requests go straight into the ASGI app, without HTTP or httpx, and
+the dispatcher is replaced by a counter, so only decoding, filtering and the
+response are measured. Flood control is off, since the corpus cycles through
+a few dozen users. Works on older revisions too, for before/after numbers:
+
+    git stash && python -m bench.webhook_ingest; git stash pop && python -m bench.webhook_ingest
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+import timeit
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus", "updates.jsonl")
+
+
+class CountingDispatcher:
+    def __init__(self):
+        self.submitted = 0
+
+    def submit(self, data: dict) -> str:
+        self.submitted += 1
+        return "queued"
+
+
+async def post(app, body: bytes) -> int:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/webhook",
+        "raw_path": b"/webhook",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+    received = False
+    status = 0
+
+    async def receive():
+        nonlocal received
+        if received:
+            return {"type": "http.disconnect"}
+        received = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def run(args):
+    from app.main import app
+
+    with open(args.corpus, "rb") as f:
+        bodies = [line.strip() for line in f if line.strip()]
+    dispatcher = CountingDispatcher()
+    app.state.dispatcher = dispatcher
+
+    for body in bodies:
+        await post(app, body)  # прогрев: маршруты, импорты, кэши
+    dispatcher.submitted = 0
+    errors = 0
+    started = time.perf_counter()
+    for i in range(args.requests):
+        if await post(app, bodies[i % len(bodies)]) != 200:
+            errors += 1
+    elapsed = time.perf_counter() - started
+
+    print(f"corpus: {len(bodies)} updates, {sum(map(len, bodies)) / len(bodies):.0f} bytes on average")
+    print(f"/webhook: {args.requests / elapsed:,.0f} requests/s ({elapsed / args.requests * 1e6:.0f} us/request), "
+          f"{dispatcher.submitted} queued, {args.requests - dispatcher.submitted - errors} dropped early, {errors} errors")
+
+    stdlib = min(timeit.repeat(lambda: [json.loads(b) for b in bodies], number=50, repeat=3)) / (50 * len(bodies))
+    line = f"JSON decoding: json {stdlib * 1e6:.1f} us/update"
+    try:
+        import orjson
+        fast = min(timeit.repeat(lambda: [orjson.loads(b) for b in bodies], number=50, repeat=3)) / (50 * len(bodies))
+        line += f", orjson {fast * 1e6:.1f} us/update"
+    except ImportError:
+        pass
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--corpus", default=CORPUS)
+    args = parser.parse_args()
+
+    os.environ.setdefault("TELEGRAM_TOKEN", "123:bench")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ["THROTTLE_ENABLED"] = "0"
+    os.environ.pop("WEBHOOK_SECRET", None)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Webhook load test: POST synthetic updates to /webhook in-process and report updates/sec.
+
+    python -m bench.webhook_load --updates 2000 --concurrency 50
+
+Works against the current tree and against older revisions whose setup_bot()
+still takes a shared session, so before/after numbers come from the same script:
+
+    git stash && python -m bench.webhook_load; git stash pop && python -m bench.webhook_load
+"""
+import argparse
+import asyncio
+import inspect
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+
+WORDS = ["солнце", "море", "ветер", "дом", "книга", "sun", "river", "light", "stone", "дорога лес", "hello world"]
+
+
+def make_update(update_id: int, user_id: int, text: str) -> dict:
+    message = {
+        "message_id": update_id,
+        "date": int(time.time()),
+        "chat": {"id": user_id, "type": "private"},
+        "from": {"id": user_id, "is_bot": False, "first_name": "Bench", "username": f"user{user_id}"},
+        "text": text,
+    }
+    if text.startswith("/"):
+        message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+    return {"update_id": update_id, "message": message}
+
+
+def synthetic_updates(count: int, users: int):
+    for i in range(1, count + 1):
+        user_id = 100000 + i % users
+        text = "/start" if i % 10 == 0 else WORDS[i % len(WORDS)]
+        yield make_update(i, user_id, text)
+
+
+def seed_active_sprint(path: str):
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            "INSERT INTO sprints (duration, theme, start_date, end_date, status) "
+            "VALUES (7, 'bench', datetime('now'), datetime('now', '+7 days'), 'active')"
+        )
+
+
+async def maybe_await(value):
+    if inspect.isawaitable(value):
+        return await value
+    return value
+
+
+async def build_app():
+    import httpx
+    from telegram.ext import Application
+
+    from app import db as app_db
+    from app.bot import setup_bot
+    from app import main as app_main
+    from app.main import app
+    from bench.fake_bot_api import FakeBotAPI, FakeBotRequest
+
+    await maybe_await(app_db.init_db())
+    seed_active_sprint(os.environ["BENCH_DB_PATH"])
+
+    api = FakeBotAPI(latency=float(os.getenv("FAKE_LATENCY_MS", "20")) / 1000, rate_429=0, blocked_rate=0, seed=1)
+    telegram_app = Application.builder().token("123:bench").request(FakeBotRequest(api)).build()
+    if "db" in inspect.signature(setup_bot).parameters:
+        # старый вариант: одна общая синхронная сессия на всё приложение
+        setup_bot(telegram_app, app_db.SessionLocal())
+    else:
+        setup_bot(telegram_app)
+    await telegram_app.initialize()
+    if hasattr(app_main, "start_update_processing"):
+        app_main.start_update_processing(telegram_app)
+    else:
+        app.state.telegram_app = telegram_app
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+    return app, client, telegram_app
+
+
+async def run(args):
+    app, client, telegram_app = await build_app()
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies: list[float] = []
+    errors = 0
+
+    async def post(update: dict):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.post("/webhook", json=update)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(post(u) for u in synthetic_updates(args.updates, args.users)))
+    acked = time.perf_counter() - started
+    dispatcher = getattr(app.state, "dispatcher", None)
+    if dispatcher is not None:
+        # вебхук отвечает до обработки: ждём, пока воркеры разберут очередь
+        await dispatcher.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"updates: {args.updates}, concurrency: {args.concurrency}, errors: {errors}")
+    print(f"throughput: {args.updates / elapsed:.1f} updates/s processed, {args.updates / acked:.1f} updates/s acknowledged")
+    if dispatcher is not None:
+        print(f"queue: {dispatcher.snapshot()}")
+    print(f"ack latency p50: {statistics.median(latencies) * 1000:.1f} ms, "
+          f"p99: {latencies[int(len(latencies) * 0.99) - 1] * 1000:.1f} ms")
+    await client.aclose()
+    if dispatcher is not None:
+        await dispatcher.stop()
+    await telegram_app.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--updates", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="sprintbot-bench-")
+    db_path = os.path.join(tmpdir, "bench.db")
+    os.environ["BENCH_DB_PATH"] = db_path
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ.setdefault("TELEGRAM_TOKEN", "123:bench")
+    os.environ.setdefault("ADMIN_IDS", "1")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
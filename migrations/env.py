@@ -0,0 +1,44 @@
+import asyncio
+
+from alembic import context
+
+from app.models import Base
+
+config = context.config
+target_metadata = Base.metadata
+
+
+def run_migrations(connection):
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        # SQLite не умеет ALTER большинства ограничений: alembic пересоздаёт таблицу
+        render_as_batch=connection.dialect.name == "sqlite",
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+async def run_async_migrations():
+    from app.db import engine
+
+    async with engine.connect() as connection:
+        await connection.run_sync(run_migrations)
+
+
+def run_migrations_offline():
+    from app.config import DATABASE_URL
+    from app.db import sync_database_url
+
+    context.configure(url=sync_database_url(DATABASE_URL), target_metadata=target_metadata, literal_binds=True)
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+elif config.attributes.get("connection") is not None:
+    # Вызов из app.db.init_db: соединение (и блокировка схемы) уже открыты
+    run_migrations(config.attributes["connection"])
+else:
+    asyncio.run(run_async_migrations())
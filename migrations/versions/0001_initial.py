@@ -0,0 +1,110 @@
+"""Initial schema
+
+Базы, созданные раньше через create_all, проходят эту миграцию без изменений:
+таблицы и индексы создаются только если их ещё нет.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 12:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Дубли (user_id, sprint_id) от гонки check-then-insert в старом обработчике: оставляем
+# самую раннюю заявку, иначе уникальный индекс не построится и ни один воркер не стартует
+DELETE_DUPLICATE_WORDS = """
+DELETE FROM words WHERE id IN (
+    SELECT w.id FROM words w
+    JOIN (
+        SELECT user_id, sprint_id, MIN(id) AS keep_id FROM words
+        GROUP BY user_id, sprint_id HAVING COUNT(*) > 1
+    ) d ON w.user_id = d.user_id AND w.sprint_id = d.sprint_id AND w.id <> d.keep_id
+)
+"""
+
+INDEXES = (
+    ("ix_users_joined_at", "users", ["joined_at"], {}),
+    ("ix_users_username_prefix", "users", ["username"], {"postgresql_ops": {"username": "text_pattern_ops"}}),
+    ("ix_sprints_status", "sprints", ["status"], {}),
+    ("uq_words_user_sprint", "words", ["user_id", "sprint_id"], {"unique": True}),
+    ("ix_words_sprint_submitted", "words", ["sprint_id", "submitted_at"], {}),
+    ("ix_words_submitted_at", "words", ["submitted_at"], {}),
+    ("ix_processed_updates_received_at", "processed_updates", ["received_at"], {}),
+)
+
+INVALID_INDEX = sa.text("SELECT NOT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)")
+
+
+def upgrade() -> None:
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+    if "words" in existing:
+        op.execute(DELETE_DUPLICATE_WORDS)
+    if "users" not in existing:
+        op.create_table(
+            "users",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("username", sa.String(), nullable=True),
+            sa.Column("joined_at", sa.DateTime()),
+        )
+    if "sprints" not in existing:
+        op.create_table(
+            "sprints",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("duration", sa.Integer(), nullable=False),
+            sa.Column("theme", sa.String(), nullable=False),
+            sa.Column("start_date", sa.DateTime()),
+            sa.Column("end_date", sa.DateTime()),
+            sa.Column("status", sa.Enum("active", "completed", name="sprintstatus")),
+        )
+    if "words" not in existing:
+        op.create_table(
+            "words",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("sprint_id", sa.Integer(), nullable=False),
+            sa.Column("words", sa.String(), nullable=False),
+            sa.Column("language", sa.String(), nullable=False),
+            sa.Column("submitted_at", sa.DateTime()),
+        )
+    if "leader_leases" not in existing:
+        op.create_table(
+            "leader_leases",
+            sa.Column("name", sa.String(), primary_key=True),
+            sa.Column("holder", sa.String(), nullable=False),
+            sa.Column("expires_at", sa.DateTime(), nullable=False),
+        )
+    if "processed_updates" not in existing:
+        op.create_table(
+            "processed_updates",
+            sa.Column("update_id", sa.BigInteger(), primary_key=True, autoincrement=False),
+            sa.Column("received_at", sa.DateTime(), nullable=False),
+        )
+
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        for name, table, columns, options in INDEXES:
+            op.create_index(name, table, columns, if_not_exists=True, **options)
+        return
+    # words у старых баз большая: строим CONCURRENTLY, чтобы не блокировать запись на время
+    # миграции. autocommit_block сначала фиксирует транзакцию с таблицами и удалением дублей
+    with op.get_context().autocommit_block():
+        for name, table, columns, options in INDEXES:
+            # Прерванная сборка CONCURRENTLY оставляет INVALID индекс, который IF NOT EXISTS пропустил бы
+            if bind.scalar(INVALID_INDEX, {"name": name}):
+                op.drop_index(name, table_name=table, postgresql_concurrently=True)
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True, **options)
+
+def downgrade() -> None:
+    for table in ("processed_updates", "leader_leases", "words", "sprints", "users"):
+        op.drop_table(table)
+    sa.Enum(name="sprintstatus").drop(op.get_bind(), checkfirst=True)
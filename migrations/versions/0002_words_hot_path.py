@@ -0,0 +1,44 @@
+"""Export index and words.sprint_id foreign key
+
+На PostgreSQL индекс строится CONCURRENTLY, а внешний ключ добавляется как
+NOT VALID и проверяется отдельно: ни то, ни другое не блокирует запись в words.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 12:10:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        op.create_index("ix_words_sprint_id_id", "words", ["sprint_id", "id"], if_not_exists=True)
+        # SQLite не проверяет внешние ключи без PRAGMA foreign_keys, пересоздавать таблицу ради него незачем
+        return
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_words_sprint_id_id", "words", ["sprint_id", "id"], postgresql_concurrently=True, if_not_exists=True
+        )
+    op.execute(
+        "ALTER TABLE words ADD CONSTRAINT fk_words_sprint_id "
+        "FOREIGN KEY (sprint_id) REFERENCES sprints (id) NOT VALID"
+    )
+    op.execute("ALTER TABLE words VALIDATE CONSTRAINT fk_words_sprint_id")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        op.drop_constraint("fk_words_sprint_id", "words", type_="foreignkey")
+        with op.get_context().autocommit_block():
+            op.drop_index("ix_words_sprint_id_id", table_name="words", postgresql_concurrently=True)
+    else:
+        op.drop_index("ix_words_sprint_id_id", table_name="words")
@@ -0,0 +1,29 @@
+"""users.is_blocked and users.last_seen
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 13:40:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Столбцы с константным DEFAULT PostgreSQL 11+ добавляет без перезаписи таблицы
+    op.add_column("users", sa.Column("is_blocked", sa.Boolean(), nullable=False, server_default=sa.false()))
+    op.add_column("users", sa.Column("last_seen", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("users") as batch_op:
+        batch_op.drop_column("last_seen")
+        batch_op.drop_column("is_blocked")
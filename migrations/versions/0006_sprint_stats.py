@@ -0,0 +1,32 @@
+"""sprint_stats
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 19:05:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "sprint_stats",
+        sa.Column("sprint_id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("last_word_id", sa.Integer(), nullable=False),
+        sa.Column("state", sa.Text(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("sprint_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("sprint_stats")
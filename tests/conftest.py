@@ -0,0 +1,7 @@
+import os
+import tempfile
+
+# app.config читает окружение при импорте: тесты работают с отдельной SQLite-базой
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='sprintbot-tests-'), 'test.db')}")
+os.environ.setdefault("TELEGRAM_TOKEN", "123:test")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
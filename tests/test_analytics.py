@@ -0,0 +1,67 @@
+import random
+from collections import Counter
+
+from app.analytics import SpaceSaving
+
+
+def skewed_stream(seed=7, length=20000, keys=500):
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) ** 1.2 for rank in range(keys)]
+    return rng.choices([f"w{rank}" for rank in range(keys)], weights=weights, k=length)
+
+
+def test_counts_bound_true_frequency_from_above_within_error():
+    stream = skewed_stream()
+    summary = SpaceSaving(50)
+    for key in stream:
+        summary.add(key, key)
+    truth = Counter(stream)
+    assert len(summary) == 50
+    for form, count, error in summary.top(50):
+        assert count - error <= truth[form] <= count
+        # Ошибка не больше минимального счётчика, а он не больше N / capacity
+        assert error <= len(stream) / 50
+
+
+def test_every_key_above_n_over_capacity_is_kept():
+    stream = skewed_stream()
+    summary = SpaceSaving(50)
+    for key in stream:
+        summary.add(key, key)
+    frequent = {key for key, count in Counter(stream).items() if count > len(stream) / 50}
+    assert frequent
+    assert frequent <= {form for form, _, _ in summary.top(50)}
+
+
+def test_exact_while_under_capacity_and_weighted_adds():
+    summary = SpaceSaving(3)
+    summary.add("a", "a", 5)
+    summary.add("b", "b")
+    summary.add("a", "a", 2)
+    assert summary.top(2) == [("a", 7, 0), ("b", 1, 0)]
+
+
+def test_newcomer_inherits_the_evicted_minimum_as_error():
+    summary = SpaceSaving(2)
+    summary.add("a", "a", 5)
+    summary.add("b", "b", 2)
+    summary.add("c", "c")
+    assert summary.top(2) == [("a", 5, 0), ("c", 3, 2)]
+
+
+def test_most_frequent_form_is_shown():
+    summary = SpaceSaving(2)
+    for form in ("Море", "море", "море", "МОРЕ"):
+        summary.add("море", form)
+    assert summary.top(1) == [("море", 4, 0)]
+
+
+def test_dump_and_restore_round_trip_into_smaller_summary():
+    summary = SpaceSaving(3)
+    for key, count in (("a", 5), ("b", 3), ("c", 1)):
+        summary.add(key, key, count)
+    restored = SpaceSaving(2)
+    restored.restore(summary.dump())
+    assert restored.top(3) == [("a", 5, 0), ("b", 3, 0)]
+    restored.add("d", "d")
+    assert restored.top(2) == [("a", 5, 0), ("d", 4, 3)]
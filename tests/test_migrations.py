@@ -0,0 +1,27 @@
+import sqlalchemy as sa
+
+from app.db import run_migrations
+
+
+def test_initial_migration_drops_duplicate_submissions(tmp_path):
+    engine = sa.create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        # Таблица из create_all старой версии: без уникального индекса, с дублями от гонки
+        conn.execute(sa.text(
+            "CREATE TABLE words (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, sprint_id INTEGER NOT NULL, "
+            "words VARCHAR NOT NULL, language VARCHAR NOT NULL, submitted_at DATETIME)"
+        ))
+        conn.execute(sa.text(
+            "INSERT INTO words (id, user_id, sprint_id, words, language) VALUES "
+            "(1, 10, 1, 'море', 'ru'), (2, 10, 1, 'море', 'ru'), (3, 10, 2, 'sea', 'en'), "
+            "(4, 11, 1, 'лес', 'ru'), (5, 10, 1, 'небо', 'ru'), (6, 11, 1, 'лес', 'ru')"
+        ))
+
+    with engine.begin() as conn:
+        run_migrations(conn, "0001")
+
+    with engine.connect() as conn:
+        rows = conn.execute(sa.text("SELECT id, user_id, sprint_id FROM words ORDER BY id")).all()
+        indexes = {index["name"]: index for index in sa.inspect(conn).get_indexes("words")}
+    assert rows == [(1, 10, 1), (3, 10, 2), (4, 11, 1)]
+    assert indexes["uq_words_user_sprint"]["unique"]
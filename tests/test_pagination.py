@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.models import Base, User
+from app.pagination import (
+    NEXT,
+    PREV,
+    USERS,
+    callback_data,
+    fetch_page,
+    parse_callback_data,
+    parse_user_filters,
+    users_query,
+)
+
+
+def fetch(tmp_path, ids, cursor, direction, page_size=3):
+    async def run():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / f'pages-{direction}{cursor}.db'}")
+        try:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            async with async_sessionmaker(engine)() as db:
+                db.add_all(User(id=user_id, username=f"user{user_id}") for user_id in ids)
+                await db.commit()
+                page = await fetch_page(db, users_query({}), User.id, cursor, direction, page_size)
+        finally:
+            await engine.dispose()
+        return [row.id for row in page.rows], page.has_prev, page.has_next
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("cursor, direction, expected", [
+    (0, NEXT, ([1, 2, 3], False, True)),
+    (3, NEXT, ([5, 8, 13], True, True)),
+    (13, NEXT, ([21], True, False)),
+    (21, NEXT, ([], True, False)),
+    (21, PREV, ([5, 8, 13], True, True)),
+    (5, PREV, ([1, 2, 3], False, True)),
+])
+def test_keyset_pages_over_gaps_in_ids(tmp_path, cursor, direction, expected):
+    assert fetch(tmp_path, [1, 2, 3, 5, 8, 13, 21], cursor, direction) == expected
+
+
+def test_exactly_full_last_page_has_no_next(tmp_path):
+    # Лишняя строка в LIMIT page_size + 1 — единственный признак следующей страницы
+    assert fetch(tmp_path, [1, 2, 3, 4, 5, 6], 3, NEXT) == ([4, 5, 6], True, False)
+    assert fetch(tmp_path, [1, 2, 3, 4, 5, 6], 4, PREV) == ([1, 2, 3], False, True)
+
+
+def test_callback_data_round_trips_separators_in_filters():
+    filters = {"prefix": "a|b,c:d%", "since": "2026-01-02"}
+    data = callback_data(USERS, PREV, 42, filters)
+    assert parse_callback_data(data) == (USERS, PREV, 42, filters)
+
+
+def test_longest_prefix_still_fits_callback_data():
+    filters = parse_user_filters(["@" + "ж|" * 40, "since:2026-01-02"])
+    data = callback_data(USERS, NEXT, 2 ** 63 - 1, filters)
+    assert len(data.encode()) <= 64
+    assert parse_callback_data(data)[3] == filters
@@ -0,0 +1,70 @@
+import pytest
+
+from app import profanity
+from app.profanity import ProfanityMatcher, normalize
+
+ENTRIES = ["хуй", "нахуй", "еб*", "ебан*", "!ебонит*", "!еблан", "ass", "bad word", "!hell", "hel*"]
+
+
+@pytest.fixture(scope="module")
+def matcher():
+    return ProfanityMatcher(ENTRIES)
+
+
+def find(matcher, text):
+    return matcher.find(normalize(text))
+
+
+@pytest.mark.parametrize("text, expected", [
+    # Запись, которая заканчивается внутри более длинной, не мешает найти длинную
+    ("иди нахуй", "нахуй"),
+    ("хуй", "хуй"),
+    # Целое слово не совпадает как часть другого слова ни в начале, ни в конце
+    ("хуйня", None),
+    ("class", None),
+    ("ass", "ass"),
+    # Две основы на одном префиксе: раньше заканчивается короткая
+    ("ебанат", "еб*"),
+    # Совпадение не с начала слова пропускается, поиск идёт дальше по тексту
+    ("поеб ебало", "еб*"),
+    ("поеб", None),
+])
+def test_overlapping_entries(matcher, text, expected):
+    assert find(matcher, text) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("ебонит", None),
+    ("ебонитовый стержень", None),
+    ("еблан", None),
+    # Исключение — целое слово, а не основа: длиннее уже не исключение
+    ("ебланище", "еб*"),
+    ("ебонит и ебало", "еб*"),
+    ("hell", None),
+    ("hello", "hel*"),
+])
+def test_exceptions_only_cover_their_own_word(matcher, text, expected):
+    assert find(matcher, text) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("a bad word here", "bad word"),
+    ("a bad, word", "bad word"),
+    ("a bad wordy", None),
+    ("bad", None),
+])
+def test_phrase_entries(matcher, text, expected):
+    assert find(matcher, text) == expected
+
+
+def test_homoglyphs_and_leetspeak(matcher):
+    assert find(matcher, "xуй") == "хуй"
+    assert find(matcher, "@ss") == "ass"
+    assert find(matcher, "ЁБаный") == "еб*"
+
+
+def test_builtin_wordlists():
+    builtin = profanity.load()
+    assert builtin.find(normalize("эбонит и ебонит")) is None
+    assert builtin.find(normalize("what the fuck")) is not None
+    assert builtin.find(normalize("hello scunthorpe")) is None
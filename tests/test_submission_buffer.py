@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+
+from app import submission_buffer as module
+from app.submission_buffer import SubmissionBuffer
+
+
+class FakeDatabase:
+    """Stands in for SessionLocal and crud.insert_words: counts statements and commits."""
+
+    def __init__(self, existing=(), fail_on=None):
+        self.committed = set(existing)
+        self.statements = []
+        self.commits = 0
+        self.fail_on = fail_on
+
+    def session(self):
+        return FakeSession(self)
+
+    async def insert_words(self, db, rows, commit=True):
+        assert not commit
+        self.statements.append(rows)
+        if self.fail_on is not None and any(row["sprint_id"] == self.fail_on for row in rows):
+            raise RuntimeError("insert failed")
+        keys = {(row["user_id"], row["sprint_id"]) for row in rows}
+        inserted = keys - self.committed - db.staged
+        db.staged |= inserted
+        return inserted
+
+
+class FakeSession:
+    def __init__(self, database):
+        self.database = database
+        self.staged = set()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        # Без commit staged просто теряется, как при откате
+        return False
+
+    async def commit(self):
+        self.database.committed |= self.staged
+        self.database.commits += 1
+
+
+@pytest.fixture
+def database(monkeypatch):
+    database = FakeDatabase(existing={(1, 99)})
+    monkeypatch.setattr(module, "SessionLocal", database.session)
+    monkeypatch.setattr(module, "insert_words", database.insert_words)
+    return database
+
+
+def submit_all(buffer, submissions):
+    async def run():
+        results = await asyncio.gather(
+            *(buffer.submit(user_id, sprint_ids, "слово", "ru") for user_id, sprint_ids in submissions),
+            return_exceptions=True,
+        )
+        await buffer.stop()
+        return results
+
+    return asyncio.run(run())
+
+
+def test_each_batch_is_written_and_committed_once(database):
+    buffer = SubmissionBuffer(batch_wait=0.05, batch_size=3)
+    results = submit_all(buffer, [(user_id, [1, 2]) for user_id in range(1, 8)])
+    assert results == [[1, 2]] * 7
+    assert [len(rows) for rows in database.statements] == [6, 6, 2]
+    assert database.commits == buffer.batches == 3
+    written = [(row["user_id"], row["sprint_id"]) for rows in database.statements for row in rows]
+    assert len(written) == len(set(written)) == buffer.rows == 14
+
+
+def test_duplicates_in_batch_and_existing_rows_are_not_accepted_twice(database):
+    buffer = SubmissionBuffer(batch_wait=0.05, batch_size=10)
+    results = submit_all(buffer, [(1, [5, 99]), (1, [5]), (2, [5])])
+    assert results == [[5], [], [5]]
+    # Вторая заявка (1, 5) в той же пачке в INSERT не попадает
+    assert [(row["user_id"], row["sprint_id"]) for row in database.statements[0]] == [(1, 5), (1, 99), (2, 5)]
+    assert database.commits == 1
+
+
+def test_failed_batch_rejects_every_caller_and_commits_nothing(database):
+    database.fail_on = 3
+    buffer = SubmissionBuffer(batch_wait=0.05, batch_size=2, max_pending=2)
+    results = submit_all(buffer, [(1, [1]), (2, [3]), (3, [1]), (4, [2])])
+    assert [type(result) for result in results[:2]] == [RuntimeError, RuntimeError]
+    # Места в очереди освобождены, следующая пачка записана как обычно
+    assert results[2:] == [[1], [2]]
+    assert database.commits == buffer.batches == 1
+    assert (1, 1) not in database.committed and (3, 1) in database.committed
+
+
+def test_stop_flushes_without_waiting_for_the_batch_window(database):
+    buffer = SubmissionBuffer(batch_wait=30, batch_size=100)
+
+    async def run():
+        pending = asyncio.ensure_future(buffer.submit(1, [1], "слово", "ru"))
+        await asyncio.sleep(0)
+        await asyncio.wait_for(buffer.stop(), 1)
+        return await pending
+
+    assert asyncio.run(run()) == [1]
+    assert database.commits == 1
@@ -0,0 +1,69 @@
+from app.throttle import ALLOWED, DROPPED, MUTED, UserThrottle
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_throttle(clock, **options):
+    options = {"rate": 1.0, "burst": 3, "mute_after": 100, "exempt": frozenset(), "clock": clock, **options}
+    return UserThrottle(**options)
+
+
+def test_burst_then_refill_at_rate():
+    clock = FakeClock()
+    throttle = make_throttle(clock)
+    assert [throttle.check(1) for _ in range(4)] == [ALLOWED, ALLOWED, ALLOWED, DROPPED]
+    clock.now += 0.5
+    assert throttle.check(1) == DROPPED
+    clock.now += 0.5
+    assert throttle.check(1) == ALLOWED
+    assert throttle.check(1) == DROPPED
+
+
+def test_refill_is_capped_at_burst():
+    clock = FakeClock()
+    throttle = make_throttle(clock)
+    throttle.check(1)
+    clock.now += 3600
+    assert [throttle.check(1) for _ in range(4)] == [ALLOWED, ALLOWED, ALLOWED, DROPPED]
+
+
+def test_buckets_are_per_user_and_exempt_users_skip_them():
+    clock = FakeClock()
+    throttle = make_throttle(clock, burst=1, exempt=frozenset({7}))
+    assert throttle.check(1) == ALLOWED
+    assert throttle.check(1) == DROPPED
+    assert throttle.check(2) == ALLOWED
+    assert all(throttle.check(7) == ALLOWED for _ in range(10))
+    assert throttle.check(None) == ALLOWED
+
+
+def test_mute_doubles_and_spam_during_mute_empties_the_bucket():
+    clock = FakeClock()
+    throttle = make_throttle(clock, burst=1, mute_after=2, mute_seconds=10, max_mute_seconds=15)
+    assert [throttle.check(1) for _ in range(3)] == [ALLOWED, DROPPED, MUTED]
+    assert throttle.muted_for(1) == 10
+    clock.now += 9
+    assert throttle.check(1) == DROPPED
+    # Ведро обнулилось на последнем апдейте в муте и за секунду набрало один токен
+    clock.now += 2
+    assert throttle.check(1) == ALLOWED
+    assert [throttle.check(1) for _ in range(2)] == [DROPPED, MUTED]
+    assert throttle.muted_for(1) == 15
+
+
+def test_idle_buckets_are_evicted():
+    clock = FakeClock()
+    throttle = make_throttle(clock, idle_ttl=60, max_users=2)
+    throttle.check(1)
+    throttle.check(2)
+    throttle.check(3)
+    assert len(throttle) == 2
+    clock.now += 61
+    throttle.check(4)
+    assert len(throttle) == 1